@@ -10,9 +10,10 @@ Performs multiple operations on a Serafin file:
 import sys
 from tqdm import tqdm
 
+from pyteltools.conf import settings
 from pyteltools.geom.transformation import Transformation
 from pyteltools.slf import Serafin
-from pyteltools.slf.variables import do_calculations_in_frame, get_necessary_equations
+from pyteltools.slf.variables import get_necessary_equations, VariableCalculationPlan
 from pyteltools.slf.variable.variables_2d import FRICTION_LAWS, get_US_equation, STRICKLER_ID
 from pyteltools.utils.cli_base import logger, PyTelToolsArgParse
 
@@ -61,13 +62,17 @@ def slf_base(args):
         necessary_equations = get_necessary_equations(resin.header.var_IDs, output_header.var_IDs,
                                                       is_2d=resin.header.is_2d, us_equation=us_equation)
 
-        with Serafin.Write(args.out_slf, args.lang, overwrite=args.force) as resout:
+        plan = VariableCalculationPlan(necessary_equations, output_header.var_IDs, output_header.np_float_type,
+                                       is_2d=output_header.is_2d, us_equation=us_equation,
+                                       static_var_IDs=resin.get_static_var_IDs())
+        values = plan.new_output_values(output_header.nb_nodes)
+
+        with Serafin.Write(args.out_slf, args.lang, overwrite=args.force,
+                           buffer_size=settings.SERAFIN_WRITE_BUFFER_SIZE) as resout:
             resout.write_header(output_header)
 
             for time_index, time in tqdm(resin.subset_time(args.start, args.end, args.ech), unit='frame'):
-                values = do_calculations_in_frame(necessary_equations, resin, time_index, output_header.var_IDs,
-                                                  output_header.np_float_type, is_2d=output_header.is_2d,
-                                                  us_equation=us_equation, ori_values={})
+                plan.compute_in_frame(resin, time_index, output_values=values)
                 resout.write_entire_frame(output_header, time + args.shift_time, values)
 
 
@@ -15,7 +15,7 @@ from tqdm import tqdm
 
 from pyteltools.geom import Shapefile
 from pyteltools.slf import Serafin
-from pyteltools.slf.variables import do_calculations_in_frame, get_necessary_equations
+from pyteltools.slf.variables import get_necessary_equations, VariableCalculationPlan
 from pyteltools.slf.variable.variables_2d import FRICTION_LAWS, get_US_equation, STRICKLER_ID
 from pyteltools.slf.volume import VolumeCalculator
 from pyteltools.utils.cli_base import logger, PyTelToolsArgParse
@@ -117,6 +117,10 @@ def slf_bottom_friction(args):
         output_header.empty_variables()
         for var_ID in out_varIDs:
             output_header.add_variable_from_ID(var_ID)
+        plan = VariableCalculationPlan(necessary_equations, out_varIDs, resin.header.np_float_type, is_2d=True,
+                                       us_equation=strickler_equation, known_var_IDs=ori_values.keys(),
+                                       static_var_IDs=resin.get_static_var_IDs())
+        values = plan.new_output_values(resin.header.nb_nodes)
 
         with Serafin.Write(args.out_slf, args.lang, args.force) as resout:
             resout.write_header(output_header)
@@ -127,16 +131,10 @@ def slf_bottom_friction(args):
                 csvwriter.writerow(['time'] + names)
 
                 for time_index, time in enumerate(tqdm(resin.time)):
-                    values = do_calculations_in_frame(necessary_equations, resin, time_index, out_varIDs,
-                                                      resin.header.np_float_type, is_2d=True,
-                                                      us_equation=strickler_equation, ori_values=ori_values)
+                    plan.compute_in_frame(resin, time_index, ori_values, output_values=values)
                     resout.write_entire_frame(output_header, time, values)
 
-                    row = [time]
-                    for j in range(len(calculator.polygons)):
-                        weight = calculator.weights[j]
-                        volume = calculator.volume_in_frame_in_polygon(weight, values[pos_TAU], calculator.polygons[j])
-                        row.append(volume)
+                    row = [time] + calculator.volumes_in_frame(values[pos_TAU])
                     csvwriter.writerow(row)
 
 
@@ -72,16 +72,11 @@ def slf_flux2d(args):
         calculator.construct_triangles(tqdm)
         calculator.construct_intersections()
         result = []
-        for time_index, time in enumerate(tqdm(resin.time, unit='frame')):
+        frames = resin.iter_frames(range(len(resin.time)), calculator.var_IDs)
+        for time, (_, values) in zip(tqdm(resin.time, unit='frame'), frames):
             i_result = [str(time)]
-            values = []
 
-            for var_ID in calculator.var_IDs:
-                values.append(resin.read_var_in_frame(time_index, var_ID))
-
-            for j in range(len(polylines)):
-                intersections = calculator.intersections[j]
-                flux = calculator.flux_in_frame(intersections, values)
+            for flux in calculator.fluxes_in_frame(values):
                 i_result.append(settings.FMT_FLOAT.format(flux))
 
             result.append(i_result)
@@ -4,6 +4,7 @@ Interpolate on a set of points for every frame
 """
 
 import csv
+import numpy as np
 import sys
 from tqdm import tqdm
 from shapefile import ShapefileException
@@ -54,6 +55,15 @@ def slf_int2d(args):
 
         var_IDs = output_header.var_IDs if args.vars is None else args.vars
 
+        # Read only the values at the nodes of the triangles containing the points
+        inside_interpolators = [point_interpolator for point_interpolator in point_interpolators
+                                if point_interpolator is not None]
+        node_indices = np.array([ijk for ijk, _ in inside_interpolators]).flatten()
+        weights = np.array([interpolator for _, interpolator in inside_interpolators])
+        nodes_values = resin.read_nodes_time_series(node_indices, var_IDs)
+        interpolated_values = (nodes_values.reshape(len(resin.time), len(var_IDs), nb_inside, 3) * weights).sum(axis=3)
+        inside_positions = np.cumsum(is_inside) - 1
+
         mode = 'w' if args.force else 'x'
         with open(args.out_csv, mode, newline='') as csvfile:
             csvwriter = csv.writer(csvfile, delimiter=args.sep)
@@ -71,8 +81,7 @@ def slf_int2d(args):
             for time_index, time in enumerate(tqdm(resin.time, unit='frame')):
                 values = [time_index, time]
 
-                for var_ID in var_IDs:
-                    var = resin.read_var_in_frame(time_index, var_ID)
+                for i_var, var_ID in enumerate(var_IDs):
                     for pt_id, (point, point_interpolator) in enumerate(zip(points, point_interpolators)):
                         if args.long:
                             values_long = values + [str(pt_id + 1)] + [settings.FMT_COORD.format(x) for x in point]
@@ -83,8 +92,8 @@ def slf_int2d(args):
                             else:
                                 values.append(settings.NAN_STR)
                         else:
-                            (i, j, k), interpolator = point_interpolator
-                            int_value = settings.FMT_FLOAT.format(interpolator.dot(var[[i, j, k]]))
+                            int_value = settings.FMT_FLOAT.format(
+                                interpolated_values[time_index, i_var, inside_positions[pt_id]])
                             if args.long:
                                 csvwriter.writerow(values_long + [var_ID, int_value])
                             else:
@@ -17,6 +17,7 @@ import sys
 from pyteltools.conf import settings
 from pyteltools.geom import Shapefile
 from pyteltools.slf import Serafin
+from pyteltools.slf.misc import MAX, MIN, ScalarMaxMinMeanCalculator
 from pyteltools.utils.cli_base import logger, PyTelToolsArgParse
 
 
@@ -30,8 +31,10 @@ def slf_max_over_files(args):
 
     if args.operation == 'max':
         fun = np.maximum
+        max_min_type = MAX
     elif args.operation == 'min':
         fun = np.minimum
+        max_min_type = MIN
     else:
         raise NotImplementedError
 
@@ -96,13 +99,17 @@ def slf_max_over_files(args):
                     logger.critical('The mesh of %s is different from the first one' % in_slf)
                     sys.exit(1)
 
-            for time_index, time in enumerate(resin.time):
-                for j, var_ID in enumerate(var_IDs):
-                    values = resin.read_var_in_frame(time_index, var_ID)
-                    if time_index == 0 and i == 0:
-                        out_values[j, :] = values
-                    else:
-                        out_values[j, mask_nodes] = fun(out_values[j, mask_nodes], values[mask_nodes])
+            if not resin.time:
+                continue
+            if i == 0:
+                out_values[:, :] = resin.read_frame(0, var_IDs)
+
+            # Frames of the file are reduced (in parallel if ncsize > 1) and then merged on masked nodes
+            calculator = ScalarMaxMinMeanCalculator(max_min_type, resin, [(var_ID, None, None) for var_ID in var_IDs],
+                                                    list(range(len(resin.time))))
+            calculator.run(args.ncsize)
+            values = calculator.finishing_up()
+            out_values[:, mask_nodes] = fun(out_values[:, mask_nodes], values[:, mask_nodes])
 
     with Serafin.Write(args.out_slf, args.lang, overwrite=args.force) as resout:
         resout.write_header(output_header)
@@ -118,7 +125,7 @@ parser.add_argument('--vars', nargs='+', help='variable(s) to extract (by defaul
                     metavar=('VA', 'VB'))
 parser.add_argument('--lang', help="Serafin language for variables detection: 'fr' or 'en'",
                     default=settings.LANG)
-parser.add_group_general(['force', 'verbose'])
+parser.add_group_general(['force', 'verbose', 'ncsize'])
 
 
 if __name__ == '__main__':
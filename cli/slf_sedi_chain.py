@@ -10,7 +10,7 @@ import sys
 from pyteltools.geom.transformation import Transformation
 from pyteltools.slf import Serafin
 from pyteltools.slf.variable.variables_2d import FRICTION_LAWS, get_US_equation, STRICKLER_ID
-from pyteltools.slf.variables import do_calculations_in_frame, get_necessary_equations
+from pyteltools.slf.variables import get_necessary_equations, VariableCalculationPlan
 from pyteltools.utils.cli_base import logger, PyTelToolsArgParse
 
 
@@ -53,6 +53,8 @@ def slf_sedi_chain(args):
         output_header.empty_variables()
         output_header.add_variable_from_ID('B')
         output_header.add_variable_from_ID('EV')
+        plan = VariableCalculationPlan(necessary_equations, ['TAU'], output_header.np_float_type, is_2d=True,
+                                       us_equation=us_equation, static_var_IDs=resin.get_static_var_IDs())
 
         with Serafin.Write(args.out_slf, args.lang, overwrite=args.force) as resout:
             resout.write_header(output_header)
@@ -62,9 +64,7 @@ def slf_sedi_chain(args):
             initial_bottom = resin.read_var_in_frame(0, 'B')
             bottom = copy(initial_bottom)
             for time_index, time in enumerate(resin.time):
-                tau = do_calculations_in_frame(necessary_equations, resin, time_index, ['TAU'],
-                                               output_header.np_float_type, is_2d=True, us_equation=us_equation,
-                                               ori_values={})[0]
+                tau = plan.compute_in_frame(resin, time_index)[0]
                 if prev_time is not None:
                     dt = time - prev_time
                     mean_tau = (prev_tau + tau)/2
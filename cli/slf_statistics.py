@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Compute several temporal statistics of 2D variables in a single pass over the frames.
+The output file contains a single frame with one variable per statistic and per input variable.
+
+Available statistics are: max, min, mean, std (standard deviation), var (variance), tmax and tmin (time of max/min),
+count (number of frames above a threshold) and percentiles (estimated with the P-square algorithm).
+"""
+import sys
+
+from pyteltools.slf import Serafin
+from pyteltools.slf.misc import StatisticsCalculator
+from pyteltools.utils.cli_base import logger, PyTelToolsArgParse
+
+
+def slf_statistics(args):
+    if not args.stats and not args.percentiles:
+        logger.critical('No statistic to compute.')
+        sys.exit(1)
+    if 'count' in args.stats and args.threshold is None:
+        logger.critical('A threshold is required to count values above it (argument `--threshold`).')
+        sys.exit(1)
+
+    with Serafin.Read(args.in_slf, args.lang) as resin:
+        resin.read_header()
+        logger.info(resin.header.summary())
+        if not resin.header.is_2d:
+            logger.critical('The file has to be a 2D Serafin!')
+            sys.exit(3)
+        resin.get_time()
+
+        var_IDs = resin.header.var_IDs if args.vars is None else args.vars
+        for var_ID in var_IDs:
+            if var_ID not in resin.header.var_IDs:
+                logger.critical('The variable %s is missing in %s' % (var_ID, args.in_slf))
+                sys.exit(3)
+        selected_scalars = [(var_ID, resin.header.var_names[resin.header.var_IDs.index(var_ID)],
+                             resin.header.var_units[resin.header.var_IDs.index(var_ID)]) for var_ID in var_IDs]
+
+        time_indices = [time_index for time_index, _ in resin.subset_time(args.start, args.end, args.ech)]
+        if not time_indices:
+            logger.critical('No frame in the selected time range.')
+            sys.exit(1)
+
+        calculator = StatisticsCalculator(resin, selected_scalars, time_indices, args.stats, args.threshold,
+                                          args.percentiles)
+        calculator.run()
+        values = calculator.finishing_up()
+
+        output_header = resin.header.copy()
+        output_header.empty_variables()
+        for var_ID, var_name, var_unit in calculator.output_variables():
+            output_header.add_variable_str(var_ID, var_name, var_unit)
+        if args.to_single_precision:
+            output_header.to_single_precision()
+        if args.toggle_endianness:
+            output_header.toggle_endianness()
+
+        with Serafin.Write(args.out_slf, args.lang, overwrite=args.force) as resout:
+            resout.write_header(output_header)
+            resout.write_entire_frame(output_header, resin.time[time_indices[0]], values)
+
+
+parser = PyTelToolsArgParse(description=__doc__, add_args=['in_slf', 'out_slf'])
+parser.add_argument('--vars', nargs='+', help='variable(s) to analyse (by default: all variables)', default=None,
+                    metavar=('VA', 'VB'))
+parser.add_argument('--stats', nargs='*', help='statistic(s) to compute', choices=StatisticsCalculator.STATISTICS,
+                    default=['max', 'min', 'mean'])
+parser.add_argument('--threshold', type=float, help='threshold for statistic `count`')
+parser.add_argument('--percentiles', nargs='+', type=float, help='percentile(s) to estimate (between 0 and 100)',
+                    default=[], metavar=('PA', 'PB'))
+
+group_temp = parser.add_argument_group('Temporal operations (optional)')
+group_temp.add_argument('--ech', type=int, help='frequency sampling of input', default=1)
+group_temp.add_argument('--start', type=float, help='minimum time (in seconds)', default=-float('inf'))
+group_temp.add_argument('--end', type=float, help='maximum time (in seconds)', default=float('inf'))
+
+parser.add_group_general(['force', 'verbose'])
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    for percentile in args.percentiles:
+        if not 0 <= percentile <= 100:
+            parser.error('argument --percentiles: %g is not between 0 and 100' % percentile)
+
+    try:
+        slf_statistics(args)
+    except (Serafin.SerafinRequestError, Serafin.SerafinValidationError):
+        # Message is already reported by slf logger
+        sys.exit(1)
@@ -76,9 +76,7 @@ def slf_volume(args):
             i_result = [str(resin.time[time_index])]
             values = calculator.read_values_in_frame(time_index)
 
-            for j in range(len(calculator.polygons)):
-                weight = calculator.weights[j]
-                volume = calculator.volume_in_frame_in_polygon(weight, values, calculator.polygons[j])
+            for volume in calculator.volumes_in_frame(values):
                 if calculator.volume_type == VolumeCalculator.POSITIVE:
                     for v in volume:
                         i_result.append(settings.FMT_FLOAT.format(v))
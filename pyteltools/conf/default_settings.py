@@ -1,6 +1,7 @@
 from collections import OrderedDict
 import logging
 from multiprocessing import cpu_count
+import os
 
 
 # ~> GENERAL CONFIGURATION
@@ -33,6 +34,54 @@ SERAFIN_EXT = ['.srf', '.slf', '.res', '.geo']
 # Language (for variables detection)
 LANG = 'fr'
 
+# Maximum size (in bytes) of a single read when reading multiple consecutive frames
+SERAFIN_READ_BUFFER_SIZE = 64 * 1024 * 1024
+
+# Maximum gap (in bytes) between two values read at once when extracting values at some nodes
+SERAFIN_READ_MAX_GAP = 4096
+
+# Number of frames read in advance by a background thread when iterating on frames (0 to disable read-ahead)
+SERAFIN_PREFETCH_DEPTH = 2
+
+# Maximum size (in bytes) of frames buffered in memory before being written (0 to write frames one by one)
+# The buffer is allocated progressively: small files never use more memory than their own frames
+SERAFIN_WRITE_BUFFER_SIZE = 64 * 1024 * 1024
+
+# Variables which are read only once if they are constant in time (e.g. bottom or friction coefficient)
+SERAFIN_STATIC_VARIABLES = ['B', 'W', 'RB']
+
+# Number of evenly spaced frames compared to detect constant variables (0 to disable detection)
+# Disabled by default: a variable matching on the sampled frames may still vary in the other frames
+SERAFIN_STATIC_NB_SAMPLES = 0
+
+# Store the parsed header and the time series of read files in a sidecar index file (next to the Serafin file)
+SERAFIN_INDEX_CACHE = False
+
+# Extension appended to the Serafin file name to build its sidecar index file name
+SERAFIN_INDEX_EXT = '.pyttidx'
+
+# ~> INTERPOLATION
+
+# Store the point and line interpolators on disk to reuse them for the same mesh and geometry
+INTERPOLATOR_CACHE = False
+
+# Folder of the interpolator cache files
+INTERPOLATOR_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.pyteltools', 'interpolators')
+
+# Maximum size (in bytes) of the interpolator cache (least recently used files are removed first)
+INTERPOLATOR_CACHE_SIZE = 256 * 1024 * 1024
+
+# ~> CALCULATOR
+
+# Evaluate the arithmetic expressions with numexpr (only if it is installed)
+CALCULATOR_NUMEXPR = True
+
+# Compile the arrival/duration kernel with numba (only if it is installed)
+CALCULATOR_NUMBA = True
+
+# Maximum memory (in bytes) used to evaluate the expressions on a block of frames at once
+CALCULATOR_MEMORY_BUDGET = 128 * 1024 * 1024
+
 # ~> INPUTS/OUTPUTS
 
 # Format to write float values (in CSV, LandXML, VTK)
@@ -41,12 +41,13 @@ class WriteVariableThread(OutputThread):
                 with Serafin.Write(output_name, input_header.language) as output_stream:
                     output_stream.write_header(output_header)
 
-                    for time_value, value_array in pool.evaluate_expressions(self.augmented_path,
-                                                                             input_stream, self.selected_expressions):
+                    for time_values, value_array in pool.evaluate_expressions_by_block(self.augmented_path,
+                                                                                       input_stream,
+                                                                                       self.selected_expressions):
                         if self.canceled:
                             return
-                        i += 1
-                        output_stream.write_entire_frame(output_header, time_value, value_array)
+                        i += len(time_values)
+                        output_stream.write_entire_frames(output_header, time_values, value_array)
 
                         self.tick.emit(100 * i * self.inv_nb_files * inv_nb_frames)
                         QApplication.processEvents()
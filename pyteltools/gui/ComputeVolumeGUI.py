@@ -46,11 +46,7 @@ class VolumeCalculatorThread(OutputThread):
             i_result = [str(self.calculator.input_stream.time[time_index])]
             values = self.calculator.read_values_in_frame(time_index)
 
-            for j in range(len(self.calculator.polygons)):
-                if self.canceled:
-                    return []
-                weight = self.calculator.weights[j]
-                volume = self.calculator.volume_in_frame_in_polygon(weight, values, self.calculator.polygons[j])
+            for volume in self.calculator.volumes_in_frame(values):
                 if self.calculator.volume_type == VolumeCalculator.POSITIVE:
                     for v in volume:
                         i_result.append(self.fmt_float.format(v))
@@ -9,8 +9,8 @@ import sys
 
 from pyteltools.conf import settings
 from pyteltools.slf import Serafin
-from pyteltools.slf.variables import get_available_variables, do_calculations_in_frame, get_necessary_equations, \
-    get_US_equation, new_variables_from_US
+from pyteltools.slf.variables import get_available_variables, get_necessary_equations, get_US_equation, \
+    new_variables_from_US, VariableCalculationPlan
 
 from .util import DoubleSliderBox, FrictionLawMessage, OutputProgressDialog, OutputThread, ProgressBarIterator, \
     PyTelToolWidget, QPlainTextEditLogger, save_dialog, SerafinInputTab, SettlingVelocityMessage, TableWidgetDragRows, \
@@ -28,16 +28,17 @@ class ExtractVariablesThread(OutputThread):
         self.output_header = output_header
         self.time_indices = time_indices
         self.nb_frames = len(time_indices)
+        self.plan = VariableCalculationPlan(necessary_equations, output_header.var_IDs, output_header.np_float_type,
+                                            is_2d=output_header.is_2d, us_equation=us_equation,
+                                            static_var_IDs=input_stream.get_static_var_IDs())
 
     def run(self):
         iter_pbar = ProgressBarIterator.prepare(self.tick.emit, (5, 100))
+        values = self.plan.new_output_values(self.output_header.nb_nodes)
         for time_index in iter_pbar(self.time_indices):
             if self.canceled:
                 return
-            values = do_calculations_in_frame(self.necessary_equations, self.input_stream, time_index,
-                                              self.output_header.var_IDs, self.output_header.np_float_type,
-                                              is_2d=self.output_header.is_2d, us_equation=self.us_equation,
-                                              ori_values={})
+            self.plan.compute_in_frame(self.input_stream, time_index, output_values=values)
 
             self.output_stream.write_entire_frame(self.output_header, self.input_stream.time[time_index], values)
 
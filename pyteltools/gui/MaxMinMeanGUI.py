@@ -60,26 +60,16 @@ class ArrivalDurationThread(OutputThread):
         self.conditions = conditions
         self.nb_conditions = len(self.conditions)
         self.nb_frames = len(time_indices)
-        self.calculators = []
-
-        for condition in self.conditions:
-            self.calculators.append(operations.ArrivalDurationCalculator(self.input_stream, self.time_indices,
-                                                                         condition))
+        self.calculator = operations.ArrivalDurationMultiCalculator(self.input_stream, self.time_indices,
+                                                                    self.conditions)
 
     def run(self):
         iter_pbar = ProgressBarIterator.prepare(self.tick.emit)
         for index in iter_pbar(self.time_indices[1:]):
             if self.canceled:
                 return []
-
-            for calculator in self.calculators:
-                calculator.arrival_duration_in_frame(index)
-
-        values = np.empty((2*self.nb_conditions, self.input_stream.header.nb_nodes))
-        for i, calculator in enumerate(self.calculators):
-            values[2*i, :] = calculator.arrival
-            values[2*i+1, :] = calculator.duration
-        return values
+            self.calculator.arrival_duration_in_frame(index)
+        return self.calculator.finishing_up()
 
 
 class SynchMaxThread(OutputThread):
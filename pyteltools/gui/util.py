@@ -14,8 +14,8 @@ from PyQt5.QtWidgets import (QAbstractItemView, QAction, QApplication, QCheckBox
                              QTableWidget, QTableWidgetItem, QTextEdit, QTreeView, QToolBar, QToolTip,
                              QVBoxLayout, QWidget)
 from shapefile import ShapefileException
-import shapely
 
+from rtree.core import RTreeError
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT
 from matplotlib.figure import Figure
@@ -1185,12 +1185,21 @@ class ConstructIndexThread(OutputThread):
         logging.info('Processing the mesh')
 
         iter_pbar = ProgressBarIterator.prepare(self.tick.emit)
-        for i, j, k in iter_pbar(self.mesh.ikle):
-            if self.canceled:
-                return
-            t = shapely.geometry.Polygon([self.mesh.points[i], self.mesh.points[j], self.mesh.points[k]])
-            self.mesh.triangles[i, j, k] = t
-            self.mesh.index.insert(i, t.bounds, obj=(i, j, k))
+
+        def iter_until_canceled(iterable, unit):
+            for item in iter_pbar(iterable):
+                if self.canceled:
+                    return
+                yield item
+
+        if self.canceled:
+            return
+        try:
+            self.mesh.construct_index(iter_until_canceled)
+        except RTreeError:
+            # canceled before the first element: rtree refuses to bulk load an empty stream
+            if not self.canceled:
+                raise
 
 
 class LoadMeshDialog(OutputProgressDialog):
@@ -11,8 +11,11 @@ The sizes (file, header, frame) are in bytes (8 bits).
 import copy
 import numpy as np
 import os
+from queue import Empty, Queue
 from shapely.geometry import LinearRing
 import struct
+import threading
+import zipfile
 
 from pyteltools.conf import settings
 from pyteltools.slf.variable.variables_2d import VARIABLES_2D
@@ -24,6 +27,9 @@ from .util import logger
 # Encoding Information Type (EIT) for Serafin title, variable names and units
 SLF_EIT = 'iso-8859-1'
 
+# Version of the sidecar index file format (to increment if its content changes)
+INDEX_VERSION = 2
+
 
 VARIABLES_ID_2D, VARIABLES_ID_3D = {'fr': {}, 'en': {}}, {'fr': {}, 'en': {}}
 
@@ -247,6 +253,25 @@ class SerafinHeader:
         fmt = self.endian + str(nb) + self.float_type
         return struct.unpack(fmt, bytes2unpack)
 
+    def _read_array(self, file, value_type, nb_values):
+        """!
+        @brief Read a Fortran record of consecutive values and check its record markers
+        @param file <_io.BufferedReader>: input Serafin stream
+        @param value_type <str>: 'i' for integers or `float_type` for floats
+        @param nb_values <int>: number of values in the record
+        @return <numpy 1D-array>: values in file endianness (read-only view on the record buffer)
+        """
+        value_dtype = np.dtype(self.endian + value_type)
+        record_size = nb_values * value_dtype.itemsize
+        buffer = np.empty(record_size + 8, dtype=np.uint8)
+        if file.readinto(buffer) != buffer.size:
+            raise SerafinValidationError('Unexpected end of file while reading a record of %i values' % nb_values)
+        markers = np.concatenate((buffer[:4], buffer[-4:])).view(self.endian + 'i4')
+        if np.any(markers != record_size):
+            raise SerafinValidationError('Record markers %s are not equal to the record size (%i bytes)'
+                                         % (markers.tolist(), record_size))
+        return buffer[4:-4].view(value_dtype)
+
     def pack_int(self, *args, nb=1):
         """
         Pack integers
@@ -300,6 +325,19 @@ class SerafinHeader:
         """Returns expected file size"""
         return self.header_size + self.nb_frames * self.frame_size
 
+    def get_frame_dtype(self):
+        """!
+        @brief Get the numpy structured data type of a single frame (Fortran record markers are included)
+        Its size is equal to `frame_size`. Field `time` is the frame time and the variable values are
+        in the sub-field `values` of field `var` (with shape = (nb_var, nb_nodes))
+        @return <numpy.dtype>: frame data type (with file endianness)
+        """
+        int_type = self.endian + 'i4'
+        float_type = self.endian + self.float_type
+        var_dtype = np.dtype([('start', int_type), ('values', float_type, (self.nb_nodes,)), ('end', int_type)])
+        return np.dtype([('start', int_type), ('time', float_type), ('end', int_type),
+                         ('var', var_dtype, (self.nb_var,))])
+
     def summary(self):
         template = 'The file is of type {} {}. It has {} variable{}{},\n' \
                    'on {} nodes and {} elements for {} time frame{}.'
@@ -542,21 +580,24 @@ class SerafinHeader:
         self._compute_mesh_coordinates()
 
     def get_all_edges(self):
-        """Get all edges (pair of nodes)"""
-        edges = np.zeros((3 * len(self.ikle_2d), 2), dtype=np.int64)
-        for i, (n1, n2, n3) in enumerate(self.ikle_2d):
-            edges[3 * i, :] = [n1, n2]
-            edges[3 * i + 1, :] = [n2, n3]
-            edges[3 * i + 2, :] = [n3, n1]
-        return edges
+        """Get all edges (pair of nodes), the edges of each element being (n1, n2), (n2, n3) and (n3, n1)"""
+        return np.stack([self.ikle_2d, np.roll(self.ikle_2d, -1, axis=1)], axis=2).reshape(-1, 2)
+
+    def get_edge_keys(self, edges):
+        """!
+        @brief Get an integer identifier of each edge, regardless of the order of its nodes
+        @param edges <numpy.2D-array>: pairs of nodes (1-indexed)
+        @return <numpy.1D-array>: edge keys (int64, as the keys overflow int32 above 65535 nodes)
+        """
+        edges = edges.astype(np.int64)
+        return edges.min(axis=1) * (self.nb_nodes_2d + 1) + edges.max(axis=1)
 
     def get_external_edges(self):
         """Get external edges (pair of nodes)"""
         edges = self.get_all_edges()
-        # Trick to identify unique pair of nodes (even if node orders might differ) in defining a strange function
-        edges_multi = edges[:, 0] * edges[:, 1] / (edges[:, 0] + edges[:, 1])
-        unique, unique_inverse, unique_counts = np.unique(edges_multi, return_inverse=True, return_counts=True)
-        # A boundary node is connected only once to another node (not twice!)
+        _, unique_inverse, unique_counts = np.unique(self.get_edge_keys(edges), return_inverse=True,
+                                                     return_counts=True)
+        # A boundary edge belongs to a single element (not two!)
         boundary_edges = edges[unique_counts[unique_inverse] == 1]
         return boundary_edges
 
@@ -573,30 +614,51 @@ class SerafinHeader:
         - the first boundary node should be the node with the minimum value of x+y (corresponds to the bottom left corner)
         """
         boundary_edges = self.get_external_edges()
+        nb_edges = len(boundary_edges)
+
+        # Node -> edges adjacency (edges of each node are sorted by index, the first unused one is taken first)
+        edge_nodes = boundary_edges.flatten()
+        order = np.argsort(edge_nodes, kind='stable')
+        sorted_nodes = edge_nodes[order]
+        node_edges = (order // 2).tolist()
+        boundary_nodes, node_starts = np.unique(sorted_nodes, return_index=True)  # Node numbering 1-indexed
+        first_position = dict(zip(boundary_nodes.tolist(), node_starts.tolist()))
+        end_position = dict(zip(boundary_nodes.tolist(), node_starts[1:].tolist() + [len(node_edges)]))
+        is_used = [False] * nb_edges
+        edges = boundary_edges.tolist()
+
+        # Candidate first nodes sorted by x+y (and by node number for equal values)
+        x_plus_y = self.x[boundary_nodes - 1] + self.y[boundary_nodes - 1]
+        candidate_first_nodes = boundary_nodes[np.lexsort((boundary_nodes, x_plus_y))].tolist()
 
         # Build boundaries by iteration on all boundary edges (for each boundary, from first node until it loops)
         id_boundary = 1
-        while len(boundary_edges) != 0:
-            boundary_nodes = np.unique(boundary_edges.flatten())  # Node numbering 1-indexed
-            x_plus_y = self.x[boundary_nodes - 1] + self.y[boundary_nodes - 1]
+        nb_used_edges = 0
+        for first_node in candidate_first_nodes:
+            if nb_used_edges == nb_edges:
+                break
+            if all(is_used[edge] for edge in node_edges[first_position[first_node]:end_position[first_node]]):
+                continue
+            logger.debug("Build new boundary from node %i" % first_node)
 
             # current_boundary_nodes, first_node, prev_node and next_node contain 1-indexed node(s)
-            first_node = boundary_nodes[np.argmin(x_plus_y)]
-            logger.debug("Build new boundary from node %i among %i nodes" % (first_node, len(boundary_nodes)))
-            prev_node = copy.deepcopy(first_node)
+            prev_node = first_node
             next_node = -1
 
             # Build list of nodes describing the boundary (/!\ first and last node are explicitly duplicated):
             current_boundary_nodes = [first_node]
             while next_node != first_node:
-                try:
-                    index = np.where(boundary_edges == prev_node)[0][0]
-                except IndexError:
-                    logger.critical(np.where(boundary_edges == prev_node))
+                position = first_position[prev_node]
+                while position < end_position[prev_node] and is_used[node_edges[position]]:
+                    position += 1
+                first_position[prev_node] = position
+                if position == end_position[prev_node]:
                     raise SerafinRequestError('Unexpected error while determining next boundary node after node %i'
                                               % prev_node)
-                n1, n2 = boundary_edges[index, :]
-                boundary_edges = np.delete(boundary_edges, index, axis=0)
+                index = node_edges[position]
+                is_used[index] = True
+                nb_used_edges += 1
+                n1, n2 = edges[index]
                 next_node = n1 if n2 == prev_node else n2
                 prev_node = next_node
                 current_boundary_nodes.append(next_node)
@@ -628,11 +690,9 @@ class SerafinHeader:
         ipobo_2d = np.zeros(self.nb_nodes_2d, dtype=np.int64)
 
         try:
-            id_boundary_node = 0
-            for boundary_nodes in self.iter_on_boundaries():
-                for n in boundary_nodes:
-                    id_boundary_node += 1
-                    ipobo_2d[n - 1] = id_boundary_node
+            boundary_nodes = [n for nodes in self.iter_on_boundaries() for n in nodes]
+            id_boundary_node = len(boundary_nodes)
+            ipobo_2d[np.array(boundary_nodes, dtype=np.int64) - 1] = np.arange(1, id_boundary_node + 1)
 
             self.ipobo = ipobo_2d
             if not self.is_2d:
@@ -759,26 +819,15 @@ class SerafinHeader:
             self.nb_nodes_2d = self.nb_nodes // self.nb_planes
 
         # IKLE
-        file.read(4)
         nb_ikle_values = self.nb_elements * self.nb_nodes_per_elem
-        self.ikle = np.array(self.unpack_int(file.read(4 * nb_ikle_values), nb_ikle_values))
-        file.read(4)
+        self.ikle = self._read_array(file, 'i', nb_ikle_values).astype(np.int64)
 
         # IPOBO
-        file.read(4)
-        self.ipobo = np.array(self.unpack_int(file.read(4 * self.nb_nodes), self.nb_nodes))
-        file.read(4)
-
-        # x coordinates
-        file.read(4)
-        coord_size = self.nb_nodes * self.float_size
-        self.x_stored = np.array(self.unpack_float(file.read(coord_size), self.nb_nodes), dtype=self.np_float_type)
-        file.read(4)
+        self.ipobo = self._read_array(file, 'i', self.nb_nodes).astype(np.int64)
 
-        # y coordinates
-        file.read(4)
-        self.y_stored = np.array(self.unpack_float(file.read(coord_size), self.nb_nodes), dtype=self.np_float_type)
-        file.read(4)
+        # x and y coordinates
+        self.x_stored = self._read_array(file, self.float_type, self.nb_nodes).astype(self.np_float_type)
+        self.y_stored = self._read_array(file, self.float_type, self.nb_nodes).astype(self.np_float_type)
 
         self._compute_mesh_coordinates()
 
@@ -797,7 +846,14 @@ class SerafinHeader:
             raise SerafinValidationError('Something wrong with the file size (header and frames). '
                                          'File is probably corrupted, difference of %i bytes' % diff_size)
 
-        # Deduce variable IDs from names
+        self._set_var_IDs()
+        self._build_ikle_2d()
+
+        logger.debug('Finished reading the header')
+        return self
+
+    def _set_var_IDs(self):
+        """Deduce variable IDs from names"""
         var_table = VARIABLES_ID_2D[self.language] if self.is_2d else VARIABLES_ID_3D[self.language]
         for var_name in self.var_names:
             name = var_name.decode(encoding=SLF_EIT).strip()
@@ -810,9 +866,64 @@ class SerafinHeader:
                 var_id = var_table[name]
             self.var_IDs.append(var_id)
 
-        self._build_ikle_2d()
+    def to_index(self):
+        """!
+        @brief Export the parsed header (read from a file) to be stored in a sidecar index file
+        @return <dict>: arrays to store (with their names as keys)
+        """
+        # Strings are stored as raw bytes (to keep their padding)
+        index = {'endian': np.array(self.endian), 'title': np.frombuffer(self.title, dtype=np.uint8),
+                 'file_format': np.frombuffer(self.file_format, dtype=np.uint8),
+                 'var_names': np.frombuffer(b''.join(self.var_names), dtype=np.uint8),
+                 'var_units': np.frombuffer(b''.join(self.var_units), dtype=np.uint8),
+                 'nb_var_quadratic': np.array(self.nb_var_quadratic), 'params': np.array(self.params),
+                 'date': np.array([] if self.date is None else self.date, dtype=np.int64),
+                 'mesh_size': np.array([self.nb_elements, self.nb_nodes, self.nb_nodes_per_elem]),
+                 'ikle': self.ikle, 'ipobo': self.ipobo, 'x_stored': self.x_stored, 'y_stored': self.y_stored}
+        if not self.is_2d:
+            index['ikle_2d'] = self.ikle_2d
+        return index
 
-        logger.debug('Finished reading the header')
+    def from_index(self, index, file_size):
+        """!
+        @brief Set the header from the content of a sidecar index file (instead of parsing the file)
+        @param index <dict>: arrays read from the sidecar index file (see `to_index`)
+        @param file_size <int>: file size (in bytes)
+        @return <slf.Serafin.SerafinHeader>: output Serafin header
+        """
+        self.file_size = file_size
+        self.endian = str(index['endian'])
+        self.title = index['title'].tobytes()
+        self._set_file_format_and_precision(index['file_format'].tobytes().decode(SLF_EIT))
+        self.var_names = [name.tobytes() for name in index['var_names'].reshape(-1, 16)]
+        self.var_units = [unit.tobytes() for unit in index['var_units'].reshape(-1, 16)]
+        self.nb_var = len(self.var_names)
+        self.nb_var_quadratic = int(index['nb_var_quadratic'])
+        self.params = tuple(index['params'].tolist())
+        self.mesh_origin = self.params[2], self.params[3]
+        self.nb_planes = self.params[6]
+        self.is_2d = (self.nb_planes == 0)
+        self.date = tuple(index['date'].tolist()) if index['date'].size else None
+        self._set_has_knolg()
+        self.nb_elements, self.nb_nodes, self.nb_nodes_per_elem = index['mesh_size'].tolist()
+        self.nb_nodes_2d = self.nb_nodes if self.is_2d else self.nb_nodes // self.nb_planes
+
+        self.ikle = index['ikle']
+        self.ipobo = index['ipobo']
+        self.x_stored = index['x_stored']
+        self.y_stored = index['y_stored']
+        self._compute_mesh_coordinates()
+        if self.is_2d:
+            self._build_ikle_2d()
+        else:
+            self.ikle_2d = index['ikle_2d']
+
+        self._set_header_size()
+        self._set_frame_size()
+        self.nb_frames = (self.file_size - self.header_size) // self.frame_size
+        self._set_var_IDs()
+
+        logger.debug('Finished reading the header from the index file')
         return self
 
 
@@ -851,38 +962,110 @@ class Read(Serafin):
     # Additional attributes:
     - header <SerafinHeader>: Serafin header
     - time <[float]>: time series in seconds
+    - use_mmap <bool>: read frames through a memory-mapped view of the file
     """
-    def __init__(self, filename, language):
+    def __init__(self, filename, language, use_mmap=False):
         """!
         @param filename <str>: path to input Serafin file
         @param language <str>: Serafin variable name language ('fr' or 'en')
+        @param use_mmap <bool>: read frames through a memory-mapped view of the file (instead of seek/read)
         """
         super().__init__(filename, 'rb', language)
         self.header = None
         self.time = []
         self.file_size = os.path.getsize(self.filename)
+        self.use_mmap = use_mmap
+        self._frames = None  # memory-mapped frames (built on demand)
+        self._frames_header = None  # header used to build `_frames`
+        self._time_header = None  # header used to read `time`
         logger.info('Reading the input file: "%s" of size %d bytes' % (filename, self.file_size))
 
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._frames = None
+        self._frames_header = None
+        return super().__exit__(exc_type, exc_val, exc_tb)
+
     def read_header(self):
         """!
         @brief Read the file header and check the file consistency
+        If `SERAFIN_INDEX_CACHE` is enabled, the header and the time series are loaded from the sidecar index
+        file when it is up to date, otherwise this index file is (re)written.
+        In this case, the IPOBO table of a 2D file without any boundary node is built once and stored in the index.
         """
         self.header = SerafinHeader(lang=self.language)
+        if settings.SERAFIN_INDEX_CACHE:
+            index = self._load_index()
+            if index is not None:
+                self.header.from_index(index, self.file_size)
+                self.time = index['time'].tolist()
+                self._time_header = self.header
+                return
         self.header.from_file(self.file, self.file_size)
+        if settings.SERAFIN_INDEX_CACHE:
+            if self.header.is_2d and not self.header.has_knolg and not np.any(self.header.ipobo):
+                self.header.build_ipobo()
+            self._save_index()
+
+    def _get_index_key(self):
+        """!
+        @brief Get the values identifying the current state of the file in its sidecar index file
+        @return <numpy 1D-array>: index format version, file size and file modification time (in ns)
+        """
+        return np.array([INDEX_VERSION, self.file_size, os.stat(self.filename).st_mtime_ns], dtype=np.int64)
+
+    def _load_index(self):
+        """!
+        @brief Load the sidecar index file if it exists and corresponds to the current file
+        @return <dict>: arrays read from the index file (or None if the index is missing or outdated)
+        """
+        index_path = self.filename + settings.SERAFIN_INDEX_EXT
+        try:
+            with np.load(index_path, allow_pickle=False) as npz:
+                if not np.array_equal(npz['key'], self._get_index_key()):
+                    logger.debug('The index file "%s" is outdated' % index_path)
+                    return None
+                index = {name: npz[name] for name in npz.files}
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            return None
+        logger.debug('Reading the index file: "%s"' % index_path)
+        return index
+
+    def _save_index(self):
+        """!
+        @brief Read the time series and write the sidecar index file (failures are only logged)
+        """
+        index_path = self.filename + settings.SERAFIN_INDEX_EXT
+        index = self.header.to_index()
+        index['key'] = self._get_index_key()
+        self.get_time()
+        index['time'] = np.array(self.time, dtype=np.float64)
+        try:
+            with open(index_path + '.tmp', 'wb') as f:
+                np.savez(f, **index)
+            os.replace(index_path + '.tmp', index_path)
+        except OSError as e:
+            logger.warning('The index file "%s" could not be written: %s' % (index_path, e))
+        else:
+            logger.debug('Writing the index file: "%s"' % index_path)
 
     def get_time(self):
         """!
-        @brief Read the time in the Serafin file
+        @brief Read the time in the Serafin file (only once per header)
+        Times are gathered from a memory-mapped view of the file with a stride equal to the frame size.
         """
         if self.header is None:
             raise SerafinRequestError('Cannot read time without any header (forgot read_header ?)')
+        if self._time_header is self.header:
+            return
         logger.debug('Reading the time series from the file')
-        self.file.seek(self.header.header_size, 0)
-        for _ in range(self.header.nb_frames):
-            self.file.read(4)
-            self.time.append(self.header.unpack_float(self.file.read(self.header.float_size), 1)[0])
-            self.file.read(4)
-            self.file.seek(self.header.frame_size - 8 - self.header.float_size, 1)
+        if self.use_mmap or self.header.nb_frames == 0:
+            frames = self._get_frames()
+        else:
+            frames = np.memmap(self.filename, dtype=self.header.get_frame_dtype(), mode='r',
+                               offset=self.header.header_size, shape=(self.header.nb_frames,))
+        self.time = frames['time'].astype(np.float64).tolist()
+        del frames
+        self._time_header = self.header
 
     def subset_time(self, start, end, ech):
         """!
@@ -913,6 +1096,31 @@ class Read(Serafin):
             raise SerafinRequestError('Variable ID %s not found' % var_ID)
         return index
 
+    def _get_frames(self):
+        """!
+        @brief Memory-map all the frames of the file (the mapping is built once per header)
+        @return <numpy.memmap>: records of data type `SerafinHeader.get_frame_dtype` [shape = nb_frames]
+        """
+        if self.header is None:
+            raise SerafinRequestError('Cannot map frames without any header (forgot read_header ?)')
+        if self._frames is None or self._frames_header is not self.header:
+            frame_dtype = self.header.get_frame_dtype()
+            if self.header.nb_frames == 0:
+                self._frames = np.empty(0, dtype=frame_dtype)
+            else:
+                self._frames = np.memmap(self.filename, dtype=frame_dtype, mode='r', offset=self.header.header_size,
+                                         shape=(self.header.nb_frames,))
+            self._frames_header = self.header
+        return self._frames
+
+    def get_values_view(self):
+        """!
+        @brief Get a read-only and zero-copy view on the values of all the frames (memory-mapped file)
+        Values are not copied nor converted: they are in the file precision and endianness.
+        @return <numpy 3D-array>: values with shape (nb_frames, nb_var, nb_nodes)
+        """
+        return self._get_frames()['var']['values']
+
     def read_var_in_frame(self, time_index, var_ID):
         """!
         @brief Read a single variable in a frame
@@ -924,12 +1132,220 @@ class Read(Serafin):
             raise SerafinRequestError('Impossible to read a negative time index!')
         logger.debug('Reading variable %s at frame %i' % (var_ID, time_index))
         pos_var = self._get_var_index(var_ID)
+        if self.use_mmap:
+            return np.array(self.get_values_view()[time_index, pos_var], dtype=self.header.np_float_type)
         self.file.seek(self.header.header_size + time_index * self.header.frame_size + 8 +
                        self.header.float_size + pos_var * (8 + self.header.float_size * self.header.nb_nodes), 0)
         self.file.read(4)
         return np.array(self.header.unpack_float(self.file.read(self.header.float_size * self.header.nb_nodes),
                                                  self.header.nb_nodes), dtype=self.header.np_float_type)
 
+    def _get_var_indices(self, var_IDs):
+        """!
+        @brief Handle data request by a list of variable IDs
+        @param var_IDs <[str]>: the IDs of the requested variables (None for all variables)
+        @return <[int]>: the indices of the variables in a frame (0-based)
+        """
+        if var_IDs is None:
+            if self.header is None:
+                raise SerafinRequestError('Cannot extract variable from empty list (forgot read_header ?)')
+            return list(range(self.header.nb_var))
+        return [self._get_var_index(var_ID) for var_ID in var_IDs]
+
+    def _read_records(self, position, record_dtype, nb_records):
+        """!
+        @brief Read consecutive records from a position of the file
+        @param position <int>: position (in bytes) of the first record
+        @param record_dtype <numpy.dtype>: data type of a single record
+        @param nb_records <int>: number of records
+        @return <numpy 1D-array>: records in file endianness
+        """
+        self.file.seek(position, 0)
+        buffer = np.empty(nb_records * record_dtype.itemsize, dtype=np.uint8)
+        if self.file.readinto(buffer) != buffer.size:
+            raise SerafinRequestError('Unexpected end of file while reading %i records' % nb_records)
+        return buffer.view(record_dtype)
+
+    def read_frame(self, time_index, var_IDs=None):
+        """!
+        @brief Read multiple variables in a frame with a single read
+        @param time_index <int>: the index of the frame (0-based)
+        @param var_IDs <[str]>: variable IDs (None for all variables)
+        @return <numpy 2D-array>: values of the variables with shape (number of variables, number of nodes)
+        """
+        return self.read_vars_in_frames([time_index], var_IDs)[0]
+
+    def read_vars_in_frames(self, time_indices, var_IDs=None):
+        """!
+        @brief Read multiple variables in multiple frames (reads of consecutive frames are grouped)
+        @param time_indices <[int]>: the indices of the frames (0-based)
+        @param var_IDs <[str]>: variable IDs (None for all variables)
+        @return <numpy 3D-array>: values with shape (number of frames, number of variables, number of nodes)
+        """
+        time_indices = np.asarray(time_indices, dtype=np.int64)
+        pos_vars = self._get_var_indices(var_IDs)
+        if np.any(time_indices < 0):
+            raise SerafinRequestError('Impossible to read a negative time index!')
+        logger.debug('Reading %i variable(s) in %i frame(s)' % (len(pos_vars), len(time_indices)))
+        values = np.empty((len(time_indices), len(pos_vars), self.header.nb_nodes), dtype=self.header.np_float_type)
+        if values.size == 0:
+            return values
+        if self.use_mmap:
+            values[:] = self.get_values_view()[np.ix_(time_indices, pos_vars)]
+            return values
+
+        frame_dtype = self.header.get_frame_dtype()
+        var_dtype = frame_dtype.fields['var'][0].base
+        first_var, last_var = min(pos_vars), max(pos_vars)
+        max_nb_frames = max(1, settings.SERAFIN_READ_BUFFER_SIZE // self.header.frame_size)
+
+        # Split time indices in groups of consecutive frames
+        breaks = np.flatnonzero(np.diff(time_indices) != 1) + 1
+        for group_start, group_end in zip(np.concatenate(([0], breaks)), np.concatenate((breaks, [len(time_indices)]))):
+            for start in range(group_start, group_end, max_nb_frames):
+                end = min(start + max_nb_frames, group_end)
+                position = self.header.header_size + time_indices[start] * self.header.frame_size
+                if end - start == 1:
+                    # Read only the span of variables records containing the requested variables
+                    position += 8 + self.header.float_size + first_var * var_dtype.itemsize
+                    records = self._read_records(position, var_dtype, last_var - first_var + 1)
+                    values[start] = records['values'][[pos - first_var for pos in pos_vars]]
+                else:
+                    frames = self._read_records(position, frame_dtype, end - start)
+                    values[start:end] = frames['var']['values'][:, pos_vars]
+        return values
+
+    def iter_frames(self, time_indices, var_IDs=None, depth=None):
+        """!
+        @brief Iterate on frames while the next ones are read in advance by a background thread
+        The background thread uses its own file handle and stores at most `depth` frames in a bounded queue.
+        @param time_indices <[int]>: the indices of the frames (0-based)
+        @param var_IDs <[str]>: variable IDs (None for all variables)
+        @param depth <int>: maximum number of frames read in advance (default: `SERAFIN_PREFETCH_DEPTH`)
+        @return <generator>: yields the time index and the values with shape (number of variables, number of nodes)
+        """
+        time_indices = list(time_indices)
+        self._get_var_indices(var_IDs)  # check requested variables before starting
+        if depth is None:
+            depth = settings.SERAFIN_PREFETCH_DEPTH
+        if depth <= 0 or len(time_indices) < 2:
+            for time_index in time_indices:
+                yield time_index, self.read_frame(time_index, var_IDs)
+            return
+
+        reader = copy.copy(self)
+        frames = Queue(maxsize=depth)
+        stop = threading.Event()
+
+        def prefetch():
+            try:
+                with open(self.filename, 'rb') as reader.file:
+                    for time_index in time_indices:
+                        if stop.is_set():
+                            return
+                        frames.put((time_index, reader.read_frame(time_index, var_IDs), None))
+            except Exception as e:  # forwarded to the consumer
+                frames.put((None, None, e))
+                return
+            frames.put((None, None, None))
+
+        thread = threading.Thread(target=prefetch, daemon=True)
+        thread.start()
+        try:
+            while True:
+                time_index, values, error = frames.get()
+                if error is not None:
+                    raise error
+                if time_index is None:
+                    break
+                yield time_index, values
+        finally:
+            # Unblock and wait for the background thread (if the iteration was interrupted)
+            stop.set()
+            while thread.is_alive():
+                try:
+                    frames.get(timeout=0.1)
+                except Empty:
+                    pass
+            thread.join()
+
+    def read_nodes_time_series(self, node_indices, var_IDs=None, time_indices=None):
+        """!
+        @brief Read multiple variables at some nodes in multiple frames (without reading entire frames)
+        Nearby nodes are read at once (see `SERAFIN_READ_MAX_GAP`)
+        @param node_indices <[int]>: the indices of the nodes (0-based)
+        @param var_IDs <[str]>: variable IDs (None for all variables)
+        @param time_indices <[int]>: the indices of the frames (0-based, None for all frames)
+        @return <numpy 3D-array>: values with shape (number of frames, number of variables, number of nodes)
+        """
+        pos_vars = self._get_var_indices(var_IDs)
+        if time_indices is None:
+            time_indices = range(self.header.nb_frames)
+        time_indices = np.asarray(time_indices, dtype=np.int64)
+        node_indices = np.asarray(node_indices, dtype=np.int64)
+        if np.any(time_indices < 0):
+            raise SerafinRequestError('Impossible to read a negative time index!')
+        if np.any(node_indices < 0) or np.any(node_indices >= self.header.nb_nodes):
+            raise SerafinRequestError('Node indices have to be in [0, %i]' % (self.header.nb_nodes - 1))
+        logger.debug('Reading %i variable(s) at %i node(s) in %i frame(s)'
+                     % (len(pos_vars), len(node_indices), len(time_indices)))
+        values = np.empty((len(time_indices), len(pos_vars), len(node_indices)), dtype=self.header.np_float_type)
+        if values.size == 0:
+            return values
+        if self.use_mmap:
+            values[:] = self.get_values_view()[np.ix_(time_indices, pos_vars, node_indices)]
+            return values
+
+        # Coalesce sorted nodes into ranges which are read at once
+        unique_nodes, inverse = np.unique(node_indices, return_inverse=True)
+        max_gap = max(1, settings.SERAFIN_READ_MAX_GAP // self.header.float_size)
+        breaks = np.flatnonzero(np.diff(unique_nodes) > max_gap) + 1
+        range_starts = unique_nodes[np.concatenate(([0], breaks))]
+        range_ends = unique_nodes[np.concatenate((breaks - 1, [-1]))] + 1
+        range_positions = np.concatenate(([0], np.cumsum(range_ends - range_starts)))
+
+        # Positions of the requested nodes in the concatenated ranges
+        node_ranges = np.searchsorted(range_starts, unique_nodes, side='right') - 1
+        take = (range_positions[node_ranges] + unique_nodes - range_starts[node_ranges])[inverse]
+
+        var_dtype = self.header.get_frame_dtype().fields['var'][0].base
+        value_dtype = var_dtype.fields['values'][0].base
+        range_values = np.empty(range_positions[-1], dtype=self.header.np_float_type)
+        for i, time_index in enumerate(time_indices):
+            frame_position = self.header.header_size + time_index * self.header.frame_size + 8 + self.header.float_size
+            for j, pos_var in enumerate(pos_vars):
+                var_position = frame_position + pos_var * var_dtype.itemsize + 4
+                for start, end, position in zip(range_starts, range_ends, range_positions):
+                    range_values[position:position + end - start] = self._read_records(
+                        var_position + start * self.header.float_size, value_dtype, end - start)
+                values[i, j] = range_values[take]
+        return values
+
+    def get_static_var_IDs(self, var_IDs=None, nb_samples=None):
+        """!
+        @brief Detect the variables which are constant in time (their values can then be read only once)
+        Only the variables listed in `SERAFIN_STATIC_VARIABLES` are candidates, and their values are compared in
+        evenly spaced frames (including the first and the last ones)
+        @param var_IDs <[str]>: variable IDs to check (None for all variables)
+        @param nb_samples <int>: number of frames compared (default: `SERAFIN_STATIC_NB_SAMPLES`, 0 to disable)
+        @return <[str]>: IDs of the variables with identical values in all the sampled frames
+        """
+        if var_IDs is None:
+            var_IDs = self.header.var_IDs
+        if nb_samples is None:
+            nb_samples = settings.SERAFIN_STATIC_NB_SAMPLES
+        var_IDs = [var_ID for var_ID in var_IDs if var_ID in settings.SERAFIN_STATIC_VARIABLES
+                   and var_ID in self.header.var_IDs]
+        if not var_IDs or nb_samples <= 0 or self.header.nb_frames == 0:
+            return []
+        time_indices = np.unique(np.linspace(0, self.header.nb_frames - 1, max(2, nb_samples)).round().astype(int))
+        values = self.read_vars_in_frames(time_indices, var_IDs)
+        is_static = np.all(values == values[:1], axis=(0, 2))
+        static_var_IDs = [var_ID for var_ID, static in zip(var_IDs, is_static) if static]
+        if static_var_IDs:
+            logger.debug('Static variable(s) detected: %s' % ', '.join(static_var_IDs))
+        return static_var_IDs
+
     def read_var_in_frame_as_3d(self, time_index, var_ID):
         """!
         @brief Read a single variable in a 3D frame
@@ -961,16 +1377,23 @@ class Write(Serafin):
     """!
     @brief Serafin file output stream
 
-    (No additional attributes)
+    # Additional attributes:
+    - buffer_size <int>: maximum size (in bytes) of frames kept in memory before being written (0 = no buffering)
     """
-    def __init__(self, filename, language, overwrite=False):
+    def __init__(self, filename, language, overwrite=False, buffer_size=0):
         """!
         @param filename <str>: path to output Serafin file
         @param language <str>: Serafin variable name language ('fr' or 'en')
         @param overwrite <bool>: overwrite if file already exists
+        @param buffer_size <int>: maximum size (in bytes) of buffered frames (0 = frames are written immediately)
         """
         mode = 'wb' if overwrite else 'xb'
         super().__init__(filename, mode, language)
+        self.buffer_size = buffer_size
+        self._buffer = None  # buffered frames (built by the first call to `write_entire_frame`)
+        self._buffer_header = None  # header used to build `_buffer`
+        self._nb_buffered_frames = 0
+        self._max_buffered_frames = 1
         logger.info('Writing the output file: "%s"' % filename)
 
     def __enter__(self):
@@ -979,6 +1402,39 @@ class Write(Serafin):
         except FileExistsError:
             raise SerafinRequestError('Cannot overwrite existing file')
 
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush_frames()
+        return Serafin.__exit__(self, exc_type, exc_val, exc_tb)
+
+    def _write_array(self, header, value_type, values, nb_values):
+        """!
+        @brief Write a Fortran record of consecutive values (with its record markers)
+        @param header <SerafinHeader>: output header
+        @param value_type <str>: 'i' for integers or `float_type` for floats
+        @param values <numpy 1D-array>: values to write
+        @param nb_values <int>: expected number of values
+        """
+        values = np.asarray(values).astype(header.endian + value_type, copy=False)
+        if values.size != nb_values:
+            raise SerafinValidationError('Record has %i values instead of %i' % (values.size, nb_values))
+        marker = header.pack_int(values.nbytes)
+        self.file.write(marker)
+        self.file.write(values.tobytes())
+        self.file.write(marker)
+
+    @staticmethod
+    def _new_frames(header, nb_frames):
+        """!
+        @brief Allocate frames with their record markers already filled
+        @param header <SerafinHeader>: output header
+        @param nb_frames <int>: number of frames
+        @return <numpy 1D-array>: frames of data type `SerafinHeader.get_frame_dtype`
+        """
+        frames = np.empty(nb_frames, dtype=header.get_frame_dtype())
+        frames['start'] = frames['end'] = header.float_size
+        frames['var']['start'] = frames['var']['end'] = header.float_size * header.nb_nodes
+        return frames
+
     def write_header(self, header):
         """!
         @brief Write Serafin header from attributes
@@ -1025,25 +1481,14 @@ class Write(Serafin):
         self.file.write(header.pack_int(4 * 4))
 
         # IKLE
-        nb_ikle_values = header.nb_elements * header.nb_nodes_per_elem
-        self.file.write(header.pack_int(4 * nb_ikle_values))
-        self.file.write(header.pack_int(*header.ikle, nb=nb_ikle_values))
-        self.file.write(header.pack_int(4 * nb_ikle_values))
+        self._write_array(header, 'i', header.ikle, header.nb_elements * header.nb_nodes_per_elem)
 
         # IPOBO
-        self.file.write(header.pack_int(4 * header.nb_nodes))
-        self.file.write(header.pack_int(*header.ipobo, nb=header.nb_nodes))
-        self.file.write(header.pack_int(4 * header.nb_nodes))
-
-        # X coordinates
-        self.file.write(header.pack_int(header.float_size * header.nb_nodes))
-        self.file.write(header.pack_float(*header.x_stored, nb=header.nb_nodes))
-        self.file.write(header.pack_int(header.float_size * header.nb_nodes))
+        self._write_array(header, 'i', header.ipobo, header.nb_nodes)
 
-        # Y coordinates
-        self.file.write(header.pack_int(header.float_size * header.nb_nodes))
-        self.file.write(header.pack_float(*header.y_stored, nb=header.nb_nodes))
-        self.file.write(header.pack_int(header.float_size * header.nb_nodes))
+        # X and Y coordinates
+        self._write_array(header, header.float_type, header.x_stored, header.nb_nodes)
+        self._write_array(header, header.float_type, header.y_stored, header.nb_nodes)
 
     def write_entire_frame(self, header, time_to_write, values):
         """!
@@ -1055,11 +1500,43 @@ class Write(Serafin):
         if values.shape != (header.nb_var, header.nb_nodes):
             raise SerafinValidationError("Shape of values %s is not consistant with SerafinHeader (%i, %i)"
                                          % (str(values.shape), header.nb_var, header.nb_nodes))
-        self.file.write(header.pack_int(header.float_size))
-        self.file.write(header.pack_float(time_to_write))
-        self.file.write(header.pack_int(header.float_size))
-
-        for i in range(header.nb_var):
-            self.file.write(header.pack_int(header.float_size * header.nb_nodes))
-            self.file.write(header.pack_float(*values[i, :], nb=header.nb_nodes))
-            self.file.write(header.pack_int(header.float_size * header.nb_nodes))
+        if self._buffer_header is not header:
+            self.flush_frames()
+            self._max_buffered_frames = max(1, self.buffer_size // header.get_frame_dtype().itemsize)
+            self._buffer = Write._new_frames(header, 1)
+            self._buffer_header = header
+        self._buffer['time'][self._nb_buffered_frames] = time_to_write
+        self._buffer['var']['values'][self._nb_buffered_frames] = values
+        self._nb_buffered_frames += 1
+        if self._nb_buffered_frames == len(self._buffer):
+            if len(self._buffer) < self._max_buffered_frames:
+                # the buffer grows with the number of written frames (up to `buffer_size`)
+                new_buffer = Write._new_frames(header, min(2 * len(self._buffer), self._max_buffered_frames))
+                new_buffer[:self._nb_buffered_frames] = self._buffer
+                self._buffer = new_buffer
+            else:
+                self.flush_frames()
+
+    def write_entire_frames(self, header, times_to_write, values):
+        """!
+        @brief Write several consecutive frames at once
+        @param header <SerafinHeader>: output header
+        @param times_to_write <[float]>: output times (in seconds)
+        @param values <numpy 3D-array>: values to write, of dimension (nb_frames, nb_var, nb_nodes)
+        """
+        if values.shape != (len(times_to_write), header.nb_var, header.nb_nodes):
+            raise SerafinValidationError("Shape of values %s is not consistant with SerafinHeader (%i, %i, %i)"
+                                         % (str(values.shape), len(times_to_write), header.nb_var, header.nb_nodes))
+        self.flush_frames()
+        frames = Write._new_frames(header, len(times_to_write))
+        frames['time'] = times_to_write
+        frames['var']['values'] = values
+        self.file.write(frames.tobytes())
+
+    def flush_frames(self):
+        """!
+        @brief Write the buffered frames (if any)
+        """
+        if self._nb_buffered_frames > 0:
+            self.file.write(self._buffer[:self._nb_buffered_frames].tobytes())
+            self._nb_buffered_frames = 0
@@ -4,7 +4,6 @@ Comparison between two Serafin files with identical meshes
 
 import numpy as np
 
-from pyteltools.slf.interpolation import Interpolator
 from pyteltools.slf.volume import TruncatedTriangularPrisms
 
 
@@ -38,26 +37,25 @@ class ReferenceMesh(TruncatedTriangularPrisms):
             self.inside_polygon = False
             self.triangle_polygon_intersection = {}
             self.nb_triangles_inside = self.nb_triangles
-            total_area = 0
-            for (i, j, k), t in self.triangles.items():
-                area = t.area
-                self.area[i, j, k] = area
-                total_area += area
-                self.point_weight[[i, j, k]] += area
+            areas = self.triangles.areas
+            self.area = dict(zip(map(tuple, self.ikle.tolist()), areas.tolist()))
+            total_area = areas.sum()
+            self.point_weight = np.bincount(self.ikle.ravel(), weights=np.repeat(areas, 3), minlength=self.nb_points)
         else:
             self.inside_polygon = True
             self.polygon = polygon
             self.nb_triangles_inside = 0
 
-            potential_elements = self.get_intersecting_elements(polygon.bounds())
+            potential_elements = self.get_intersecting_element_indices(polygon.bounds())
             self.point_weight = np.zeros((self.nb_points,), dtype=np.float64)
             self.triangle_polygon_intersection = {}
             total_area = 0
-            for i, j, k in potential_elements:
-                t = self.triangles[i, j, k]
+            for index in potential_elements:
+                i, j, k = self.ikle[index]
+                t = self.triangles.polygon(index)
                 if polygon.contains(t):
                     self.nb_triangles_inside += 1
-                    area = t.area
+                    area = self.triangles.areas[index]
                     total_area += area
                     self.point_weight[[i, j, k]] += area
                     self.area[i, j, k] = area
@@ -68,7 +66,7 @@ class ReferenceMesh(TruncatedTriangularPrisms):
                         area = intersection.area
                         total_area += area
                         centroid = intersection.centroid
-                        interpolator = Interpolator(t).get_interpolator_at(centroid.x, centroid.y)
+                        interpolator = self.triangles.barycentric_coordinates(index, centroid.x, centroid.y)
                         self.triangle_polygon_intersection[i, j, k] = (area, interpolator)
         self.point_weight /= 3.0
         self.inverse_total_area = 1 / total_area
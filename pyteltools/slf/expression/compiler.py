@@ -0,0 +1,426 @@
+"""!
+Compilation of the expressions of a pool into a single evaluation plan
+
+All the nodes of an augmented path are translated into elementary operations (registers).
+Identical operations are shared (common subexpression elimination, even across several selected expressions),
+operations on constants are evaluated once (constant folding) and each variable is read only once per frame.
+The operations are then evaluated in place in a set of buffers which are reused for every frame,
+or by numexpr (if available) which evaluates the arithmetic subexpressions in a single pass.
+"""
+
+import numpy as np
+
+from pyteltools.conf import settings
+from pyteltools.slf.misc import OPERATIONS, OPERATORS
+
+from .condition import AndOrCondition, SimpleCondition
+from .expression import ConditionalExpression, MaskedExpression, MaxMinExpression, SimpleExpression
+
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+
+READ, ARRAY, CONSTANT, OPERATOR, WHERE, MAXIMUM, MINIMUM, COMPARE, AND, OR = range(10)
+UNARY_OPERATORS = ('sqrt', 'sin', 'cos', 'atan')
+COMPARATORS = {'>': np.greater, '<': np.less, '>=': np.greater_equal, '<=': np.less_equal}
+FUNCTIONS = {MAXIMUM: np.maximum, MINIMUM: np.minimum, AND: np.logical_and, OR: np.logical_or}
+NUMEXPR_SYMBOLS = {'+': '+', '-': '-', '*': '*', '/': '/', '^': '**',
+                   'sqrt': 'sqrt', 'sin': 'sin', 'cos': 'cos', 'atan': 'arctan'}
+
+
+class ExpressionCompiler:
+    """!
+    @brief Build a list of elementary operations (registers) without duplicates and with constant folding
+
+    Every register is created after its operands, so that the registers are in a valid evaluation order.
+    """
+    def __init__(self):
+        self.operations = []
+        self.payloads = []
+        self.operands = []
+        self.constants = []  # values of the registers of type ARRAY or CONSTANT
+        self.registers = {}  # operation key -> register
+
+    def __len__(self):
+        return len(self.operations)
+
+    def is_constant(self, register):
+        return self.operations[register] == CONSTANT
+
+    def is_boolean(self, register):
+        operation = self.operations[register]
+        if operation in (COMPARE, AND, OR):
+            return True
+        if operation in (ARRAY, CONSTANT):
+            return self.constants[register].dtype == bool
+        return False
+
+    def _new_register(self, key, operation, payload, operands, constant):
+        register = len(self.operations)
+        self.operations.append(operation)
+        self.payloads.append(payload)
+        self.operands.append(operands)
+        self.constants.append(constant)
+        self.registers[key] = register
+        return register
+
+    def read(self, var_ID):
+        """!
+        @brief Register a variable read in the input file
+        @param var_ID <str>: variable identifier
+        @return <int>: register
+        """
+        key = (READ, var_ID)
+        if key in self.registers:
+            return self.registers[key]
+        return self._new_register(key, READ, var_ID, (), None)
+
+    def array(self, code, values):
+        """!
+        @brief Register an array of values which does not depend on the frame (coordinates, masks, ...)
+        @param code <str>: identifier of the array
+        @param values <numpy.1D-array>: values of the array
+        @return <int>: register
+        """
+        key = (ARRAY, code)
+        if key in self.registers:
+            return self.registers[key]
+        return self._new_register(key, ARRAY, code, (), np.asarray(values))
+
+    def constant(self, value):
+        """!
+        @brief Register a scalar constant
+        @param value <float or bool>: value of the constant
+        @return <int>: register
+        """
+        value = np.asarray(value)[()]
+        key = (CONSTANT, value.dtype.char, value.tobytes())
+        if key in self.registers:
+            return self.registers[key]
+        return self._new_register(key, CONSTANT, None, (), value)
+
+    def operation(self, operation, payload, *operands):
+        """!
+        @brief Register an operation on other registers
+        @param operation <int>: type of operation (OPERATOR, WHERE, MAXIMUM, MINIMUM, COMPARE, AND or OR)
+        @param payload <str>: operator (for OPERATOR) or comparator (for COMPARE)
+        @param operands <int>: registers of the operands
+        @return <int>: register
+        """
+        if (operation in (AND, OR)) or (operation == OPERATOR and payload in ('+', '*')):
+            operands = tuple(sorted(operands))  # commutative operations
+        key = (operation, payload, operands)
+        if key in self.registers:
+            return self.registers[key]
+        if all(map(self.is_constant, operands)):
+            with np.errstate(all='ignore'):
+                value = self.evaluate(operation, payload, [self.constants[operand] for operand in operands])
+            return self.constant(value)
+        return self._new_register(key, operation, payload, operands, None)
+
+    @staticmethod
+    def evaluate(operation, payload, arguments, out=None):
+        """!
+        @brief Evaluate an operation (see method `operation`)
+        @param arguments <list>: values of the operands
+        @param out <numpy.ndarray>: buffer for the result (optional)
+        @return <numpy.ndarray or scalar>: result of the operation
+        """
+        if operation == WHERE:
+            condition, true_values, false_values = arguments
+            if out is None:
+                return np.where(condition, true_values, false_values)
+            np.copyto(out, false_values)
+            np.copyto(out, true_values, where=condition)
+            return out
+        if operation == OPERATOR:
+            function = OPERATIONS[payload]
+        elif operation == COMPARE:
+            function = COMPARATORS[payload]
+        else:
+            function = FUNCTIONS[operation]
+        return function(*arguments, out=out)
+
+    def add_postfix(self, postfix, node_register):
+        """!
+        @brief Compile a postfix expression
+        @param postfix <[str]>: the expression in postfix format
+        @param node_register <function>: register of a variable identifier (without brackets)
+        @return <int>: register of the expression
+        """
+        stack = []
+        for symbol in postfix:
+            if symbol in OPERATORS:
+                if symbol in UNARY_OPERATORS:
+                    stack.append(self.operation(OPERATOR, symbol, stack.pop()))
+                else:
+                    first_operand = stack.pop()
+                    second_operand = stack.pop()
+                    stack.append(self.operation(OPERATOR, symbol, first_operand, second_operand))
+            elif symbol[0] == '[':
+                stack.append(node_register(symbol[1:-1]))
+            else:
+                stack.append(self.constant(float(symbol)))
+        return stack.pop()
+
+
+class EvaluationPlan:
+    """!
+    @brief Fused evaluation of several expressions of a pool on the frames of an input stream
+    """
+    def __init__(self, pool, augmented_path, selected_expressions, use_numexpr=None):
+        """!
+        @param pool <slf.expression.pool.ComplexExpressionPool>: pool of expressions
+        @param augmented_path <[str]>: nodes needed by the selected expressions (see `build_augmented_path`)
+        @param selected_expressions <[str]>: codes of the expressions to evaluate
+        @param use_numexpr <bool>: use numexpr if available (default: see settings.CALCULATOR_NUMEXPR)
+        """
+        if use_numexpr is None:
+            use_numexpr = settings.CALCULATOR_NUMEXPR
+        self.use_numexpr = use_numexpr and numexpr is not None
+        self.nb_nodes = len(pool.x)
+
+        self.compiler = ExpressionCompiler()
+        node_registers = {}
+        for node in augmented_path:
+            if node not in node_registers:
+                node_registers[node] = self._compile_node(pool, node, node_registers)
+        self.outputs = [node_registers[expr] for expr in selected_expressions]
+
+        self.read_var_IDs = []
+        self.read_registers = []
+        self.steps = []
+        self._build_steps()
+        self._allocate_slots()
+        self._buffers = {}
+
+    def _compile_node(self, pool, node, node_registers):
+        """!
+        @brief Compile a node of the augmented path (its dependencies are already compiled)
+        """
+        compiler = self.compiler
+        if node == 'COORDX':
+            return compiler.array(node, pool.x)
+        elif node == 'COORDY':
+            return compiler.array(node, pool.y)
+        elif node in pool.vars:
+            return compiler.read(node)
+        elif node[:4] == 'POLY':
+            return compiler.array(node, pool.masks[int(node[4:])].values)
+        elif node[0] == 'C':
+            condition = pool.conditions[int(node[1:])]
+            if isinstance(condition, SimpleCondition):
+                return compiler.operation(COMPARE, condition.comparator, node_registers[condition.expression.code()],
+                                          compiler.constant(condition.threshold))
+            elif isinstance(condition, AndOrCondition):
+                return compiler.operation(AND if condition.is_and else OR, None,
+                                          node_registers[condition.first_condition.code()],
+                                          node_registers[condition.second_condition.code()])
+        else:
+            expr = pool.expressions[int(node[1:])]
+            if isinstance(expr, SimpleExpression):
+                return compiler.add_postfix(expr.expression, lambda code: node_registers[code])
+            elif isinstance(expr, ConditionalExpression):
+                return compiler.operation(WHERE, None, node_registers[expr.condition.code()],
+                                          node_registers[expr.true_expression.code()],
+                                          node_registers[expr.false_expression.code()])
+            elif isinstance(expr, MaxMinExpression):
+                return compiler.operation(MAXIMUM if expr.is_max else MINIMUM, None,
+                                          node_registers[expr.first_expression.code()],
+                                          node_registers[expr.second_expression.code()])
+            elif isinstance(expr, MaskedExpression):
+                mask = pool.masks[expr.mask_id]
+                return compiler.operation(WHERE, None, compiler.array('MASK%d' % mask.index, mask.mask),
+                                          node_registers[expr.inside_expression.code()],
+                                          node_registers[expr.outside_expression.code()])
+        raise ValueError('Unknown node %s' % node)
+
+    def _build_steps(self):
+        """!
+        @brief Build the list of steps (only for the registers needed by the outputs)
+
+        With numexpr, an arithmetic operation used only once by another arithmetic operation is inlined in it.
+        """
+        compiler = self.compiler
+        is_needed = [False] * len(compiler)
+        for register in self.outputs:
+            is_needed[register] = True
+        for register in reversed(range(len(compiler))):
+            if is_needed[register]:
+                for operand in compiler.operands[register]:
+                    is_needed[operand] = True
+
+        nb_uses = [0] * len(compiler)
+        for register in range(len(compiler)):
+            if is_needed[register]:
+                for operand in compiler.operands[register]:
+                    nb_uses[operand] += 1
+        is_inlined = [False] * len(compiler)
+        if self.use_numexpr:
+            for register in range(len(compiler)):
+                if is_needed[register] and compiler.operations[register] == OPERATOR:
+                    for operand in compiler.operands[register]:
+                        is_inlined[operand] = compiler.operations[operand] == OPERATOR and nb_uses[operand] == 1 \
+                                              and operand not in self.outputs
+
+        for register in range(len(compiler)):
+            if not is_needed[register]:
+                continue
+            operation = compiler.operations[register]
+            if operation == READ:
+                self.read_var_IDs.append(compiler.payloads[register])
+                self.read_registers.append(register)
+            elif operation not in (ARRAY, CONSTANT) and not is_inlined[register]:
+                if self.use_numexpr and operation == OPERATOR:
+                    inputs = []
+                    text = self._numexpr_text(register, is_inlined, inputs, True)
+                    self.steps.append((register, operation, text, tuple(inputs)))
+                else:
+                    self.steps.append((register, operation, compiler.payloads[register], compiler.operands[register]))
+
+    def _numexpr_text(self, register, is_inlined, inputs, is_root=False):
+        """!
+        @brief Write the numexpr expression of an arithmetic operation (with its inlined operands)
+        @param inputs <[int]>: registers of the inputs of the expression (completed by this method)
+        """
+        compiler = self.compiler
+        if is_root or is_inlined[register]:
+            symbol = compiler.payloads[register]
+            texts = [self._numexpr_text(operand, is_inlined, inputs) for operand in compiler.operands[register]]
+            if symbol in UNARY_OPERATORS:
+                return '%s(%s)' % (NUMEXPR_SYMBOLS[symbol], texts[0])
+            return '(%s %s %s)' % (texts[0], NUMEXPR_SYMBOLS[symbol], texts[1])
+        if compiler.is_constant(register) and np.isfinite(compiler.constants[register]):
+            return '(%r)' % float(compiler.constants[register])
+        if register not in inputs:
+            inputs.append(register)
+        return 'r%d' % register
+
+    def _allocate_slots(self):
+        """!
+        @brief Assign a buffer (slot) to the result of every step, a buffer being reused once its value is dead
+
+        The results of the outputs are directly written in the output array (the first time they are selected).
+        Element-wise operations may write their result in the buffer of one of their operands.
+        """
+        last_use = {}
+        for index, (_, _, _, inputs) in enumerate(self.steps):
+            for register in inputs:
+                last_use[register] = index
+
+        self.step_registers = set(register for register, _, _, _ in self.steps)
+        self.output_rows = {}
+        for row, register in enumerate(self.outputs):
+            self.output_rows.setdefault(register, row)
+
+        self.slots = {}  # register -> (is_boolean, slot index)
+        self.nb_slots = {False: 0, True: 0}
+        free_slots = {False: [], True: []}
+
+        def release(index, inputs):
+            for register in set(inputs):
+                if register in self.slots and last_use[register] == index:
+                    is_boolean, slot = self.slots[register]
+                    free_slots[is_boolean].append(slot)
+
+        for index, (register, operation, _, inputs) in enumerate(self.steps):
+            if operation != WHERE:
+                release(index, inputs)
+            if register not in self.output_rows:
+                is_boolean = self.compiler.is_boolean(register)
+                if free_slots[is_boolean]:
+                    slot = free_slots[is_boolean].pop()
+                else:
+                    slot = self.nb_slots[is_boolean]
+                    self.nb_slots[is_boolean] += 1
+                self.slots[register] = (is_boolean, slot)
+            if operation == WHERE:
+                release(index, inputs)
+
+    def _get_buffers(self, shape):
+        """!
+        @brief Get the buffers for a given shape of values (allocated once)
+
+        The buffers of a block of frames are reused (with a view) for a smaller block of frames.
+        """
+        for buffer_shape, buffers in self._buffers.items():
+            if len(buffer_shape) == len(shape) and buffer_shape[1:] == shape[1:] and buffer_shape[0] >= shape[0]:
+                return {is_boolean: [buffer[:shape[0]] for buffer in slot_buffers]
+                        for is_boolean, slot_buffers in buffers.items()}
+        self._buffers = {shape: {is_boolean: [np.empty(shape, dtype=bool if is_boolean else np.float64)
+                                              for _ in range(nb_slots)]
+                                 for is_boolean, nb_slots in self.nb_slots.items()}}
+        return self._buffers[shape]
+
+    def get_block_size(self, memory_budget=None):
+        """!
+        @brief Get the number of frames which can be evaluated at once within a memory budget
+        @param memory_budget <int>: memory budget in bytes (default: see settings.CALCULATOR_MEMORY_BUDGET)
+        @return <int>: number of frames of a block (at least 1)
+        """
+        if memory_budget is None:
+            memory_budget = settings.CALCULATOR_MEMORY_BUDGET
+        nb_arrays = len(self.read_var_IDs) + len(self.outputs) + self.nb_slots[False]
+        frame_size = self.nb_nodes * (8 * nb_arrays + self.nb_slots[True])
+        return max(1, int(memory_budget // max(1, frame_size)))
+
+    def evaluate(self, input_stream, time_index):
+        """!
+        @brief Evaluate the selected expressions in a single frame
+        @param input_stream <slf.Serafin.Read>: the input Serafin
+        @param time_index <int>: the index of the frame (0-based)
+        @return <numpy.2D-array>: values of the selected expressions (in the selected order)
+        """
+        return self.evaluate_values(input_stream.read_frame(time_index, self.read_var_IDs), (self.nb_nodes,))
+
+    def evaluate_block(self, input_stream, time_indices):
+        """!
+        @brief Evaluate the selected expressions in a block of frames (read at once)
+        @param input_stream <slf.Serafin.Read>: the input Serafin
+        @param time_indices <[int]>: the indices of the frames (0-based)
+        @return <numpy.3D-array>: values of the selected expressions, with shape (nb_frames, nb_outputs, nb_nodes)
+        """
+        read_values = input_stream.read_vars_in_frames(time_indices, self.read_var_IDs)
+        values = self.evaluate_values(read_values.transpose(1, 0, 2), (len(time_indices), self.nb_nodes))
+        return values.transpose(1, 0, 2)
+
+    def evaluate_values(self, read_values, shape):
+        """!
+        @brief Evaluate the selected expressions from the values of the variables to read (see `read_var_IDs`)
+        @param read_values <numpy.ndarray>: values of the variables to read, with shape (nb_read_vars, *shape)
+        @param shape <tuple>: shape of the values of a single expression
+        @return <numpy.ndarray>: values of the selected expressions, with shape (nb_outputs, *shape)
+        """
+        compiler = self.compiler
+        buffers = self._get_buffers(shape)
+        output_array = np.empty((len(self.outputs),) + shape)
+
+        values = {}
+        for register, register_values in zip(self.read_registers, read_values):
+            values[register] = register_values
+
+        def get(register):
+            if register in values:
+                return values[register]
+            return compiler.constants[register]
+
+        with np.errstate(all='ignore'):
+            for register, operation, payload, inputs in self.steps:
+                if register in self.output_rows:
+                    out = output_array[self.output_rows[register]]
+                else:
+                    is_boolean, slot = self.slots[register]
+                    out = buffers[is_boolean][slot]
+                if self.use_numexpr and operation == OPERATOR:
+                    numexpr.evaluate(payload, local_dict={'r%d' % operand: get(operand) for operand in inputs},
+                                     out=out, casting='unsafe')
+                else:
+                    ExpressionCompiler.evaluate(operation, payload, [get(operand) for operand in inputs], out)
+                values[register] = out
+
+        for row, register in enumerate(self.outputs):
+            if register not in self.step_registers or self.output_rows[register] != row:
+                output_array[row] = get(register)
+        return output_array
@@ -20,6 +20,8 @@ class SimpleCondition(ComplexCondition):
     def __init__(self, index, expression, comparator, threshold):
         super().__init__(index)
         self.expression = expression
+        self.comparator = comparator
+        self.threshold = threshold
         self.text = '%s %s %s' % (repr(self.expression), comparator, str(threshold))
         self.polygonal = expression.polygonal
         self.mask_id = expression.mask_id
@@ -42,6 +44,7 @@ class AndOrCondition(ComplexCondition):
         super().__init__(index)
         self.first_condition = first_condition
         self.second_condition = second_condition
+        self.is_and = is_and
         self.text = '(%s) %s (%s)' % (self.first_condition.text, 'AND' if is_and else 'OR',
                                       self.second_condition.text)
         self.func = np.logical_and if is_and else np.logical_or
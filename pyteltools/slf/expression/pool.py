@@ -4,6 +4,7 @@ from shapely.geometry import Point
 from pyteltools.slf.misc import infix_to_postfix, is_valid_expression, is_valid_postfix, to_infix
 from pyteltools.slf.Serafin import SLF_EIT
 
+from .compiler import EvaluationPlan
 from .expression import ConditionalExpression, MaskedExpression, MaxMinExpression, PolygonalMask, SimpleExpression
 from .condition import AndOrCondition, SimpleCondition
 
@@ -297,18 +298,35 @@ class ComplexExpressionPool:
             if expr.masked or not expr.polygonal:
                 yield expr.code(), repr(expr)
 
-    def evaluate_expressions(self, augmented_path, input_stream, selected_expressions):
-        nb_row = len(selected_expressions)
-        nb_col = input_stream.header.nb_nodes
+    def compile(self, augmented_path, selected_expressions):
+        """!
+        @brief Compile the selected expressions into a single evaluation plan
+        @param augmented_path <[str]>: nodes needed by the selected expressions (see `build_augmented_path`)
+        @param selected_expressions <[str]>: codes of the expressions to evaluate
+        @return <slf.expression.compiler.EvaluationPlan>: the evaluation plan
+        """
+        return EvaluationPlan(self, augmented_path, selected_expressions)
 
+    def evaluate_expressions(self, augmented_path, input_stream, selected_expressions):
+        plan = self.compile(augmented_path, selected_expressions)
         for time_index, time_value in enumerate(input_stream.time):
-            values = self._evaluate_expressions(input_stream, time_index, augmented_path)
+            # nd-array in the selected order
+            yield time_value, plan.evaluate(input_stream, time_index)
 
-            # build nd-array in the selected order
-            value_array = np.empty((nb_row, nb_col))
-            for i, expr in enumerate(selected_expressions):
-                value_array[i, :] = values[expr]
-            yield time_value, value_array
+    def evaluate_expressions_by_block(self, augmented_path, input_stream, selected_expressions, memory_budget=None):
+        """!
+        @brief Evaluate the selected expressions on blocks of consecutive frames
+        @param augmented_path <[str]>: nodes needed by the selected expressions (see `build_augmented_path`)
+        @param input_stream <slf.Serafin.Read>: the input Serafin
+        @param selected_expressions <[str]>: codes of the expressions to evaluate
+        @param memory_budget <int>: memory budget in bytes (default: see settings.CALCULATOR_MEMORY_BUDGET)
+        @return <generator>: yields the times and the values with shape (nb_frames, nb_expressions, nb_nodes)
+        """
+        plan = self.compile(augmented_path, selected_expressions)
+        block_size = plan.get_block_size(memory_budget)
+        for start in range(0, len(input_stream.time), block_size):
+            time_indices = list(range(start, min(start + block_size, len(input_stream.time))))
+            yield input_stream.time[start:start + block_size], plan.evaluate_block(input_stream, time_indices)
 
     def decode(self, input_stream, time_index, node_code):
         """
@@ -6,7 +6,6 @@ import numpy as np
 
 from pyteltools.conf import settings
 
-from .interpolation import Interpolator
 from .mesh2D import Mesh2D
 from .Serafin import SLF_EIT
 from .util import logger
@@ -117,25 +116,21 @@ class TriangularVectorField(Mesh2D):
         @param section <geom.geometry.Polyline>: An open polyline
         @return <dict>: The list of tuples (normal vector, interpolator) of every intersected segments in triangles
         """
+        coordinates = np.array([coord[:2] for coord in section.coords()], dtype=np.float64)
+        segments, elements, parameters, points = self.trace_polyline(coordinates)
+        weights = self.triangles.barycentric_coordinates(elements[:, np.newaxis], points[:, :, 0], points[:, :, 1])
+
+        # consecutive pieces in the same triangle (around a turning point of the section) form a single line
+        is_following = np.zeros(segments.shape[0], dtype=bool)
+        is_following[1:] = (elements[1:] == elements[:-1]) & self.are_pieces_continuous(segments, parameters)
+
         intersections = {}
-        potential_elements = self.get_intersecting_elements(section.bounds())
-        for i, j, k in potential_elements:
-            t = self.triangles[i, j, k]
-            is_intersected, t_intersections = section.linestring_intersection(t)
-            if is_intersected:
-                interpolator = Interpolator(t)
-                intersections[i, j, k] = []
-                for intersection in t_intersections:
-                    line = []   # the list of tuple (normal_vector, interpolator) for all start/end/turning points
-                    prev_x, prev_y = None, None
-                    for x, y in intersection.coords:
-                        if prev_x is None:  # the first point doesn't have a normal vector
-                            line.append(([0, 0], interpolator.get_interpolator_at(x, y)))
-                        else:
-                            line.append(([prev_y-y, x-prev_x],
-                                         interpolator.get_interpolator_at(x, y)))
-                        prev_x, prev_y = x, y
-                    intersections[i, j, k].append(line)
+        line = []  # the list of tuple (normal_vector, interpolator) for all start/end/turning points
+        for index, ((x1, y1), (x2, y2)) in enumerate(points.tolist()):
+            if not is_following[index]:
+                line = [([0, 0], weights[index, 0])]  # the first point doesn't have a normal vector
+                intersections.setdefault(tuple(self.ikle[elements[index]].tolist()), []).append(line)
+            line.append(([y1-y2, x2-x1], weights[index, 1]))
         return intersections
 
     @staticmethod
@@ -143,140 +138,146 @@ class TriangularVectorField(Mesh2D):
         """!
         @brief The line integral of a scalar field along a line (not really a flux)
         """
-        flux = 0
-        for i, j, k in intersections:  # iterating through triangles in the intersection
-            f_vals = scalar_flux_values[[i, j, k]]
-
-            for endpoints in intersections[i, j, k]:
-                endpoints_f = []
-
-                for normal, interpolator in endpoints:  # pre-compute the values on each start/turning/end points
-                    endpoints_f.append(interpolator.dot(f_vals))
-
-                for p in range(len(endpoints)-1):  # iterating through intersecting segments inside the triangle
-                    flux += (endpoints_f[p] + endpoints_f[p+1]) * np.linalg.norm(endpoints[p+1][0])
-        return flux / 2
+        return SectionIntersections([intersections]).line_integral(scalar_flux_values)[0]
 
     @staticmethod
     def line_double_integral(intersections, height_values, scalar_flux_values):
         """!
         @brief The line integral of a scalar field (product of two scalars) across a section (not really a flux)
         """
-        flux = 0
-        for i, j, k in intersections:  # iterating through triangles in the intersection
-            h_vals = height_values[[i, j, k]]
-            f_vals = scalar_flux_values[[i, j, k]]
-
-            for endpoints in intersections[i, j, k]:
-                endpoints_h, endpoints_f = [], []
-
-                for normal, interpolator in endpoints:  # pre-compute the values on each start/turning/end points
-                    endpoints_h.append(interpolator.dot(h_vals))
-                    endpoints_f.append(interpolator.dot(f_vals))
-
-                for p in range(len(endpoints)-1):  # iterating through intersecting segments inside the triangle
-                    first_h, second_h = endpoints_h[p], endpoints_h[p+1]
-                    first_f, second_f = endpoints_f[p], endpoints_f[p+1]
-
-                    flux += (2 * (first_f * first_h + second_f * second_h)
-                             + (first_f * second_h + second_f * first_h)) * np.linalg.norm(endpoints[p+1][0])
-
-        return flux / 6
+        return SectionIntersections([intersections]).line_double_integral(height_values, scalar_flux_values)[0]
 
     @staticmethod
     def line_flux(intersections, x_vector_values, y_vector_values):
         """!
         @brief The flux of a vector field across a line
         """
-        flux = 0
-        for i, j, k in intersections:  # iterating through triangles in the intersection
-            x_vals = x_vector_values[[i, j, k]]
-            y_vals = y_vector_values[[i, j, k]]
-
-            for endpoints in intersections[i, j, k]:
-                endpoints_x, endpoints_y = [], []
-
-                for normal, interpolator in endpoints:  # pre-compute the values on each start/turning/end points
-                    endpoints_x.append(interpolator.dot(x_vals))
-                    endpoints_y.append(interpolator.dot(y_vals))
-
-                for p in range(len(endpoints)-1):  # iterating through intersecting segments inside the triangle
-                    normal = endpoints[p+1][0]
-
-                    first_normal = np.dot([endpoints_x[p], endpoints_y[p]], normal)
-                    second_normal = np.dot([endpoints_x[p+1], endpoints_y[p+1]], normal)
-
-                    flux += first_normal + second_normal
-
-        return flux / 2
+        return SectionIntersections([intersections]).line_flux(x_vector_values, y_vector_values)[0]
 
     @staticmethod
     def area_flux(intersections, x_vector_values, y_vector_values, height_values):
         """!
         @brief The flux of a vector field across a section (the surface height is a scalar field)
         """
-        flux = 0
-        for i, j, k in intersections:  # iterating through triangles in the intersection
-            x_vals = x_vector_values[[i, j, k]]
-            y_vals = y_vector_values[[i, j, k]]
-            h_vals = height_values[[i, j, k]]
-
-            for endpoints in intersections[i, j, k]:
-                endpoints_x, endpoints_y, endpoints_h = [], [], []
-
-                for normal, interpolator in endpoints:  # pre-compute the values on each start/turning/end points
-                    endpoints_x.append(interpolator.dot(x_vals))
-                    endpoints_y.append(interpolator.dot(y_vals))
-                    endpoints_h.append(interpolator.dot(h_vals))
-
-                for p in range(len(endpoints)-1):  # iterating through intersecting segments inside the triangle
-                    normal = endpoints[p+1][0]
-
-                    first_normal = np.dot([endpoints_x[p], endpoints_y[p]], normal)
-                    second_normal = np.dot([endpoints_x[p+1], endpoints_y[p+1]], normal)
-
-                    first_h, second_h = endpoints_h[p], endpoints_h[p+1]
-
-                    flux += 2 * (first_normal * first_h + second_normal * second_h) \
-                              + (first_normal * second_h + second_normal * first_h)
-
-        return flux / 6
+        return SectionIntersections([intersections]).area_flux(x_vector_values, y_vector_values, height_values)[0]
 
     @staticmethod
     def mass_flux(intersections, x_vector_values, y_vector_values, height_values, density_values):
         """!
         @brief The mass-flux of a vector field across a section (with surface height and density, two scalars fields)
         """
-        flux = 0
-        for i, j, k in intersections:  # iterating through triangles in the intersection
-            x_vals = x_vector_values[[i, j, k]]
-            y_vals = y_vector_values[[i, j, k]]
-            h_vals = height_values[[i, j, k]]
-            d_vals = density_values[[i, j, k]]
+        return SectionIntersections([intersections]).mass_flux(x_vector_values, y_vector_values, height_values,
+                                                               density_values)[0]
 
-            for endpoints in intersections[i, j, k]:
-                endpoints_x, endpoints_y, endpoints_h, endpoints_d = [], [], [], []
 
-                for normal, interpolator in endpoints:  # pre-compute the values on each start/turning/end points
-                    endpoints_x.append(interpolator.dot(x_vals))
-                    endpoints_y.append(interpolator.dot(y_vals))
-                    endpoints_h.append(interpolator.dot(h_vals))
-                    endpoints_d.append(interpolator.dot(d_vals))
-
-                for p in range(len(endpoints)-1):  # iterating through intersecting segments inside the triangle
-                    normal = endpoints[p+1][0]
-
-                    first_normal = np.dot([endpoints_x[p], endpoints_y[p]], normal)
-                    second_normal = np.dot([endpoints_x[p+1], endpoints_y[p+1]], normal)
+class SectionIntersections:
+    """!
+    @brief Intersections of several sections with the mesh, stored as flat arrays of intersected segments
 
-                    first_h, second_h = endpoints_h[p], endpoints_h[p+1]
-                    first_d, second_d = endpoints_d[p], endpoints_d[p+1]
+    Every segment (between two consecutive start/turning/end points inside a triangle) is described by
+    the nodes of its triangle, the interpolators of its two endpoints, its normal vector and its section.
+    The flux of every section in a frame is then computed with a few vectorized gathers and sums.
+    """
+    def __init__(self, intersections):
+        """!
+        @param intersections <[dict]>: intersections of every section (see TriangularVectorField.section_intersection)
+        """
+        self.nb_sections = len(intersections)
+        nodes, first_weights, second_weights, normals, section_ids = [], [], [], [], []
+        for section_id, section_intersections in enumerate(intersections):
+            for triangle, lines in section_intersections.items():
+                for endpoints in lines:
+                    for p in range(len(endpoints) - 1):  # iterating through intersecting segments inside the triangle
+                        nodes.append(triangle)
+                        first_weights.append(endpoints[p][1])
+                        second_weights.append(endpoints[p + 1][1])
+                        normals.append(endpoints[p + 1][0])
+                        section_ids.append(section_id)
+
+        self.nodes = np.array(nodes, dtype=np.int64).reshape(-1, 3)
+        self.first_weights = np.array(first_weights, dtype=np.float64).reshape(-1, 3)
+        self.second_weights = np.array(second_weights, dtype=np.float64).reshape(-1, 3)
+        self.normals = np.array(normals, dtype=np.float64).reshape(-1, 2)
+        self.lengths = np.sqrt(np.sum(self.normals ** 2, axis=1))
+        self.section_ids = np.array(section_ids, dtype=np.int64)
+
+    def endpoint_values(self, values):
+        """!
+        @brief Interpolate a field on the two endpoints of every segment
+        @param values <numpy.1D-array>: values of the field on the nodes
+        @return <numpy.1D-array, numpy.1D-array>: values on the first and on the second endpoints
+        """
+        node_values = values[self.nodes]
+        return np.sum(self.first_weights * node_values, axis=1), np.sum(self.second_weights * node_values, axis=1)
 
-                    flux += 9 * (first_normal * first_h * first_d + second_normal * second_h * second_d) + \
-                            (2*first_normal+second_normal) * (2*first_h+second_h) * (2*first_d+second_d) + \
-                            (first_normal+2*second_normal) * (first_h+2*second_h) * (first_d+2*second_d)
+    def normal_values(self, x_vector_values, y_vector_values):
+        """!
+        @brief Interpolate the normal component of a vector field on the two endpoints of every segment
+        @return <numpy.1D-array, numpy.1D-array>: values on the first and on the second endpoints
+        """
+        first_x, second_x = self.endpoint_values(x_vector_values)
+        first_y, second_y = self.endpoint_values(y_vector_values)
+        return (first_x * self.normals[:, 0] + first_y * self.normals[:, 1],
+                second_x * self.normals[:, 0] + second_y * self.normals[:, 1])
 
-        return flux / 72
+    def sum_by_section(self, segment_values):
+        """!
+        @brief Sum the contributions of the segments of every section
+        @param segment_values <numpy.1D-array>: contribution of every segment
+        @return <numpy.1D-array>: value for every section
+        """
+        return np.bincount(self.section_ids, weights=segment_values, minlength=self.nb_sections)
+
+    def line_integral(self, scalar_flux_values):
+        """!@brief The line integral of a scalar field along every section"""
+        first_f, second_f = self.endpoint_values(scalar_flux_values)
+        return self.sum_by_section((first_f + second_f) * self.lengths) / 2
+
+    def line_double_integral(self, height_values, scalar_flux_values):
+        """!@brief The line integral of a product of two scalar fields along every section"""
+        first_h, second_h = self.endpoint_values(height_values)
+        first_f, second_f = self.endpoint_values(scalar_flux_values)
+        return self.sum_by_section((2 * (first_f * first_h + second_f * second_h)
+                                    + (first_f * second_h + second_f * first_h)) * self.lengths) / 6
+
+    def line_flux(self, x_vector_values, y_vector_values):
+        """!@brief The flux of a vector field across every section"""
+        first_normal, second_normal = self.normal_values(x_vector_values, y_vector_values)
+        return self.sum_by_section(first_normal + second_normal) / 2
+
+    def area_flux(self, x_vector_values, y_vector_values, height_values):
+        """!@brief The flux of a vector field across every section (the surface height is a scalar field)"""
+        first_normal, second_normal = self.normal_values(x_vector_values, y_vector_values)
+        first_h, second_h = self.endpoint_values(height_values)
+        return self.sum_by_section(2 * (first_normal * first_h + second_normal * second_h)
+                                   + (first_normal * second_h + second_normal * first_h)) / 6
+
+    def mass_flux(self, x_vector_values, y_vector_values, height_values, density_values):
+        """!@brief The mass-flux of a vector field across every section (with surface height and density)"""
+        first_normal, second_normal = self.normal_values(x_vector_values, y_vector_values)
+        first_h, second_h = self.endpoint_values(height_values)
+        first_d, second_d = self.endpoint_values(density_values)
+        return self.sum_by_section(9 * (first_normal * first_h * first_d + second_normal * second_h * second_d)
+                                   + (2*first_normal+second_normal) * (2*first_h+second_h) * (2*first_d+second_d)
+                                   + (first_normal+2*second_normal) * (first_h+2*second_h) * (first_d+2*second_d)) / 72
+
+    def fluxes(self, flux_type, values):
+        """!
+        @brief Compute the flux of every section in a single frame, depending on the flux type
+        @param flux_type <int>: flux type identifier (see FluxCalculator)
+        @param values <[numpy.1D-array]>: list of the values of the scalar/vector fields
+        @return <numpy.1D-array>: value of the flux for every section
+        """
+        if flux_type == FluxCalculator.LINE_INTEGRAL:
+            return self.line_integral(values[0])
+        elif flux_type == FluxCalculator.DOUBLE_LINE_INTEGRAL:
+            return self.line_double_integral(values[0], values[1])
+        elif flux_type == FluxCalculator.LINE_FLUX:
+            return self.line_flux(values[0], values[1])
+        elif flux_type == FluxCalculator.AREA_FLUX:
+            return self.area_flux(values[0], values[1], values[2])
+        else:
+            return self.mass_flux(values[0], values[1], values[2], values[3])
 
 
 class FluxCalculator:
@@ -298,6 +299,7 @@ class FluxCalculator:
 
         self.mesh = None
         self.intersections = []
+        self.section_intersections = None
 
     def construct_triangles(self, iter_pbar=lambda x, unit: x):
         """!
@@ -312,6 +314,7 @@ class FluxCalculator:
         """
         for section in self.sections:
             self.intersections.append(self.mesh.section_intersection(section))
+        self.section_intersections = SectionIntersections(self.intersections)
 
     def flux_in_frame(self, intersections, values):
         """!
@@ -319,16 +322,15 @@ class FluxCalculator:
         @param values <[numpy.1D-array]>: list of the values of the scalar/vector fields
         @return <float>: The value of the flux
         """
-        if self.flux_type == FluxCalculator.LINE_INTEGRAL:
-            return TriangularVectorField.line_integral(intersections, values[0])
-        elif self.flux_type == FluxCalculator.DOUBLE_LINE_INTEGRAL:
-            return TriangularVectorField.line_double_integral(intersections, values[0], values[1])
-        elif self.flux_type == FluxCalculator.LINE_FLUX:
-            return TriangularVectorField.line_flux(intersections, values[0], values[1])
-        elif self.flux_type == FluxCalculator.AREA_FLUX:
-            return TriangularVectorField.area_flux(intersections, values[0], values[1], values[2])
-        else:
-            return TriangularVectorField.mass_flux(intersections, values[0], values[1], values[2], values[3])
+        return SectionIntersections([intersections]).fluxes(self.flux_type, values)[0]
+
+    def fluxes_in_frame(self, values):
+        """!
+        @brief Do the flux computation of all sections in a single frame, depending on the flux type
+        @param values <[numpy.1D-array]>: list of the values of the scalar/vector fields
+        @return <numpy.1D-array>: The value of the flux for every section
+        """
+        return self.section_intersections.fluxes(self.flux_type, values)
 
     def run(self, iter_pbar=lambda x, unit: x, fmt_float=settings.FMT_FLOAT):
         """!
@@ -336,15 +338,10 @@ class FluxCalculator:
         @param iter_pbar: iterable progress bar
         """
         result = []
-        for time_index in iter_pbar(self.time_indices, unit='frames'):
+        frames = self.input_stream.iter_frames(self.time_indices, self.var_IDs)
+        for time_index, (_, values) in zip(iter_pbar(self.time_indices, unit='frames'), frames):
             i_result = [str(self.input_stream.time[time_index])]
-            values = []
-            for var_ID in self.var_IDs:
-                values.append(self.input_stream.read_var_in_frame(time_index, var_ID))
-
-            for j in range(len(self.sections)):
-                intersections = self.intersections[j]
-                flux = self.flux_in_frame(intersections, values)
+            for flux in self.fluxes_in_frame(values):
                 i_result.append(fmt_float.format(flux))
             result.append(i_result)
         return result
@@ -2,9 +2,15 @@
 Barycentric interpolation in triangles
 """
 
+import hashlib
 import numpy as np
+import os
+import zipfile
+
+from pyteltools.conf import settings
 
 from .mesh2D import Mesh2D
+from .util import logger
 
 
 class Interpolator:
@@ -36,116 +42,311 @@ class Interpolator:
         return np.all(coord >= 0) and np.all(coord <= 1), coord
 
 
+class InterpolatorCache:
+    """!
+    On-disk cache of interpolators (one NPZ file per key) with a least recently used eviction
+    """
+    def __init__(self, folder=None, max_size=None):
+        """!
+        @param folder <str>: folder of the cache files (default: settings.INTERPOLATOR_CACHE_DIR)
+        @param max_size <int>: maximum size (in bytes) of the cache (default: settings.INTERPOLATOR_CACHE_SIZE)
+        """
+        self.folder = settings.INTERPOLATOR_CACHE_DIR if folder is None else folder
+        self.max_size = settings.INTERPOLATOR_CACHE_SIZE if max_size is None else max_size
+
+    @staticmethod
+    def get_key(*items):
+        """!
+        @brief Hash the data identifying an interpolator
+        @param items <str or numpy.ndarray>: strings and arrays (their dtype, shape and content are hashed)
+        @return <str>: hexadecimal digest
+        """
+        digest = hashlib.sha1()
+        for item in items:
+            if isinstance(item, str):
+                digest.update(item.encode())
+            else:
+                item = np.ascontiguousarray(item)
+                digest.update(('%s%s' % (item.dtype.str, item.shape)).encode())
+                digest.update(item.tobytes())
+        return digest.hexdigest()
+
+    def _get_path(self, key):
+        return os.path.join(self.folder, key + '.npz')
+
+    def load(self, key):
+        """!
+        @brief Read the arrays stored for a key and mark them as recently used
+        @param key <str>: cache key (see `get_key`)
+        @return <dict>: arrays read from the cache (or None if missing)
+        """
+        path = self._get_path(key)
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                arrays = {name: npz[name] for name in npz.files}
+            os.utime(path)
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            return None
+        logger.debug('Reading interpolators from the cache: "%s"' % path)
+        return arrays
+
+    def save(self, key, arrays):
+        """!
+        @brief Store arrays for a key and remove the least recently used files if the cache is too large
+        (failures are only logged)
+        @param key <str>: cache key (see `get_key`)
+        @param arrays <dict>: arrays to store
+        """
+        path = self._get_path(key)
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            with open(path + '.tmp', 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(path + '.tmp', path)
+            self.evict()
+        except OSError as e:
+            logger.warning('The interpolators could not be written in the cache "%s": %s' % (path, e))
+
+    def evict(self):
+        """!
+        @brief Remove the least recently used files until the cache size is below its maximum size
+        """
+        entries = []
+        for entry in os.scandir(self.folder):
+            if entry.name.endswith('.npz'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            os.remove(path)
+            total_size -= size
+
+
+class PointLocator:
+    """!
+    Batch point location in the triangles of a mesh
+
+    The triangles are registered in the cells of a uniform grid covering the mesh (all the cells overlapped by their
+    bounding box). The candidate triangles of a point are those registered in its cell, and the barycentric
+    coordinates of all the (point, candidate) pairs are computed at once.
+    """
+    CHUNK_SIZE = 100000  # number of points located at once (bounds the memory used by the candidate pairs)
+
+    def __init__(self, triangles):
+        """!
+        @param triangles <slf.mesh2D.MeshTriangles>: triangle store of the mesh
+        """
+        self.triangles = triangles
+        nb_triangles = len(triangles)
+        bounding_boxes = triangles.bounding_boxes
+        if nb_triangles == 0:
+            self.origin, self.cell_size, self.shape = np.zeros(2), 1.0, (1, 1)
+            self.cell_start, self.cell_elements = np.zeros(2, dtype=np.int64), np.zeros(0, dtype=np.int64)
+            return
+
+        # about one cell per triangle, but no smaller than the typical triangle size
+        self.origin = bounding_boxes[:, :2].min(axis=0)
+        extent = bounding_boxes[:, 2:].max(axis=0) - self.origin
+        typical_size = np.median(np.max(bounding_boxes[:, 2:] - bounding_boxes[:, :2], axis=1))
+        self.cell_size = max(np.sqrt(extent[0] * extent[1] / nb_triangles), typical_size)
+        if self.cell_size <= 0:
+            self.cell_size = 1.0
+        self.shape = tuple(np.floor(extent / self.cell_size).astype(np.int64) + 1)
+
+        # register every triangle in all the cells overlapped by its bounding box
+        first_cells = self._cell_coordinates(bounding_boxes[:, :2])
+        last_cells = self._cell_coordinates(bounding_boxes[:, 2:])
+        nb_cells = last_cells - first_cells + 1
+        nb_registrations = nb_cells[:, 0] * nb_cells[:, 1]
+        elements = np.repeat(np.arange(nb_triangles), nb_registrations)
+        rank = np.arange(elements.shape[0]) - np.repeat(np.cumsum(nb_registrations) - nb_registrations,
+                                                        nb_registrations)
+        cell_x = first_cells[elements, 0] + rank // nb_cells[elements, 1]
+        cell_y = first_cells[elements, 1] + rank % nb_cells[elements, 1]
+        cell_ids = cell_x * self.shape[1] + cell_y
+
+        order = np.argsort(cell_ids, kind='stable')
+        self.cell_elements = elements[order]
+        self.cell_start = np.zeros(self.shape[0] * self.shape[1] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cell_ids, minlength=self.shape[0] * self.shape[1]), out=self.cell_start[1:])
+
+    def _cell_coordinates(self, points):
+        cells = np.floor((points - self.origin) / self.cell_size).astype(np.int64)
+        return np.clip(cells, 0, np.array(self.shape) - 1)
+
+    def locate(self, points):
+        """!
+        @brief Find the triangle containing each point and the barycentric coordinates of the point in it
+        @param points <numpy.2D-array>: x and y coordinates of the points [shape = (nb_points, 2)]
+        @return <numpy.1D-array, numpy.2D-array>: the triangle (element) indices, -1 for points outside the mesh,
+            and the barycentric coordinates [shape = (nb_points, 3)], NaN for points outside the mesh
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        element_indices = np.full(points.shape[0], -1, dtype=np.int64)
+        weights = np.full((points.shape[0], 3), np.nan)
+        for start in range(0, points.shape[0], PointLocator.CHUNK_SIZE):
+            chunk = slice(start, start + PointLocator.CHUNK_SIZE)
+            element_indices[chunk], weights[chunk] = self._locate_chunk(points[chunk])
+        return element_indices, weights
+
+    def _locate_chunk(self, points):
+        nb_points = points.shape[0]
+        element_indices = np.full(nb_points, -1, dtype=np.int64)
+        weights = np.full((nb_points, 3), np.nan)
+
+        # candidate pairs (point, triangle) from the cell of each point
+        cells = self._cell_coordinates(points)
+        cell_ids = cells[:, 0] * self.shape[1] + cells[:, 1]
+        first, last = self.cell_start[cell_ids], self.cell_start[cell_ids + 1]
+        nb_candidates = last - first
+        point_indices = np.repeat(np.arange(nb_points), nb_candidates)
+        rank = np.arange(point_indices.shape[0]) - np.repeat(np.cumsum(nb_candidates) - nb_candidates,
+                                                             nb_candidates)
+        candidates = self.cell_elements[first[point_indices] + rank]
+
+        coords = self.triangles.barycentric_coordinates(candidates, points[point_indices, 0],
+                                                        points[point_indices, 1])
+        is_in = np.all((coords >= 0) & (coords <= 1), axis=1)
+        point_indices, candidates, coords = point_indices[is_in], candidates[is_in], coords[is_in]
+
+        # keep the triangle of smallest index for points on a shared edge or node
+        order = np.lexsort((candidates, point_indices))
+        located_points, first_pairs = np.unique(point_indices[order], return_index=True)
+        selected = order[first_pairs]
+        element_indices[located_points] = candidates[selected]
+        weights[located_points] = coords[selected]
+        return element_indices, weights
+
+
 class MeshInterpolator(Mesh2D):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self._point_locator = None
+        self._mesh_key = None
 
-    def get_point_interpolators(self, points):
-        nb_points = len(points)
-        is_inside = [False] * nb_points
-        point_interpolators = [None] * nb_points
-
-        for index, (x, y) in enumerate(points):
-            potential_elements = self.get_intersecting_elements((x, y, x, y))
-            if not potential_elements:
-                continue
-            for i, j, k in potential_elements:
-                t = self.triangles[i, j, k]
-                is_in, point_interpolator = Interpolator(t).is_in_triangle(x, y)
-                if is_in:
-                    is_inside[index] = True
-                    point_interpolators[index] = ((i, j, k), point_interpolator)
-                    break
+    def get_mesh_key(self):
+        """!
+        @brief Hash the mesh geometry (connectivity table and coordinates) to identify its interpolators in the cache
+        @return <str>: hexadecimal digest
+        """
+        if self._mesh_key is None:
+            self._mesh_key = InterpolatorCache.get_key(self.ikle.astype(np.int64), self.x.astype(np.float64),
+                                                       self.y.astype(np.float64))
+        return self._mesh_key
+
+    def locate_points(self, points):
+        """!
+        @brief Find the triangle containing each point and the barycentric coordinates of the point in it
+        (results are reused from/stored in the interpolator cache if settings.INTERPOLATOR_CACHE is enabled)
+        @param points <numpy.2D-array or [tuple]>: x and y coordinates of the points
+        @return <numpy.1D-array, numpy.2D-array>: the triangle (element) indices, -1 for points outside the mesh,
+            and the barycentric coordinates [shape = (nb_points, 3)], NaN for points outside the mesh
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if settings.INTERPOLATOR_CACHE:
+            cache = InterpolatorCache()
+            key = InterpolatorCache.get_key('points', self.get_mesh_key(), points)
+            arrays = cache.load(key)
+            if arrays is not None:
+                return arrays['element_indices'], arrays['weights']
+
+        if self._point_locator is None or self._point_locator.triangles is not self.triangles:
+            self._point_locator = PointLocator(self.triangles)
+        element_indices, weights = self._point_locator.locate(points)
+
+        if settings.INTERPOLATOR_CACHE:
+            cache.save(key, {'element_indices': element_indices, 'weights': weights})
+        return element_indices, weights
 
+    def get_point_interpolators(self, points):
+        element_indices, weights = self.locate_points(points)
+        is_inside = (element_indices >= 0).tolist()
+        point_interpolators = [None] * len(is_inside)
+        for index in np.flatnonzero(element_indices >= 0):
+            i, j, k = self.ikle[element_indices[index]]
+            point_interpolators[index] = ((i, j, k), weights[index])
         return is_inside, point_interpolators
 
+    def locate_polyline(self, coordinates):
+        """!
+        @brief Find the successive points of a polyline on the mesh: the first point inside the mesh,
+        the crossings with the triangle edges, the turning points of the polyline and the last point inside the mesh
+        @param coordinates <numpy.2D-array>: x and y coordinates of the polyline vertices [shape = (nb_vertices, 2)]
+        @return <numpy.2D-array, numpy.1D-array, numpy.2D-array, numpy.1D-array, numpy.1D-array>: coordinates of
+            the points [shape = (nb_points, 2)], element indices, barycentric coordinates [shape = (nb_points, 3)],
+            cumulative distances (from the start of the first intersected segment) and segment indices,
+            or None if the intersection between the polyline and the mesh is discontinuous
+        """
+        coordinates = np.asarray(coordinates, dtype=np.float64)[:, :2]
+        segments, elements, parameters, points = self.trace_polyline(coordinates)
+        if segments.shape[0] == 0:
+            return np.zeros((0, 2)), np.zeros(0, dtype=np.int64), np.zeros((0, 3)), np.zeros(0), segments
+        if not np.all(self.are_pieces_continuous(segments, parameters)):
+            return None
+
+        # the start of every piece and the end of the last piece
+        elements = np.append(elements, elements[-1])
+        segments = np.append(segments, segments[-1])
+        points = np.vstack([points[:, 0, :], points[-1:, 1, :]])
+        weights = self.triangles.barycentric_coordinates(elements, points[:, 0], points[:, 1])
+
+        offset = np.hypot(*(points[0] - coordinates[segments[0]]))
+        distances = offset + np.concatenate([[0], np.cumsum(np.hypot(*np.diff(points, axis=0).T))])
+        return points, elements, weights, distances, segments
+
     def _get_line_interpolators(self, line):
-        intersections = []
-        internal_points = []  # line interpolators without intersections
-
-        # record the distance offset before the first intersection point
-        offset = 0
-        found_intersection = False
-
-        for right, up, segment in line.segments():  # for every segment, sort intersection points
-            segment_intersections = []
-            potential_elements = self.get_intersecting_elements(segment.bounds())
-            for i, j, k in potential_elements:
-                t = self.triangles[i, j, k]
-                is_intersected, t_intersections = segment.linestring_intersection(t)
-                if is_intersected:
-                    interpolator = Interpolator(t)
-                    for intersection in t_intersections:
-                        for x, y in intersection.coords:
-                            segment_intersections.append((x, y, (i, j, k), interpolator.get_interpolator_at(x, y)))
-
-            # first sort by y, then sort by x
-            if up:
-                segment_intersections.sort(key=lambda x: x[1])
-            else:
-                segment_intersections.sort(key=lambda x: x[1], reverse=True)
-            if right:
-                segment_intersections.sort()
-            else:
-                segment_intersections.sort(reverse=True)
-
-            intersections.extend(segment_intersections)
-            if not segment_intersections:
-                continue
-
-            internal_points.append(segment_intersections[0])
-            internal_points.append(segment_intersections[-1])
-
-            if not found_intersection:
-                first_point, second_point = list(segment.coords())
-                if not segment_intersections:
-                    offset += np.linalg.norm(np.array(second_point) - np.array(first_point))
-                else:
-                    found_intersection = True
-                    first_intersection = np.array(segment_intersections[0][:2])
-                    offset += np.linalg.norm(first_intersection - np.array(first_point))
-
-        # if the intersection is continuous, every internal point or turning point has at least two duplicates
-        prev_x, prev_y = None, None
-        duplicates = 0
-        to_remove = [False] * len(intersections)
-        for i, (x, y, _, __) in enumerate(intersections):
-            if i == 0:  # the start and end points are not duplicated
-                continue
-            if prev_x is None:
-                prev_x, prev_y = x, y
-                continue
-            if x == prev_x and y == prev_y:
-                to_remove[i] = True
-                duplicates += 1
-            else:
-                if duplicates == 0:  # no duplicate found, the intersection is discontinuous
-                    return [], [], [], []
-                duplicates = 0
-                prev_x, prev_y = x, y
-
-        intersections = [intersections[i] for i in range(len(intersections)) if not to_remove[i]]
-
-        # trim internal points from 2n+2 to n+1
-        if internal_points:
-            internal_points = internal_points[0:-1:2] + [internal_points[-1]]
-
-        # compute cumulative distance
-        distance = offset
-        distances = [offset]
-        for i in range(len(intersections)-1):
-            first, second = intersections[i+1], intersections[i]
-            distance += np.linalg.norm([second[0] - first[0], second[1] - first[1]])
-            distances.append(distance)
-
-        distance = offset
-        distances_internal = [offset]
-        for i in range(len(internal_points)-1):
-            first, second = internal_points[i+1], internal_points[i]
-            distance += np.linalg.norm([second[0] - first[0], second[1] - first[1]])
-            distances_internal.append(distance)
-
-        return intersections, distances, internal_points, distances_internal
+        coordinates = np.array([coord[:2] for coord in line.coords()], dtype=np.float64)
+        located = self.locate_polyline(coordinates)
+        if located is None:
+            return [], [], [], []
+        points, elements, weights, distances, segments = located
+        if points.shape[0] == 0:
+            return [], [0], [], [0]
+
+        triangles = list(map(tuple, self.ikle[elements].tolist()))
+        intersections = [(x, y, triangle, interpolator) for (x, y), triangle, interpolator
+                         in zip(points.tolist(), triangles, weights)]
+
+        # internal points: the first point on every intersected segment and the last point
+        _, first_indices = np.unique(segments[:-1], return_index=True)
+        internal_indices = np.append(first_indices, points.shape[0] - 1)
+        internal_points = [intersections[index] for index in internal_indices]
+        distances_internal = distances[0] + np.concatenate(
+            [[0], np.cumsum(np.hypot(*np.diff(points[internal_indices], axis=0).T))])
+
+        return intersections, distances.tolist(), internal_points, distances_internal.tolist()
+
+    def _get_cached_line_interpolators(self, line):
+        """!
+        @brief Read the line interpolators from the interpolator cache, or compute and store them
+        """
+        cache = InterpolatorCache()
+        coordinates = np.array([coord[:2] for coord in line.coords()], dtype=np.float64)
+        key = InterpolatorCache.get_key('line', self.get_mesh_key(), coordinates)
+        arrays = cache.load(key)
+        if arrays is None:
+            result = self._get_line_interpolators(line)
+            arrays = {}
+            for name, (intersections, distances) in zip(('all', 'internal'), (result[:2], result[2:])):
+                arrays[name + '_xy'] = np.array([(x, y) for x, y, _, _ in intersections],
+                                                dtype=np.float64).reshape(-1, 2)
+                arrays[name + '_triangles'] = np.array([triangle for _, _, triangle, _ in intersections],
+                                                       dtype=np.int64).reshape(-1, 3)
+                arrays[name + '_weights'] = np.array([interpolator for _, _, _, interpolator in intersections],
+                                                     dtype=np.float64).reshape(-1, 3)
+                arrays[name + '_distances'] = np.array(distances, dtype=np.float64)
+            cache.save(key, arrays)
+            return result
+
+        result = []
+        for name in ('all', 'internal'):
+            result.append([(x, y, tuple(triangle), interpolator) for (x, y), triangle, interpolator
+                           in zip(arrays[name + '_xy'].tolist(), arrays[name + '_triangles'].tolist(),
+                                  arrays[name + '_weights'])])
+            result.append(arrays[name + '_distances'].tolist())
+        return tuple(result)
 
     def get_line_interpolators(self, lines):
         nb_nonempty = 0
@@ -154,7 +355,12 @@ class MeshInterpolator(Mesh2D):
         line_interpolators_internal = []
 
         for i, line in enumerate(lines):
-            line_interpolator, distance, line_interpolator_internal, distance_internal = self._get_line_interpolators(line)
+            if settings.INTERPOLATOR_CACHE:
+                line_interpolator, distance, line_interpolator_internal, distance_internal = \
+                    self._get_cached_line_interpolators(line)
+            else:
+                line_interpolator, distance, line_interpolator_internal, distance_internal = \
+                    self._get_line_interpolators(line)
 
             if line_interpolator:
                 nb_nonempty += 1
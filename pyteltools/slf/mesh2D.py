@@ -7,11 +7,105 @@ from rtree.index import Index
 from shapely.geometry import Polygon
 
 
+class MeshTriangles:
+    """!
+    Array-backed store of the triangles of a mesh, also usable as a read-only mapping from
+    the triangles (i, j, k) to their shapely Polygon.
+
+    Areas, bounding boxes and the inverse matrices of the barycentric coordinates are precomputed as arrays.
+    Polygons are built on demand (only when an exact clipping is needed).
+    Triangles are iterated in the order of the connectivity table.
+    """
+    def __init__(self, points, ikle, bounding_boxes=None):
+        """!
+        @param points <numpy.2D-array>: x and y coordinates of the nodes [shape = (nb_points, 2)]
+        @param ikle <numpy.2D-array>: 0-based connectivity table [shape = (nb_triangles, 3)]
+        @param bounding_boxes <numpy.2D-array>: bounding boxes of the triangles (computed if not given)
+        """
+        self.points = points
+        self.ikle = ikle
+        triangle_points = points[ikle]  # shape = (nb_triangles, 3, 2)
+        if bounding_boxes is None:
+            bounding_boxes = np.hstack([triangle_points.min(axis=1), triangle_points.max(axis=1)])
+        self.bounding_boxes = bounding_boxes
+
+        # matrices of the edges from the first vertex: [[x2-x1, x3-x1], [y2-y1, y3-y1]]
+        edges = (triangle_points[:, 1:, :] - triangle_points[:, :1, :]).transpose((0, 2, 1))
+        det = edges[:, 0, 0] * edges[:, 1, 1] - edges[:, 0, 1] * edges[:, 1, 0]
+        self.areas = np.abs(det) / 2
+        with np.errstate(divide='ignore', invalid='ignore'):  # degenerated triangles
+            self.inverse_matrices = np.stack([np.stack([edges[:, 1, 1], -edges[:, 0, 1]], axis=1),
+                                              np.stack([-edges[:, 1, 0], edges[:, 0, 0]], axis=1)],
+                                             axis=1) / det[:, np.newaxis, np.newaxis]
+        self._keys = None  # set of triangles (built on first membership test)
+
+    def polygon(self, index):
+        """!
+        @brief Build the shapely polygon of a triangle
+        @param index <int>: element index
+        @return <shapely.geometry.Polygon>: the triangle
+        """
+        return Polygon(self.points[self.ikle[index]])
+
+    def vertices(self, index):
+        """!
+        @brief Return the coordinates of the three vertices of a triangle
+        @param index <int>: element index
+        @return <tuple>: the coordinates (numpy.1D-array) of the three vertices
+        """
+        return tuple(self.points[self.ikle[index]])
+
+    def barycentric_coordinates(self, indices, x, y):
+        """!
+        @brief Compute the barycentric coordinates of points in triangles
+        @param indices <int or numpy.1D-array>: element index (or indices)
+        @param x <float or numpy.1D-array>: x coordinate(s) of the point(s)
+        @param y <float or numpy.1D-array>: y coordinate(s) of the point(s)
+        @return <numpy.1D-array or numpy.2D-array>: barycentric coordinates [shape = (..., 3)]
+        """
+        first_points = self.points[self.ikle[indices, 0]]
+        dx, dy = x - first_points[..., 0], y - first_points[..., 1]
+        inverse_matrices = self.inverse_matrices[indices]
+        coord_2 = inverse_matrices[..., 0, 0] * dx + inverse_matrices[..., 0, 1] * dy
+        coord_3 = inverse_matrices[..., 1, 0] * dx + inverse_matrices[..., 1, 1] * dy
+        return np.stack([1 - coord_2 - coord_3, coord_2, coord_3], axis=-1)
+
+    def __getitem__(self, triangle):
+        i, j, k = triangle
+        return Polygon([self.points[i], self.points[j], self.points[k]])
+
+    def __len__(self):
+        return self.ikle.shape[0]
+
+    def __iter__(self):
+        for i, j, k in self.ikle:
+            yield i, j, k
+
+    def __contains__(self, triangle):
+        if self._keys is None:
+            self._keys = set(map(tuple, self.ikle.tolist()))
+        return tuple(triangle) in self._keys
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        for triangle in self:
+            yield self[triangle]
+
+    def items(self):
+        for triangle in self:
+            yield triangle, self[triangle]
+
+
 class Mesh2D:
     """!
     The general representation of mesh in Serafin 2D.
     The basis for interpolation, volume calculations etc.
     """
+    CLIP_EPSILON = 1e-10  # tolerance on barycentric coordinates and on parameters along segments when clipping lines
+    INFINITY = float('inf')
+
     def __init__(self, input_header, construct_index=False, iter_pbar=lambda x, unit: x):
         """!
         @param input_header <slf.Serafin.SerafinHeader>: input Serafin header
@@ -24,21 +118,36 @@ class Mesh2D:
         self.nb_points = self.x.shape[0]
         self.nb_triangles = self.ikle.shape[0]
         self.points = np.stack([self.x, self.y], axis=1)
+        self._header = input_header
+        self._neighbours = None
+        self._node_elements = None
+        self._boundary_edges = None
         if not construct_index:
             self.index = Index()
         else:
-            self._construct_index(iter_pbar)
+            self.construct_index(iter_pbar)
+
+    def get_bounding_boxes(self):
+        """!
+        @brief Compute the bounding boxes of all triangles
+        @return <numpy.2D-array>: (left, bottom, right, top) of each triangle [shape = (nb_triangles, 4)]
+        """
+        triangle_points = self.points[self.ikle]  # shape = (nb_triangles, 3, 2)
+        return np.hstack([triangle_points.min(axis=1), triangle_points.max(axis=1)])
 
-    def _construct_index(self, iter_pbar):
+    def construct_index(self, iter_pbar=lambda x, unit: x):
         """!
-        Separate the index construction from the constructor, allowing a GUI override
+        @brief Bulk load the spatial index of the triangles and set the triangle store
         @param iter_pbar: iterable progress bar
         """
-        self.index = Index()
-        for i, j, k in iter_pbar(self.ikle, unit='elements'):
-            t = Polygon([self.points[i], self.points[j], self.points[k]])
-            self.triangles[i, j, k] = t
-            self.index.insert(i, t.bounds, obj=(i, j, k))
+        bounding_boxes = self.get_bounding_boxes()
+        if self.nb_triangles == 0:
+            self.index = Index()
+        else:
+            list_bounding_boxes, ikle = bounding_boxes.tolist(), self.ikle.tolist()
+            self.index = Index((index, list_bounding_boxes[index], tuple(ikle[index]))
+                               for index in iter_pbar(range(self.nb_triangles), unit='elements'))
+        self.triangles = MeshTriangles(self.points, self.ikle, bounding_boxes)
 
     def get_intersecting_elements(self, bounding_box):
         """!
@@ -48,3 +157,317 @@ class Mesh2D:
            Beware: The returned list is not sorted
         """
         return list(self.index.intersection(bounding_box, objects='raw'))
+
+    def get_intersecting_element_indices(self, bounding_box):
+        """!
+        @brief Return the indices of the triangles in the mesh intersecting the bounding box
+        @param bounding_box <tuple>: (left, bottom, right, top) of a 2d geometrical object
+        @return <numpy.1D-array>: The indices of the triangles intersecting the bounding box (not sorted)
+        """
+        return np.fromiter(self.index.intersection(bounding_box), dtype=np.int64)
+
+    def clip_polyline(self, coordinates):
+        """!
+        @brief Clip all the segments of a polyline by the candidate triangles at once
+        (Cyrus-Beck algorithm: the barycentric coordinates are affine along a segment)
+        @param coordinates <numpy.2D-array>: x and y coordinates of the polyline vertices [shape = (nb_vertices, 2)]
+        @return <numpy.1D-array, numpy.1D-array, numpy.2D-array, numpy.3D-array>: the segment index, the element
+            index, the parameters (start, end) along the segment and the coordinates of the start and end points
+            [shape = (nb_pieces, 2, 2)] of every piece of the polyline inside a triangle, sorted along the polyline.
+            Pieces overlapping a previous piece (polyline along a shared edge) and single points are discarded.
+        """
+        coordinates = np.asarray(coordinates, dtype=np.float64)[:, :2]
+        starts, ends = coordinates[:-1], coordinates[1:]
+
+        # candidate (segment, triangle) pairs
+        candidates = [self.get_intersecting_element_indices((min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)))
+                      for (x1, y1), (x2, y2) in zip(starts.tolist(), ends.tolist())]
+        segments = np.repeat(np.arange(len(candidates), dtype=np.int64), [len(c) for c in candidates])
+        elements = np.concatenate(candidates) if candidates else np.zeros(0, dtype=np.int64)
+
+        entry_bounds, exit_bounds, is_outside = self._get_clip_bounds(elements, starts[segments], ends[segments])
+        starts_param = np.maximum(entry_bounds.max(axis=1), 0)
+        ends_param = np.minimum(exit_bounds.min(axis=1), 1)
+        is_clipped = (ends_param - starts_param > Mesh2D.CLIP_EPSILON) & ~is_outside \
+            & np.any(starts[segments] != ends[segments], axis=1)
+        segments, elements = segments[is_clipped], elements[is_clipped]
+        parameters = np.stack([starts_param[is_clipped], ends_param[is_clipped]], axis=1)
+
+        # sort along the polyline and discard the pieces already covered by a previous piece
+        order = np.lexsort((elements, -parameters[:, 1], parameters[:, 0], segments))
+        segments, elements, parameters = segments[order], elements[order], parameters[order]
+        positions = segments + parameters[:, 1]
+        is_new = np.ones(segments.shape[0], dtype=bool)
+        is_new[1:] = positions[1:] > np.maximum.accumulate(positions)[:-1] + Mesh2D.CLIP_EPSILON
+        segments, elements, parameters = segments[is_new], elements[is_new], parameters[is_new]
+
+        return segments, elements, parameters, self._get_piece_points(coordinates, segments, parameters)
+
+    def _get_clip_bounds(self, elements, starts, ends):
+        """!
+        @brief Compute the parameters along segments where the barycentric coordinates in triangles vanish
+        @param elements <numpy.1D-array>: element indices
+        @param starts <numpy.2D-array>: coordinates of the segment starts [shape = (nb_pairs, 2)]
+        @param ends <numpy.2D-array>: coordinates of the segment ends [shape = (nb_pairs, 2)]
+        @return <numpy.2D-array, numpy.2D-array, numpy.1D-array>: the entry bounds (-inf if not entering),
+            the exit bounds (inf if not exiting) for every barycentric coordinate [shape = (nb_pairs, 3)],
+            and the pairs with a segment parallel to and outside of an edge
+        """
+        first = self.triangles.barycentric_coordinates(elements, starts[:, 0], starts[:, 1])
+        last = self.triangles.barycentric_coordinates(elements, ends[:, 0], ends[:, 1])
+        first[np.abs(first) < Mesh2D.CLIP_EPSILON] = 0  # polyline along an edge or through a node
+        last[np.abs(last) < Mesh2D.CLIP_EPSILON] = 0
+        delta = last - first
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bounds = -first / delta
+        return np.where(delta > 0, bounds, -np.inf), np.where(delta < 0, bounds, np.inf), \
+            np.any((delta == 0) & (first < 0), axis=1)
+
+    @staticmethod
+    def _get_piece_points(coordinates, segments, parameters):
+        starts = coordinates[segments]
+        vectors = coordinates[segments + 1] - starts
+        return starts[:, np.newaxis, :] + parameters[:, :, np.newaxis] * vectors[:, np.newaxis, :]
+
+    def get_neighbours(self):
+        """!
+        @brief Build (only once) the element adjacency table from the edges of the header (`get_all_edges`)
+        The edge m of an element goes from its node m to its node (m+1)%3.
+        @return <numpy.2D-array>: index of the element across each edge, -1 on the boundary [shape = (nb_triangles, 3)]
+        """
+        if self._neighbours is None:
+            keys = self._header.get_edge_keys(self._header.get_all_edges())
+            order = np.argsort(keys, kind='stable')
+            is_shared = keys[order[1:]] == keys[order[:-1]]
+            first_edges, second_edges = order[:-1][is_shared], order[1:][is_shared]
+            neighbours = np.full(3 * self.nb_triangles, -1, dtype=np.int64)
+            neighbours[first_edges] = second_edges // 3
+            neighbours[second_edges] = first_edges // 3
+            self._neighbours = neighbours.reshape(-1, 3)
+        return self._neighbours
+
+    def get_node_elements(self):
+        """!
+        @brief Build (only once) the node to element adjacency
+        @return <numpy.1D-array, numpy.1D-array>: the elements around the node i are elements[starts[i]:starts[i+1]]
+            (sorted by element index)
+        """
+        if self._node_elements is None:
+            nodes = self.ikle.ravel()
+            starts = np.zeros(self.nb_points + 1, dtype=np.int64)
+            np.cumsum(np.bincount(nodes, minlength=self.nb_points), out=starts[1:])
+            self._node_elements = starts, np.argsort(nodes, kind='stable') // 3
+        return self._node_elements
+
+    def trace_polyline(self, coordinates):
+        """!
+        @brief Clip a polyline by walking from triangle to neighbour triangle along its segments
+        The walk enters the mesh across a boundary edge and goes through nodes with the node to element adjacency:
+        no spatial index is needed and the cost is proportional to the number of crossed elements.
+        @param coordinates <numpy.2D-array>: x and y coordinates of the polyline vertices [shape = (nb_vertices, 2)]
+        @return <numpy.1D-array, numpy.1D-array, numpy.2D-array, numpy.3D-array>: same as `clip_polyline`
+        """
+        coordinates = np.asarray(coordinates, dtype=np.float64)[:, :2]
+        if not isinstance(self.triangles, MeshTriangles):  # the spatial index was not constructed
+            self.triangles = MeshTriangles(self.points, self.ikle)
+        segments, elements, parameters = [], [], []
+
+        element = self._locate_point(*coordinates[0]) if coordinates.shape[0] > 1 else None
+        for segment in range(coordinates.shape[0] - 1):
+            (x1, y1), (x2, y2) = coordinates[segment:segment + 2].tolist()
+            if x1 == x2 and y1 == y2:
+                continue
+            pieces = []
+            element = self._walk_segment(element, x1, y1, x2, y2, pieces)
+            for piece_element, start_param, end_param in pieces:
+                segments.append(segment)
+                elements.append(piece_element)
+                parameters.append([start_param, end_param])
+
+        segments = np.array(segments, dtype=np.int64)
+        parameters = np.array(parameters, dtype=np.float64).reshape(-1, 2)
+        return segments, np.array(elements, dtype=np.int64), parameters, \
+            self._get_piece_points(coordinates, segments, parameters)
+
+    def _locate_point(self, x, y):
+        """!
+        @brief Return the index of an element containing the point (or None if outside the mesh)
+        The point is reached by walking from the last boundary crossing before it along a horizontal or vertical line
+        (the nearest one of the four directions).
+        """
+        _, boundary_points, _ = self._get_boundary_edges()  # the boundary nodes delimit the mesh
+        if boundary_points.shape[0] == 0:
+            return None
+        (x_min, y_min), (x_max, y_max) = boundary_points.min(axis=0).tolist(), boundary_points.max(axis=0).tolist()
+        margin = max(x_max - x_min, y_max - y_min) + 1
+        best = None, None, Mesh2D.INFINITY, None
+        for x_start, y_start in ((x_min - margin, y), (x_max + margin, y), (x, y_min - margin), (x, y_max + margin)):
+            elements, params = self._get_boundary_entries(x_start, y_start, x, y, -Mesh2D.INFINITY)
+            if elements.shape[0] == 0:  # never enters the mesh
+                return None
+            last = np.argmax(params)
+            distance = (1 - params[last]) * (abs(x - x_start) + abs(y - y_start))
+            if distance < best[2]:
+                best = int(elements[last]), float(params[last]), distance, (x_start, y_start)
+        element, param, _, (x_start, y_start) = best
+        return self._walk_segment(element, x_start, y_start, x, y, param=param)
+
+    def _walk_segment(self, element, x1, y1, x2, y2, pieces=None, param=0.0):
+        """!
+        @brief Walk along a segment from the element containing its first point (or the point at the given parameter)
+        @param element <int>: element containing the first point (None if outside the mesh)
+        @param pieces <list>: the (element, start parameter, end parameter) of the pieces inside elements are appended
+        @param param <float>: parameter where the walk starts
+        @return <int>: the element containing the last point (None if outside the mesh)
+        """
+        neighbours = self.get_neighbours()
+        after_param = -Mesh2D.CLIP_EPSILON
+        while True:
+            if element is None:  # outside the mesh
+                element, param = self._find_boundary_entry(x1, y1, x2, y2, after_param)
+                if element is None:
+                    return None
+            element, exit_param, exit_vertex = self._walk_step(element, x1, y1, x2, y2, param)
+            if element is None:  # the segment leaves the mesh and may come back
+                after_param = param + Mesh2D.CLIP_EPSILON
+                continue
+            start_param, end_param = max(param, 0), min(exit_param, 1)
+            if pieces is not None and end_param - start_param > Mesh2D.CLIP_EPSILON:
+                pieces.append((element, start_param, end_param))
+            if exit_param >= 1 - Mesh2D.CLIP_EPSILON:
+                return element
+            param = exit_param
+            next_element = int(neighbours[element, (exit_vertex + 1) % 3])  # across the edge opposite exit vertex
+            if next_element >= 0:
+                element = next_element
+
+    def _walk_step(self, element, x1, y1, x2, y2, param):
+        """!
+        @brief Find the element crossed by a segment after the given parameter
+        The element given contains the point at this parameter. If the point is on one of its nodes, the candidates
+        are the elements around the node, and if the segment goes along one of its edges, the candidates are the two
+        elements sharing the edge (the element of smallest index is kept if several ones cross the segment on the
+        same length, as in `clip_polyline`). Otherwise, if the segment does not cross the element, the point is on
+        one of its edges and the candidate is the neighbour across it.
+        @return <int, float, int>: the element (None if the segment leaves the mesh at this point), the parameter
+            where the segment exits it and the vertex opposite to the exit edge
+        """
+        entry_param, exit_param, exit_vertex, first, delta = self._clip_segment(element, x1, y1, x2, y2)
+        on_edges = [vertex for vertex in range(3) if abs(first[vertex] + param * delta[vertex]) < Mesh2D.CLIP_EPSILON]
+        if len(on_edges) == 2:  # on the node which is not on both edges
+            starts, node_elements = self.get_node_elements()
+            node = self.ikle[element, 3 - sum(on_edges)]
+            candidates = node_elements[starts[node]:starts[node + 1]].tolist()
+        elif len(on_edges) == 1 and delta[on_edges[0]] == 0:  # along an edge: the element or its neighbour
+            candidates = sorted([element, int(self.get_neighbours()[element, (on_edges[0] + 1) % 3])])
+        elif entry_param <= param + Mesh2D.CLIP_EPSILON < exit_param:
+            return element, exit_param, exit_vertex
+        elif len(on_edges) == 1:
+            candidates = [int(self.get_neighbours()[element, (on_edges[0] + 1) % 3])]
+        else:
+            candidates = []
+
+        best = None, -Mesh2D.INFINITY, -1
+        for candidate in candidates:
+            if candidate < 0:
+                continue
+            entry_param, exit_param, exit_vertex, _, _ = self._clip_segment(candidate, x1, y1, x2, y2)
+            if entry_param <= param + Mesh2D.CLIP_EPSILON < exit_param \
+                    and exit_param > best[1] + Mesh2D.CLIP_EPSILON:
+                best = candidate, exit_param, exit_vertex
+        return best
+
+    def _clip_segment(self, element, x1, y1, x2, y2):
+        """!
+        @brief Clip the line of a segment by a single triangle (computations of `_get_clip_bounds` on Python floats)
+        @return <float, float, int, tuple, tuple>: the entry and exit parameters (the entry is after the exit if the
+            line does not cross the triangle, they are infinite if the line does not cross an edge), the vertex
+            opposite to the exit edge, the barycentric coordinates of the segment start and their variation along it
+        """
+        (a, b), (c, d) = self.triangles.inverse_matrices[element].tolist()
+        x0, y0 = self.points[self.ikle[element, 0]].tolist()
+        first_2, first_3 = a * (x1 - x0) + b * (y1 - y0), c * (x1 - x0) + d * (y1 - y0)
+        last_2, last_3 = a * (x2 - x0) + b * (y2 - y0), c * (x2 - x0) + d * (y2 - y0)
+
+        first = [1 - first_2 - first_3, first_2, first_3]
+        delta = [0, 0, 0]
+        entry_param, exit_param, exit_vertex = -Mesh2D.INFINITY, Mesh2D.INFINITY, -1
+        for vertex, last_coord in enumerate((1 - last_2 - last_3, last_2, last_3)):
+            if abs(first[vertex]) < Mesh2D.CLIP_EPSILON:
+                first[vertex] = 0
+            if abs(last_coord) < Mesh2D.CLIP_EPSILON:
+                last_coord = 0
+            delta[vertex] = last_coord - first[vertex]
+            if delta[vertex] > 0:
+                entry_param = max(entry_param, -first[vertex] / delta[vertex])
+            elif delta[vertex] < 0:
+                if -first[vertex] / delta[vertex] < exit_param:
+                    exit_param, exit_vertex = -first[vertex] / delta[vertex], vertex
+            elif first[vertex] < 0:  # parallel to and outside of an edge
+                entry_param = Mesh2D.INFINITY
+        return entry_param, exit_param, exit_vertex, first, delta
+
+    def _find_boundary_entry(self, x1, y1, x2, y2, after_param):
+        """!
+        @brief Find where a segment enters the mesh after the given parameter
+        @return <int, float>: the boundary element and the parameter of the entry point (None, None if the segment
+            does not enter the mesh again)
+        """
+        elements, params = self._get_boundary_entries(x1, y1, x2, y2, after_param)
+        if elements.shape[0] == 0:
+            return None, None
+        entry = np.argmin(params)
+        return int(elements[entry]), float(params[entry])
+
+    def _get_boundary_edges(self):
+        """!
+        @brief Build (only once) the boundary edges
+        @return <numpy.1D-array, numpy.2D-array, numpy.2D-array>: the boundary elements, the coordinates of the first
+            point and the vector of their boundary edge
+        """
+        if self._boundary_edges is None:
+            boundary_elements, boundary_edges = np.nonzero(self.get_neighbours() < 0)
+            edge_starts = self.points[self.ikle[boundary_elements, boundary_edges]]
+            edge_ends = self.points[self.ikle[boundary_elements, (boundary_edges + 1) % 3]]
+            self._boundary_edges = boundary_elements, edge_starts, edge_ends - edge_starts
+        return self._boundary_edges
+
+    def _get_boundary_entries(self, x1, y1, x2, y2, after_param):
+        """!
+        @brief Find the boundary edges crossed by the line of a segment after the given parameter and before its end
+        Boundary edges along the line are entered at their first point (or at the given parameter if it is on them).
+        @return <numpy.1D-array, numpy.1D-array>: the boundary elements and the parameters of the crossing points
+        """
+        boundary_elements, edge_starts, edge_vectors = self._get_boundary_edges()
+
+        dx, dy = x2 - x1, y2 - y1
+        offsets = edge_starts - [x1, y1]
+        det = dx * edge_vectors[:, 1] - dy * edge_vectors[:, 0]
+        cross = offsets[:, 0] * dy - offsets[:, 1] * dx
+        with np.errstate(divide='ignore', invalid='ignore'):
+            params = (offsets[:, 0] * edge_vectors[:, 1] - offsets[:, 1] * edge_vectors[:, 0]) / det
+            edge_params = cross / det
+        is_crossing = (det != 0) & (edge_params >= -Mesh2D.CLIP_EPSILON) & (edge_params <= 1 + Mesh2D.CLIP_EPSILON) \
+            & (params > after_param)
+
+        # boundary edges along the line
+        length_2 = dx * dx + dy * dy
+        is_along = (det == 0) & (np.abs(cross) <= Mesh2D.CLIP_EPSILON * length_2)
+        start_params = (offsets[:, 0] * dx + offsets[:, 1] * dy) / length_2
+        end_params = start_params + (edge_vectors[:, 0] * dx + edge_vectors[:, 1] * dy) / length_2
+        is_along &= np.maximum(start_params, end_params) > after_param + Mesh2D.CLIP_EPSILON
+        params = np.where(is_along, np.maximum(np.minimum(start_params, end_params), after_param), params)
+
+        is_entering = (is_crossing | is_along) & (params <= 1)
+        return boundary_elements[is_entering], params[is_entering]
+
+    @staticmethod
+    def are_pieces_continuous(segments, parameters):
+        """!
+        @brief Check if every piece of a clipped polyline starts where the previous one ends (see `clip_polyline`)
+        @return <numpy.1D-array>: for every pair of consecutive pieces, True if they are connected
+        """
+        same_segment = segments[1:] == segments[:-1]
+        return np.where(same_segment, np.abs(parameters[1:, 0] - parameters[:-1, 1]) <= Mesh2D.CLIP_EPSILON,
+                        (segments[1:] == segments[:-1] + 1) & (parameters[:-1, 1] >= 1 - Mesh2D.CLIP_EPSILON)
+                        & (parameters[1:, 0] <= Mesh2D.CLIP_EPSILON))
@@ -2,15 +2,24 @@
 Simple computation/evaluation of variable values in Serafin
 """
 
+import copy
+from multiprocessing import Pool
 import numpy as np
 import re
+import scipy.sparse
 import shapefile
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
 from pyteltools.conf import settings
 
 from . import Serafin
 from .util import logger
-from .variables import do_calculation, get_available_variables, get_necessary_equations
+from .variables import do_calculation, get_available_variables, get_necessary_equations, get_variables_to_read, \
+    VariableCalculationPlan
 
 
 # constants
@@ -206,12 +215,26 @@ def is_valid_postfix(expression):
         return False
 
 
-def evaluate_expression(input_stream, time_index, expression):
+def get_expression_variables(expression):
+    """!
+    @brief Get the variables used in a postfix expression
+    @param expression <list>: the expression in postfix format
+    @return <[str]>: the variable IDs (without duplicates)
+    """
+    var_IDs = []
+    for symbol in expression:
+        if symbol not in OPERATORS and symbol[0] == '[' and symbol[1:-1] not in var_IDs:
+            var_IDs.append(symbol[1:-1])
+    return var_IDs
+
+
+def evaluate_expression(input_stream, time_index, expression, values=None):
     """!
     @brief Evaluate a postfix expression on the input stream for a single frame
     @param input_stream <slf.Serafin.Read>: the input Serafin
     @param time_index <int>: the index of the frame
     @param expression <list>: the expression to evaluate in postfix format
+    @param values <dict>: values of the variables already read in the frame (by variable ID)
     @return <numpy.1D-array>: the value of the expression
     """
     stack = []
@@ -227,7 +250,10 @@ def evaluate_expression(input_stream, time_index, expression):
                 stack.append(OPERATIONS[symbol](first_operand, second_operand))
         else:
             if symbol[0] == '[':  # variable ID
-                stack.append(input_stream.read_var_in_frame(time_index, symbol[1:-1]))
+                if values is not None and symbol[1:-1] in values:
+                    stack.append(values[symbol[1:-1]])
+                else:
+                    stack.append(input_stream.read_var_in_frame(time_index, symbol[1:-1]))
             else:  # constant
                 stack.append(float(symbol))
 
@@ -562,6 +588,50 @@ def slf_to_vtk_3d(slf_name, slf_header, vtk_name, scalars, vectors, variable_nam
                 output_stream.write('\n')
 
 
+def _run_on_time_chunk(calculator, filename, language, header, time, time_indices):
+    """!
+    @brief Run a temporal reduction on a subset of frames (worker of `run_on_time_chunks`)
+    @return <dict or numpy.ndarray>: the partial result of the reduction (`current_values` of the calculator)
+    """
+    with Serafin.Read(filename, language) as input_stream:
+        input_stream.header = header
+        input_stream.time = time
+        calculator.input_stream = input_stream
+        calculator.time_indices = time_indices
+        calculator.run()
+    return calculator.current_values
+
+
+def run_on_time_chunks(calculator, chunks, ncsize):
+    """!
+    @brief Run a temporal reduction in parallel: each process opens its own input stream and reduces a chunk of frames
+    @param calculator <object>: calculator with attributes `input_stream`, `time_indices` and `current_values`
+        and a method `run`
+    @param chunks <[[int]]>: time indices of each chunk of frames
+    @param ncsize <int>: number of processes
+    @return <list>: partial results of the chunks (in the same order as `chunks`)
+    """
+    input_stream = calculator.input_stream
+    chunk_calculator = copy.copy(calculator)
+    chunk_calculator.input_stream = None  # an open file can not be sent to another process
+    tasks = [(chunk_calculator, input_stream.filename, input_stream.language, input_stream.header, input_stream.time,
+              chunk) for chunk in chunks]
+    logger.debug('Running the reduction on %i chunks of frames with %i processes' % (len(chunks), ncsize))
+    with Pool(min(ncsize, len(chunks))) as pool:
+        return pool.starmap(_run_on_time_chunk, tasks)
+
+
+def split_time_indices(time_indices, nb_chunks):
+    """!
+    @brief Split time indices into chunks of consecutive frames (of similar sizes)
+    @param time_indices <[int]>: the indices of the frames
+    @param nb_chunks <int>: maximum number of chunks
+    @return <[[int]]>: non empty chunks of time indices
+    """
+    nb_chunks = max(1, min(nb_chunks, len(time_indices)))
+    return [chunk.tolist() for chunk in np.array_split(np.asarray(time_indices, dtype=np.int64), nb_chunks)]
+
+
 class ScalarMaxMinMeanCalculator:
     """!
     Compute max/min/mean of 2D scalar variables from a Serafin input stream
@@ -575,40 +645,34 @@ class ScalarMaxMinMeanCalculator:
         self.nb_var = len(selected_scalars)
         self.nb_nodes = input_stream.header.nb_nodes
         self.additional_equations = additional_equations
-
+        self.read_var_IDs = get_variables_to_read([] if additional_equations is None else additional_equations,
+                                                  [var for var, _, _ in selected_scalars])
+        # static variables (and additional variables depending only on them) are read and computed only once
+        self.plan = VariableCalculationPlan([] if additional_equations is None else additional_equations,
+                                            [var for var, _, _ in selected_scalars], np.float64, is_2d=False,
+                                            us_equation=None,
+                                            static_var_IDs=input_stream.get_static_var_IDs(self.read_var_IDs))
+        self.current_values = self.initial_values()
+
+    def initial_values(self):
+        """!
+        @brief Neutral values of the reduction (before any frame)
+        @return <numpy.ndarray>: values with shape (number of variables, number of nodes)
+        """
         if self.maxmin == MAX:
-            self.current_values = np.ones((self.nb_var, self.nb_nodes)) * (-float('Inf'))
+            return np.ones((self.nb_var, self.nb_nodes)) * (-float('Inf'))
         elif self.maxmin == MIN:
-            self.current_values = np.ones((self.nb_var, self.nb_nodes)) * float('Inf')
-        else:
-            self.current_values = np.zeros((self.nb_var, self.nb_nodes))
-
-    def additional_computation_in_frame(self, time_index):
-        computed_values = {}
-        for equation in self.additional_equations:
-            input_var_IDs = list(map(lambda x: x.ID(), equation.input))
-
-            # read (if needed) input variables values
-            for input_var_ID in input_var_IDs:
-                if input_var_ID not in computed_values:
-                    computed_values[input_var_ID] = self.input_stream.read_var_in_frame(time_index, input_var_ID)
-            # compute additional variables
-            output_values = do_calculation(equation, [computed_values[var_ID] for var_ID in input_var_IDs])
-            computed_values[equation.output.ID()] = output_values
-        return computed_values
+            return np.ones((self.nb_var, self.nb_nodes)) * float('Inf')
+        return np.zeros((self.nb_var, self.nb_nodes))
 
     def max_min_mean_in_frame(self, time_index):
-        if self.additional_equations is not None:
-            computed_values = self.additional_computation_in_frame(time_index)
-        else:
-            computed_values = {}
-
-        values = np.empty((self.nb_var, self.nb_nodes))
-        for i, (var, _, _) in enumerate(self.selected_scalars):
-            if var not in computed_values:
-                computed_values[var] = self.input_stream.read_var_in_frame(time_index, var)
-            values[i, :] = computed_values[var]
+        self.update(self.plan.compute_in_frame(self.input_stream, time_index))
 
+    def update(self, values):
+        """!
+        @brief Update the current values with the values of a frame or with a partial result
+        @param values <numpy.ndarray>: values with shape (number of variables, number of nodes)
+        """
         with np.errstate(invalid='ignore'):
             if self.maxmin == MAX:
                 self.current_values = np.maximum(self.current_values, values)
@@ -622,7 +686,18 @@ class ScalarMaxMinMeanCalculator:
             self.current_values /= len(self.time_indices)
         return self.current_values
 
-    def run(self):
+    def run(self, ncsize=1):
+        """!
+        @param ncsize <int>: number of processes (frames are split in chunks if greater than 1)
+        """
+        if ncsize > 1 and len(self.time_indices) > 1:
+            # the chunks start from the neutral values, otherwise the current sums would be counted again by the mean
+            current_values, self.current_values = self.current_values, self.initial_values()
+            partial_results = run_on_time_chunks(self, split_time_indices(self.time_indices, ncsize), ncsize)
+            self.current_values = current_values
+            for partial_values in partial_results:
+                self.update(partial_values)
+            return
         for time_index in self.time_indices:
             self.max_min_mean_in_frame(time_index)
 
@@ -742,28 +817,38 @@ class VectorMaxMinMeanCalculator:
         self.additional_equations = additional_equations
 
         self.nb_nodes = input_stream.header.nb_nodes
-
-        self.current_values = {}
+        selected_IDs = []
         for var, _, _ in selected_vectors:
+            selected_IDs.append(var)
+            if self.maxmin != MEAN:
+                selected_IDs.append(_VECTORS_2D[var][1])
+        self.read_var_IDs = get_variables_to_read(additional_equations, selected_IDs)
+        self.current_values = self.initial_values()
+
+    def initial_values(self):
+        """!
+        @brief Neutral values of the reduction (before any frame)
+        @return <dict>: values of the vectors components (and of their magnitude for max/min) by variable ID
+        """
+        values = {}
+        for var, _, _ in self.selected_vectors:
             mother = _VECTORS_2D[var][1]
             if self.maxmin == MAX:
-                self.current_values[var] = np.ones((self.nb_nodes,)) * (-float('Inf'))
-                self.current_values[mother] = np.ones((self.nb_nodes,)) * (-float('Inf'))
+                values[var] = np.ones((self.nb_nodes,)) * (-float('Inf'))
+                values[mother] = np.ones((self.nb_nodes,)) * (-float('Inf'))
             elif self.maxmin == MIN:
-                self.current_values[var] = np.ones((self.nb_nodes,)) * float('Inf')
-                self.current_values[mother] = np.ones((self.nb_nodes,)) * float('Inf')
+                values[var] = np.ones((self.nb_nodes,)) * float('Inf')
+                values[mother] = np.ones((self.nb_nodes,)) * float('Inf')
             else:
-                self.current_values[var] = np.zeros((self.nb_nodes,))
+                values[var] = np.zeros((self.nb_nodes,))
+        return values
 
     def additional_computation_in_frame(self, time_index):
-        computed_values = {}
+        # read all necessary variables values at once
+        computed_values = dict(zip(self.read_var_IDs, self.input_stream.read_frame(time_index, self.read_var_IDs)))
         for equation in self.additional_equations:
             input_var_IDs = list(map(lambda x: x.ID(), equation.input))
 
-            # read (if needed) input variables values
-            for input_var_ID in input_var_IDs:
-                if input_var_ID not in computed_values:
-                    computed_values[input_var_ID] = self.input_stream.read_var_in_frame(time_index, input_var_ID)
             # compute additional variables
             output_values = do_calculation(equation, [computed_values[var_ID] for var_ID in input_var_IDs])
             computed_values[equation.output.ID()] = output_values
@@ -772,25 +857,29 @@ class VectorMaxMinMeanCalculator:
     def max_min_mean_in_frame(self, time_index):
         computed_values = self.additional_computation_in_frame(time_index)
 
+        self.update(computed_values)
+
+    def update(self, values):
+        """!
+        @brief Update the current values with the values of a frame or with a partial result
+        @param values <dict>: values of the vectors components (and of their magnitude for max/min) by variable ID
+        """
         if self.maxmin == MEAN:
             for var, _, _ in self.selected_vectors:
-                self.current_values[var] += computed_values[var]
+                self.current_values[var] += values[var]
             return
 
+        flags = {}
         for var, _, _ in self.selected_vectors:
             mother = _VECTORS_2D[var][1]
-
-            if mother not in computed_values:
-                computed_values[mother] = self.input_stream.read_var_in_frame(time_index, mother)
-            if var not in computed_values:
-                computed_values[var] = self.input_stream.read_var_in_frame(time_index, var)
-
-            if self.maxmin == MAX:
-                self.current_values[var] = np.where(computed_values[mother] > self.current_values[mother],
-                                                    computed_values[var], self.current_values[var])
-            else:
-                self.current_values[var] = np.where(computed_values[mother] < self.current_values[mother],
-                                                    computed_values[var], self.current_values[var])
+            if mother not in flags:
+                if self.maxmin == MAX:
+                    flags[mother] = values[mother] > self.current_values[mother]
+                else:
+                    flags[mother] = values[mother] < self.current_values[mother]
+            self.current_values[var] = np.where(flags[mother], values[var], self.current_values[var])
+        for mother, mother_flags in flags.items():
+            self.current_values[mother] = np.where(mother_flags, values[mother], self.current_values[mother])
 
     def finishing_up(self):
         values = np.empty((len(self.selected_vectors), self.nb_nodes))
@@ -801,60 +890,453 @@ class VectorMaxMinMeanCalculator:
             values /= len(self.time_indices)
         return values
 
-    def run(self):
+    def run(self, ncsize=1):
+        """!
+        @param ncsize <int>: number of processes (frames are split in chunks if greater than 1)
+        """
+        if ncsize > 1 and len(self.time_indices) > 1:
+            # the chunks start from the neutral values, otherwise the current sums would be counted again by the mean
+            current_values, self.current_values = self.current_values, self.initial_values()
+            partial_results = run_on_time_chunks(self, split_time_indices(self.time_indices, ncsize), ncsize)
+            self.current_values = current_values
+            for partial_values in partial_results:
+                self.update(partial_values)
+            return
         for time_index in self.time_indices:
             self.max_min_mean_in_frame(time_index)
 
 
-class ArrivalDurationCalculator:
+class P2QuantileEstimator:
     """!
-    Compute arrival/duration of conditions from a Serafin input stream
+    Streaming estimation of a quantile for many values at once with the P-square algorithm
+    (Jain & Chlamtac, 1985): only 5 markers are stored for each value, whatever the number of observations
     """
-    def __init__(self, input_stream, time_indices, condition):
+    def __init__(self, quantile, shape):
+        """!
+        @param quantile <float>: quantile to estimate (in [0, 1])
+        @param shape <tuple>: shape of the observations
+        """
+        self.quantile = quantile
+        self.nb_observations = 0
+        self.heights = np.empty((5,) + tuple(shape))  # marker heights (first observations before initialization)
+        self.positions = np.tile(np.arange(1.0, 6.0).reshape((5,) + (1,) * len(shape)), (1,) + tuple(shape))
+        self.desired_positions = np.array([1, 1 + 2 * quantile, 1 + 4 * quantile, 3 + 2 * quantile, 5])
+        self.increments = np.array([0, quantile / 2, quantile, (1 + quantile) / 2, 1])
+
+    def add(self, values):
+        """!
+        @brief Add a new observation
+        @param values <numpy.ndarray>: observed values (with the estimator shape)
+        """
+        self.nb_observations += 1
+        if self.nb_observations <= 5:
+            self.heights[self.nb_observations - 1] = values
+            if self.nb_observations == 5:
+                self.heights.sort(axis=0)
+            return
+
+        q, n = self.heights, self.positions
+        # find the cell containing the observation and update extreme markers
+        k = (values >= q[1]).astype(int) + (values >= q[2]) + (values >= q[3])
+        q[0] = np.minimum(q[0], values)
+        q[4] = np.maximum(q[4], values)
+        for i in range(1, 5):
+            n[i] += k < i
+        self.desired_positions += self.increments
+
+        # adjust the heights of the middle markers
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for i in range(1, 4):
+                d = self.desired_positions[i] - n[i]
+                move_up = np.logical_and(d >= 1, n[i + 1] - n[i] > 1)
+                move_down = np.logical_and(d <= -1, n[i - 1] - n[i] < -1)
+                move = np.logical_or(move_up, move_down)
+                if not move.any():
+                    continue
+                d = np.where(move_up, 1.0, -1.0)
+                parabolic = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+                    (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                q_next = np.where(move_up, q[i + 1], q[i - 1])
+                n_next = np.where(move_up, n[i + 1], n[i - 1])
+                linear = q[i] + d * (q_next - q[i]) / (n_next - n[i])
+                is_parabolic = np.logical_and(q[i - 1] < parabolic, parabolic < q[i + 1])
+                q[i] = np.where(move, np.where(is_parabolic, parabolic, linear), q[i])
+                n[i] += np.where(move, d, 0)
+
+    def result(self):
+        """!
+        @brief Get the estimated quantile (exact if there are at most 5 observations)
+        @return <numpy.ndarray>: estimated quantile values
+        """
+        if self.nb_observations == 0:
+            return np.full(self.heights.shape[1:], np.nan)
+        if self.nb_observations < 5:
+            return np.percentile(self.heights[:self.nb_observations], 100 * self.quantile, axis=0)
+        if self.nb_observations == 5:
+            return np.percentile(self.heights, 100 * self.quantile, axis=0)
+        return self.heights[2].copy()
+
+
+class StatisticsCalculator:
+    """!
+    Compute several statistics of 2D scalar variables in a single pass over the frames
+    """
+    STATISTICS = ('max', 'min', 'mean', 'std', 'var', 'tmax', 'tmin', 'count')
+
+    def __init__(self, input_stream, selected_scalars, time_indices, statistics, threshold=None, percentiles=(),
+                 additional_equations=None):
+        """!
+        @param input_stream <slf.Serafin.Read>: the input Serafin
+        @param selected_scalars <[(str, bytes, bytes)]>: ID, name and unit of the selected variables
+        @param time_indices <[int]>: the indices of the frames
+        @param statistics <[str]>: statistics to compute (among `STATISTICS`)
+        @param threshold <float>: threshold for statistic 'count' (number of frames strictly above it)
+        @param percentiles <[float]>: percentiles to estimate (in [0, 100])
+        @param additional_equations <[slf.variables_utils.Equation]>: equations to compute selected variables
+        """
+        for statistic in statistics:
+            if statistic not in StatisticsCalculator.STATISTICS:
+                raise ValueError('Statistic %s is unknown (expected one of %s)'
+                                 % (statistic, ', '.join(StatisticsCalculator.STATISTICS)))
+        if 'count' in statistics and threshold is None:
+            raise ValueError('A threshold is required to count values above it')
+        for percentile in percentiles:
+            if not 0 <= percentile <= 100:
+                raise ValueError('Percentile %g is not in [0, 100]' % percentile)
+        self.input_stream = input_stream
+        self.selected_scalars = selected_scalars
+        self.time_indices = time_indices
+        self.statistics = statistics
+        self.threshold = threshold
+        self.percentiles = percentiles
+        self.additional_equations = [] if additional_equations is None else additional_equations
+
+        self.nb_var = len(selected_scalars)
+        self.nb_nodes = input_stream.header.nb_nodes
+        self.read_var_IDs = get_variables_to_read(self.additional_equations, [var for var, _, _ in selected_scalars])
+
+        shape = (self.nb_var, self.nb_nodes)
+        self.nb_frames = 0
+        self.max = np.full(shape, -float('Inf'))
+        self.min = np.full(shape, float('Inf'))
+        self.time_of_max = np.zeros(shape)
+        self.time_of_min = np.zeros(shape)
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)  # sum of squared differences to the mean (Welford algorithm)
+        self.count = np.zeros(shape)
+        self.quantiles = [P2QuantileEstimator(percentile / 100, shape) for percentile in percentiles]
+
+    def output_variables(self):
+        """!
+        @brief Get the output variables (in the order of `finishing_up` values)
+        Names are truncated to 16 characters, and a numbered suffix is used if a truncated name is already taken
+        @return <[(str, str, str)]>: ID, name and unit of the output variables
+        """
+        used_names = set()
+
+        def unique_name(name):
+            new_name, i = name[:16], 1
+            while new_name in used_names:
+                suffix = '~%i' % i
+                new_name, i = name[:16 - len(suffix)] + suffix, i + 1
+            used_names.add(new_name)
+            return new_name
+
+        variables = []
+        for var, _, var_unit in self.selected_scalars:
+            unit = var_unit.decode(Serafin.SLF_EIT).strip() if isinstance(var_unit, bytes) else var_unit
+            for statistic in self.statistics:
+                if statistic in ('tmax', 'tmin'):
+                    stat_unit = 'S'
+                elif statistic == 'count':
+                    stat_unit = ''
+                elif statistic == 'var':
+                    stat_unit = '(%s)2' % unit if unit else ''
+                else:
+                    stat_unit = unit
+                variables.append(('', unique_name('%s %s' % (statistic.upper(), var)), stat_unit[:16]))
+            for percentile in self.percentiles:
+                variables.append(('', unique_name('P%g %s' % (percentile, var)), unit[:16]))
+        return variables
+
+    def read_values_in_frame(self, time_index, values=None):
+        """!
+        @brief Compute the values of the selected variables in a frame
+        @param time_index <int>: the index of the frame
+        @param values <numpy.ndarray>: values of the variables to read (`read_var_IDs`), read if not given
+        @return <numpy.ndarray>: values with shape (number of variables, number of nodes)
+        """
+        if values is None:
+            values = self.input_stream.read_frame(time_index, self.read_var_IDs)
+        computed_values = dict(zip(self.read_var_IDs, values))
+        for equation in self.additional_equations:
+            input_var_IDs = list(map(lambda x: x.ID(), equation.input))
+            computed_values[equation.output.ID()] = do_calculation(equation, [computed_values[var_ID]
+                                                                              for var_ID in input_var_IDs])
+        scalar_values = np.empty((self.nb_var, self.nb_nodes))
+        for i, (var, _, _) in enumerate(self.selected_scalars):
+            scalar_values[i, :] = computed_values[var]
+        return scalar_values
+
+    def statistics_in_frame(self, time_index, values=None):
+        """!
+        @brief Update all statistics with a frame
+        @param time_index <int>: the index of the frame
+        @param values <numpy.ndarray>: values of the variables to read (`read_var_IDs`), read if not given
+        """
+        values = self.read_values_in_frame(time_index, values)
+        time = self.input_stream.time[time_index]
+        self.nb_frames += 1
+
+        with np.errstate(invalid='ignore'):
+            is_max = values > self.max
+            self.max = np.where(is_max, values, self.max)
+            self.time_of_max = np.where(is_max, time, self.time_of_max)
+            is_min = values < self.min
+            self.min = np.where(is_min, values, self.min)
+            self.time_of_min = np.where(is_min, time, self.time_of_min)
+            if self.threshold is not None:
+                self.count += values > self.threshold
+
+        delta = values - self.mean
+        self.mean += delta / self.nb_frames
+        self.m2 += delta * (values - self.mean)
+
+        for quantile in self.quantiles:
+            quantile.add(values)
+
+    def finishing_up(self):
+        """!
+        @brief Get the values of the statistics (see `output_variables` for their order)
+        @return <numpy.ndarray>: values with shape (number of output variables, number of nodes)
+        """
+        variance = self.m2 / self.nb_frames if self.nb_frames > 0 else np.full(self.m2.shape, np.nan)
+        results = {'max': self.max, 'min': self.min, 'mean': self.mean, 'std': np.sqrt(variance),
+                   'var': variance, 'tmax': self.time_of_max, 'tmin': self.time_of_min, 'count': self.count}
+        percentiles = [quantile.result() for quantile in self.quantiles]
+
+        values = []
+        for i in range(self.nb_var):
+            for statistic in self.statistics:
+                values.append(results[statistic][i])
+            for percentile_values in percentiles:
+                values.append(percentile_values[i])
+        return np.array(values).reshape(-1, self.nb_nodes)
+
+    def run(self):
+        for time_index, values in self.input_stream.iter_frames(self.time_indices, self.read_var_IDs):
+            self.statistics_in_frame(time_index, values)
+
+
+def _arrival_duration_kernel(previous_value, current_value, current_time, single_times, comparators, thresholds,
+                             is_last, previous_flags, current_flags, arrivals, durations, previous_flips):
+    """!
+    @brief Update in place arrival and duration of several thresholds on the same expression (one row by threshold)
+    Interpolated times are computed in the precision of the values (`single_times`), as in the NumPy implementation
+    """
+    previous_single_time, current_single_time = single_times
+    for k in range(thresholds.shape[0]):
+        comparator, threshold = comparators[k], thresholds[k]
+        for j in range(current_value.shape[0]):
+            current = current_value[j]
+            if comparator == 0:
+                flag = current > threshold
+            elif comparator == 1:
+                flag = current < threshold
+            elif comparator == 2:
+                flag = current >= threshold
+            else:
+                flag = current <= threshold
+            previous_flag = previous_flags[k, j]
+            current_flags[k, j] = flag
+            if previous_flag == flag and not (is_last and flag):
+                continue
+
+            previous = previous_value[j]
+            t_star = (current * previous_single_time - previous * current_single_time) / (current - previous)
+            if previous_flag:
+                if flag:  # last frame
+                    durations[k, j] = durations[k, j] + current_time - previous_flips[k, j]
+                else:
+                    durations[k, j] = durations[k, j] + t_star - previous_flips[k, j]
+            else:
+                if arrivals[k, j] == arrivals[k, j] and not t_star >= arrivals[k, j]:  # as numpy.minimum (with NaN)
+                    arrivals[k, j] = t_star
+                previous_flips[k, j] = t_star
+
+
+if numba is not None:
+    _arrival_duration_kernel = numba.njit(nogil=True, error_model='numpy')(_arrival_duration_kernel)
+
+
+class ArrivalDurationMultiCalculator:
+    """!
+    Compute arrival/duration of several conditions from a Serafin input stream in a single pass on frames
+
+    The variables are read once per frame and the conditions on the same expression (e.g. different thresholds)
+    share the evaluation of the expression.
+    The arrivals and durations are updated in place, by a fused kernel compiled with numba (if it is installed)
+    or by NumPy operations restricted to the nodes where the conditions flip.
+    """
+    COMPARATOR_CODES = {'>': 0, '<': 1, '>=': 2}  # any other comparator is considered as '<=' (as in `Condition`)
+    COMPARATOR_FUNCTIONS = (np.greater, np.less, np.greater_equal, np.less_equal)
+
+    def __init__(self, input_stream, time_indices, conditions, first_values=None, use_numba=None):
+        """!
+        @param input_stream <slf.Serafin.Read>: the input Serafin
+        @param time_indices <[int]>: the indices of the frames
+        @param conditions <[Condition]>: the conditions
+        @param first_values <dict>: values of the variables already read in the first frame (by variable ID)
+        @param use_numba <bool>: use the numba kernel if numba is installed (default: `CALCULATOR_NUMBA`)
+        """
         self.input_stream = input_stream
         self.time_indices = time_indices
-        self.expression = condition.expression
-        self.test_condition = condition.test_condition
+        self.conditions = conditions
+        if use_numba is None:
+            use_numba = settings.CALCULATOR_NUMBA
+        self.use_numba = use_numba and numba is not None
+
+        # the conditions are grouped by expression: each group is a slice of rows in the state arrays
+        expressions = []
+        for condition in conditions:
+            if condition.expression not in expressions:
+                expressions.append(condition.expression)
+        order = sorted(range(len(conditions)), key=lambda i: expressions.index(conditions[i].expression))
+        self.rows = [order.index(i) for i in range(len(conditions))]
+        self.groups = []
+        start = 0
+        for expression in expressions:
+            end = start + sum(condition.expression == expression for condition in conditions)
+            self.groups.append((expression, start, end))
+            start = end
+        self.comparators = np.array([ArrivalDurationMultiCalculator.COMPARATOR_CODES.get(conditions[i].comparator, 3)
+                                     for i in order], dtype=np.int64)
+        self.thresholds = np.array([conditions[i].threshold for i in order], dtype=np.float64)
+        self.var_IDs = []
+        for expression in expressions:
+            self.var_IDs += [var_ID for var_ID in get_expression_variables(expression) if var_ID not in self.var_IDs]
 
         # first
+        nb_nodes = self.input_stream.header.nb_nodes
         self.previous_time = self.input_stream.time[self.time_indices[0]]
-        self.previous_value = evaluate_expression(self.input_stream, self.time_indices[0], self.expression)
-        self.previous_flag = self.test_condition(self.previous_value)
-
-        self.duration = np.zeros((self.input_stream.header.nb_nodes,))
-        self.arrival = np.where(self.previous_flag, self.previous_time, float('Inf'))
-        self.previous_flip = np.ones((input_stream.header.nb_nodes,)) * self.previous_time
+        if first_values is None:
+            first_values = self._read_values(self.time_indices[0])
+        self.previous_values = [evaluate_expression(self.input_stream, self.time_indices[0], expression, first_values)
+                                for expression, _, _ in self.groups]
+        self.previous_flags = np.empty((len(conditions), nb_nodes), dtype=bool)
+        for (_, start, end), previous_value in zip(self.groups, self.previous_values):
+            for row in range(start, end):
+                self._test_condition(row, previous_value, self.previous_flags[row])
+
+        self.durations = np.zeros((len(conditions), nb_nodes))
+        self.arrivals = np.where(self.previous_flags, self.previous_time, float('Inf'))
+        self.previous_flips = np.full((len(conditions), nb_nodes), self.previous_time)
+
+        # buffers reused for every frame
+        self.current_flags = np.empty_like(self.previous_flags)
+        self.flip_flags = np.empty_like(self.previous_flags)
+
+    def _read_values(self, index):
+        if not self.var_IDs:
+            return None
+        return dict(zip(self.var_IDs, self.input_stream.read_frame(index, self.var_IDs)))
+
+    def _test_condition(self, row, value, out):
+        comparator = ArrivalDurationMultiCalculator.COMPARATOR_FUNCTIONS[self.comparators[row]]
+        return comparator(value, float(self.thresholds[row]), out=out)  # compared as in `Condition`
+
+    def _update_group(self, start, end, previous_value, current_value, current_time, is_last):
+        """!
+        @brief NumPy implementation of `_arrival_duration_kernel` on preallocated buffers
+        The interpolated times are only computed on the nodes where the condition flips
+        """
+        nb_nodes = current_value.shape[0]
 
-    def arrival_duration_in_frame(self, index):
-        current_time = self.input_stream.time[index]
-        current_value = evaluate_expression(self.input_stream, index, self.expression)
-        with np.errstate(divide='ignore', invalid='ignore'):
-            t_star = (current_value * self.previous_time - self.previous_value * current_time) \
-                     / (current_value - self.previous_value)
-            new_arrival = np.minimum(self.arrival, t_star)
-
-        current_flag = self.test_condition(current_value)
-        flip_forward = np.logical_and(current_flag, np.logical_not(self.previous_flag))
-        flip_backward = np.logical_and(self.previous_flag, np.logical_not(current_flag))
-
-        if index == self.time_indices[-1]:  # last
-            self.duration = np.where(np.logical_and(self.previous_flag, current_flag),
-                                     self. duration + self.input_stream.time[index] - self.previous_flip,
-                                     np.where(self.previous_flag, self.duration + t_star - self.previous_flip,
-                                              self.duration))
+        def interpolated_time(nodes):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return (current_value[nodes] * self.previous_time - previous_value[nodes] * current_time) \
+                       / (current_value[nodes] - previous_value[nodes])
+
+        # the rows of the group are contiguous: flat views are used to update the flipped values
+        previous_flags, current_flags = self.previous_flags[start:end], self.current_flags[start:end]
+        flip_flags = self.flip_flags[start:end]
+        arrivals, durations = self.arrivals[start:end].reshape(-1), self.durations[start:end].reshape(-1)
+        previous_flips = self.previous_flips[start:end].reshape(-1)
+        for row in range(start, end):
+            self._test_condition(row, current_value, self.current_flags[row])
+
+        # durations are increased when the condition stops being satisfied (or in the last frame)
+        if is_last:
+            positions = np.flatnonzero(previous_flags)
+            end_times = np.where(current_flags.reshape(-1)[positions], current_time,
+                                 interpolated_time(positions % nb_nodes))
         else:
-            self.duration = np.where(flip_backward, self.duration + t_star - self.previous_flip, self.duration)
+            positions = np.flatnonzero(np.greater(previous_flags, current_flags, out=flip_flags))
+            end_times = interpolated_time(positions % nb_nodes)
+        durations[positions] = durations[positions] + end_times - previous_flips[positions]
 
-        self.arrival = np.where(flip_forward, new_arrival, self.arrival)
+        # arrivals and flip times are updated when the condition starts being satisfied
+        positions = np.flatnonzero(np.greater(current_flags, previous_flags, out=flip_flags))
+        t_star = interpolated_time(positions % nb_nodes)
+        with np.errstate(invalid='ignore'):
+            arrivals[positions] = np.minimum(arrivals[positions], t_star)
+        previous_flips[positions] = t_star
 
-        self.previous_flip = np.where(flip_forward, t_star, self.previous_flip)
-        self.previous_flag = current_flag
-        self.previous_value = current_value
+    def arrival_duration_in_frame(self, index, values=None):
+        """!
+        @brief Update the arrivals and durations with a frame
+        @param index <int>: the index of the frame
+        @param values <dict>: values of the variables already read in the frame (by variable ID)
+        """
+        current_time = self.input_stream.time[index]
+        is_last = index == self.time_indices[-1]
+        if values is None:
+            values = self._read_values(index)
+
+        for i, (expression, start, end) in enumerate(self.groups):
+            previous_value = self.previous_values[i]
+            current_value = evaluate_expression(self.input_stream, index, expression, values)
+            if self.use_numba:
+                single_times = np.array([self.previous_time, current_time], dtype=current_value.dtype)
+                _arrival_duration_kernel(previous_value, current_value, current_time, single_times,
+                                         self.comparators[start:end],
+                                         self.thresholds[start:end].astype(current_value.dtype), is_last,
+                                         self.previous_flags[start:end], self.current_flags[start:end],
+                                         self.arrivals[start:end], self.durations[start:end],
+                                         self.previous_flips[start:end])
+            else:
+                self._update_group(start, end, previous_value, current_value, current_time, is_last)
+            self.previous_values[i] = current_value
+
+        self.previous_flags, self.current_flags = self.current_flags, self.previous_flags
         self.previous_time = current_time
 
     def run(self):
-        for index in self.time_indices[1:]:
-            self.arrival_duration_in_frame(index)
+        for index, values in self.input_stream.iter_frames(self.time_indices[1:], self.var_IDs):
+            self.arrival_duration_in_frame(index, dict(zip(self.var_IDs, values)))
+
+    def finishing_up(self):
+        """!
+        @brief Get the arrival and the duration of every condition
+        @return <numpy.ndarray>: values with shape (2 * number of conditions, number of nodes)
+        """
+        values = np.empty((2 * len(self.conditions), self.input_stream.header.nb_nodes))
+        values[0::2] = self.arrivals[self.rows]
+        values[1::2] = self.durations[self.rows]
+        return values
+
+
+class ArrivalDurationCalculator(ArrivalDurationMultiCalculator):
+    """!
+    Compute arrival/duration of a single condition from a Serafin input stream
+    """
+    def __init__(self, input_stream, time_indices, condition):
+        super().__init__(input_stream, time_indices, [condition])
+        self.expression = condition.expression
+        self.test_condition = condition.test_condition
+        self.arrival = self.arrivals[0]
+        self.duration = self.durations[0]
 
 
 class Condition:
@@ -905,49 +1387,62 @@ class ProjectMeshCalculator:
 
         self.nb_var = len(self.selected_vars)
         self.nb_nodes = self.first_in.header.nb_nodes
+        self.operator, self.is_outside = self.build_projection_operator(is_inside, point_interpolators,
+                                                                        self.nb_nodes, self.second_in.header.nb_nodes)
+
+    @staticmethod
+    def build_projection_operator(is_inside, point_interpolators, nb_nodes, nb_nodes_second):
+        """!
+        @brief Assemble the projection of the second mesh onto the nodes of the first mesh as a sparse matrix
+        @param is_inside <[bool]>: whether each node of the first mesh is inside the second mesh
+        @param point_interpolators <[tuple]>: ((i, j, k), barycentric coordinates) of each node inside the second mesh
+        @param nb_nodes <int>: number of nodes of the first mesh
+        @param nb_nodes_second <int>: number of nodes of the second mesh
+        @return <scipy.sparse.csr_matrix, numpy.1D-array>: the projection operator [shape = (nb_nodes, nb_nodes_second)]
+            and the mask of the nodes outside the second mesh
+        """
+        is_outside = ~np.array(is_inside, dtype=bool)
+        inside_nodes = np.flatnonzero(~is_outside)
+        columns = np.array([point_interpolators[node][0] for node in inside_nodes], dtype=np.int64).reshape(-1, 3)
+        weights = np.array([point_interpolators[node][1] for node in inside_nodes], dtype=np.float64).reshape(-1, 3)
+        operator = scipy.sparse.csr_matrix((weights.ravel(), (np.repeat(inside_nodes, 3), columns.ravel())),
+                                           shape=(nb_nodes, nb_nodes_second))
+        return operator, is_outside
 
     def read_values_in_frame(self, time_index, read_second):
-        values = []
-        for var_ID in self.selected_vars:
-            if read_second:
-                values.append(self.second_in.read_var_in_frame(time_index, var_ID))
-            else:
-                values.append(self.first_in.read_var_in_frame(time_index, var_ID))
-        return values
+        if read_second:
+            return self.second_in.read_frame(time_index, self.selected_vars)
+        return self.first_in.read_frame(time_index, self.selected_vars)
 
     def interpolate(self, values):
-        interpolated_values = []
-        for index_node in range(self.nb_nodes):
-            if not self.is_inside[index_node]:
-                interpolated_values.append(np.nan)
-            else:
-                (i, j, k), interpolator = self.point_interpolators[index_node]
-                interpolated_values.append(interpolator.dot(values[[i, j, k]]))
+        """!
+        @brief Project values of the second mesh onto the first mesh (NaN outside the second mesh)
+        @param values <numpy.1D-array or numpy.2D-array>: values on the nodes of the second mesh
+            [shape = (nb_nodes_second,) or (nb_var, nb_nodes_second)]
+        @return <numpy.1D-array or numpy.2D-array>: values on the nodes of the first mesh
+        """
+        interpolated_values = self.operator.dot(np.asarray(values).T).T
+        interpolated_values[..., self.is_outside] = np.nan
         return interpolated_values
 
     def operation_in_frame(self, first_time_index, second_time_index):
+        second_values = self.interpolate(self.read_values_in_frame(second_time_index, True))
         if self.operation_type == PROJECT:  # projection
-            second_values = self.read_values_in_frame(second_time_index, True)
-            return np.array([self.interpolate(second_values[i]) for i in range(self.nb_var)])
+            return second_values
 
         if self.use_reference:
             first_values = self.first_values
         else:
-            first_values = np.array(self.read_values_in_frame(first_time_index, False))
-        second_values = self.read_values_in_frame(second_time_index, True)
+            first_values = self.read_values_in_frame(first_time_index, False)
 
         if self.operation_type == DIFF:
-            return np.array([first_values[i] - np.array(self.interpolate(second_values[i]))
-                             for i in range(self.nb_var)])
+            return first_values - second_values
         elif self.operation_type == REV_DIFF:
-            return np.array([np.array(self.interpolate(second_values[i])) - first_values[i]
-                             for i in range(self.nb_var)])
+            return second_values - first_values
         elif self.operation_type == MAX_BETWEEN:
-            return np.array([np.maximum(self.interpolate(second_values[i]), first_values[i])
-                             for i in range(self.nb_var)])
+            return np.maximum(second_values, first_values)
         else:
-            return np.array([np.minimum(self.interpolate(second_values[i]), first_values[i])
-                             for i in range(self.nb_var)])
+            return np.minimum(second_values, first_values)
 
     def run(self, out_stream, out_header):
         for first_time_index, second_time_index in self.time_indices:
@@ -974,19 +1469,18 @@ class SynchMaxCalculator:
         if ref_var not in selected_vars:
             self.read_ref = True
         self.nb_nodes = input_stream.header.nb_nodes
+        self.read_var_IDs = [var for var, _, _ in selected_vars]
+        if self.read_ref:
+            self.read_var_IDs.append(ref_var)
         self.current_values = {'time': np.ones((self.nb_nodes,)) * self.input_stream.time[time_indices[0]]}
+        self.current_values.update(self.read_values_in_frame(time_indices[0]))
 
-        for var, _, _ in selected_vars:
-            self.current_values[var] = self.input_stream.read_var_in_frame(time_indices[0], var)
-        if self.read_ref:
-            self.current_values[ref_var] = self.input_stream.read_var_in_frame(time_indices[0], ref_var)
+    def read_values_in_frame(self, time_index):
+        return dict(zip(self.read_var_IDs, self.input_stream.read_frame(time_index, self.read_var_IDs)))
 
-    def synch_max_in_frame(self, time_index):
-        values = {}
-        for var, _, _ in self.selected_vars:
-            values[var] = self.input_stream.read_var_in_frame(time_index, var)
-        if self.read_ref:
-            values[self.ref_var] = self.input_stream.read_var_in_frame(time_index, self.ref_var)
+    def synch_max_in_frame(self, time_index, values=None):
+        if values is None:
+            values = self.read_values_in_frame(time_index)
 
         flags = values[self.ref_var] > self.current_values[self.ref_var]
         for var, _, _ in self.selected_vars:
@@ -996,6 +1490,18 @@ class SynchMaxCalculator:
         time_value = self.input_stream.time[time_index]
         self.current_values['time'] = np.where(flags, time_value, self.current_values['time'])
 
+    def merge(self, partial_values):
+        """!
+        @brief Update the current values with the partial result of a chunk of frames (see `run`)
+        @param partial_values <dict>: current values of the calculator of the chunk
+        """
+        flags = partial_values[self.ref_var] > self.current_values[self.ref_var]
+        for var in self.current_values:
+            if var != self.ref_var:
+                self.current_values[var] = np.where(flags, partial_values[var], self.current_values[var])
+        self.current_values[self.ref_var] = np.where(flags, partial_values[self.ref_var],
+                                                     self.current_values[self.ref_var])
+
     def finishing_up(self):
         values = np.empty((len(self.selected_vars)+1, self.nb_nodes))
         values[0, :] = self.current_values['time']
@@ -1003,6 +1509,15 @@ class SynchMaxCalculator:
             values[i+1, :] = self.current_values[var]
         return values
 
-    def run(self):
-        for time_index in self.time_indices[1:]:
-            self.synch_max_in_frame(time_index)
+    def run(self, ncsize=1):
+        """!
+        @param ncsize <int>: number of processes (frames are split in chunks if greater than 1)
+        """
+        if ncsize > 1 and len(self.time_indices) > 2:
+            # every chunk starts from the values of the first frame
+            chunks = [[self.time_indices[0]] + chunk for chunk in split_time_indices(self.time_indices[1:], ncsize)]
+            for partial_values in run_on_time_chunks(self, chunks, ncsize):
+                self.merge(partial_values)
+            return
+        for time_index, values in self.input_stream.iter_frames(self.time_indices[1:], self.read_var_IDs):
+            self.synch_max_in_frame(time_index, dict(zip(self.read_var_IDs, values)))
@@ -23,8 +23,157 @@ def get_necessary_equations(known_var_IDs, needed_var_IDs, is_2d, us_equation=No
     return get_necessary_3d_equations(known_var_IDs, needed_var_IDs)
 
 
+def get_variables_to_read(equations, selected_output_IDs):
+    """!
+    @brief Return the IDs of the variables which have to be read to apply equations and get the selected variables
+    @param equations <[slf.variables_utils.Equation]>: list of all equations necessary to compute selected variables
+    @param selected_output_IDs <[str]>: the short names of the selected output variables
+    @return <[str]>: the IDs of the variables to read (without duplicates)
+    """
+    computed_IDs = set()
+    var_IDs = []
+    for equation in equations:
+        for input_var in equation.input:
+            var_ID = input_var.ID()
+            if var_ID not in computed_IDs and var_ID not in var_IDs and var_ID[:5] != 'ROUSE':
+                var_IDs.append(var_ID)
+        if equation.output.ID() == 'ROUSE':  # the output values are stored in the first input variable
+            computed_IDs.add(equation.input[0].ID())
+        computed_IDs.add(equation.output.ID())
+    for var_ID in selected_output_IDs:
+        if var_ID not in computed_IDs and var_ID not in var_IDs:
+            var_IDs.append(var_ID)
+    return var_IDs
+
+
+class VariableCalculationPlan:
+    """!
+    @brief Ordered execution plan of the equations necessary to compute the selected variables
+
+    The plan is compiled once (variables to read, operations and inputs of every step, intermediate values to free
+    after their last use) and is then applied on every frame.
+    Static variables (constant in time, see `Serafin.Read.get_static_var_IDs`) are read only once, and the steps
+    depending only on them are computed once: their values are cached for all the following frames.
+    """
+    EQUATION, US, ROUSE = range(3)
+
+    def __init__(self, equations, selected_output_IDs, output_float_type, is_2d, us_equation, known_var_IDs=(),
+                 static_var_IDs=()):
+        """!
+        @param equations <[slf.variables_utils.Equation]>: list of all equations necessary to compute selected variables
+        @param selected_output_IDs <[str]>: the short names of the selected output variables
+        @param output_float_type <numpy.dtype>: float32 or float64 according to the output file type
+        @param is_2d <bool>: True if input data is 2D
+        @param us_equation <slf.variables_utils.Equation>: user-specified friction law equation
+        @param known_var_IDs <[str]>: IDs of the variables whose values are given before calculations
+        @param static_var_IDs <[str]>: IDs of the input variables which are constant in time
+        """
+        self.selected_output_IDs = list(selected_output_IDs)
+        self.output_float_type = output_float_type
+        known_var_IDs = set(known_var_IDs)
+
+        # all input variables are read at once (static ones only in the first frame)
+        read_var_IDs = [var_ID for var_ID in get_variables_to_read(equations, self.selected_output_IDs)
+                        if var_ID not in known_var_IDs]
+        self.static_read_var_IDs = [var_ID for var_ID in read_var_IDs if var_ID in static_var_IDs]
+        self.read_var_IDs = [var_ID for var_ID in read_var_IDs if var_ID not in static_var_IDs]
+        self.static_values = None
+
+        available_IDs = known_var_IDs.union(read_var_IDs)
+        steps = []
+        for equation in equations:
+            output_ID = equation.output.ID()
+            if is_2d and output_ID == 'US':  # user-specified equation (always computed)
+                steps.append((VariableCalculationPlan.US, 'US', us_equation, ['W', 'H', 'M']))
+            elif is_2d and output_ID == 'ROUSE':  # the output values are stored in the first input variable
+                output_ID = equation.input[0].ID()
+                steps.append((VariableCalculationPlan.ROUSE, output_ID, equation.operator, ['US']))
+            elif output_ID not in available_IDs:  # normal case (if not already done)
+                steps.append((VariableCalculationPlan.EQUATION, output_ID, equation,
+                              [input_var.ID() for input_var in equation.input]))
+            available_IDs.add(output_ID)
+
+        # steps depending only on static variables are computed once
+        static_IDs = set(self.static_read_var_IDs)
+        self.static_steps = []
+        dynamic_steps = []
+        for step in steps:
+            _, output_ID, _, input_IDs = step
+            if all(var_ID in static_IDs for var_ID in input_IDs):
+                self.static_steps.append(step)
+                static_IDs.add(output_ID)
+            else:
+                dynamic_steps.append(step)
+                static_IDs.discard(output_ID)
+        steps = dynamic_steps
+
+        # intermediate values are freed after their last use
+        last_use = {}
+        for i, (_, _, _, input_IDs) in enumerate(steps):
+            for var_ID in input_IDs:
+                last_use[var_ID] = i
+        self.steps = []
+        for i, (step_type, output_ID, operator, input_IDs) in enumerate(steps):
+            freed_IDs = [var_ID for var_ID in set(input_IDs) if last_use[var_ID] == i and var_ID != output_ID
+                         and var_ID not in self.selected_output_IDs]
+            self.steps.append((step_type, output_ID, operator, input_IDs, freed_IDs))
+
+    def new_output_values(self, nb_nodes):
+        """!
+        @brief Allocate an output array which can be reused for every frame
+        @param nb_nodes <int>: number of nodes
+        @return <numpy 2D-array>: uninitialized array of shape (number of selected variables, number of nodes)
+        """
+        return np.empty((len(self.selected_output_IDs), nb_nodes), dtype=self.output_float_type)
+
+    def _compute_step(self, step_type, operator, input_IDs, computed_values):
+        input_values = [computed_values[var_ID] for var_ID in input_IDs]
+        if step_type == VariableCalculationPlan.US:
+            values = do_calculation(operator, input_values)
+            # Clean US values in case of negative or null water depth
+            return np.where(computed_values['H'] > 0, values, np.zeros(1, dtype=self.output_float_type))
+        elif step_type == VariableCalculationPlan.ROUSE:
+            return operator(input_values[0])
+        return do_calculation(operator, input_values)
+
+    def compute_in_frame(self, input_serafin, time_index, known_values=None, output_values=None):
+        """!
+        @brief Return the selected variables values in a single time frame
+        @param input_serafin <Serafin.Read>: input stream for reading necessary variables
+        @param time_index <int>: the index of the frame (0-based)
+        @param known_values <{str: numpy.ndarray}>: known values before calculations (not modified)
+        @param output_values <numpy 2D-array>: optional preallocated output array (see `new_output_values`)
+        @return <numpy 2D-array>: the values of the selected output variables
+        """
+        if self.static_values is None:
+            self.static_values = {}
+            if self.static_read_var_IDs:
+                self.static_values.update(zip(self.static_read_var_IDs,
+                                              input_serafin.read_frame(time_index, self.static_read_var_IDs)))
+            for step_type, output_ID, operator, input_IDs in self.static_steps:
+                self.static_values[output_ID] = self._compute_step(step_type, operator, input_IDs, self.static_values)
+
+        computed_values = dict(self.static_values)
+        if known_values is not None:
+            computed_values.update(known_values)
+        if self.read_var_IDs:
+            computed_values.update(zip(self.read_var_IDs, input_serafin.read_frame(time_index, self.read_var_IDs)))
+
+        for step_type, output_ID, operator, input_IDs, freed_IDs in self.steps:
+            computed_values[output_ID] = self._compute_step(step_type, operator, input_IDs, computed_values)
+            for var_ID in freed_IDs:
+                computed_values.pop(var_ID, None)
+
+        # reconstruct the output values array in the order of the selected IDs
+        if output_values is None:
+            output_values = self.new_output_values(input_serafin.header.nb_nodes)
+        for i, var_ID in enumerate(self.selected_output_IDs):
+            output_values[i, :] = computed_values[var_ID]
+        return output_values
+
+
 def do_calculations_in_frame(equations, input_serafin, time_index, selected_output_IDs,
-                             output_float_type, is_2d, us_equation, ori_values={}):
+                             output_float_type, is_2d, us_equation, ori_values=None):
     """!
     @brief Return the selected 2D variables values in a single time frame
     @param equations <[slf.variables_utils.Equation]>: list of all equations necessary to compute selected variables
@@ -34,47 +183,10 @@ def do_calculations_in_frame(equations, input_serafin, time_index, selected_outp
     @param output_float_type <numpy.dtype>: float32 or float64 according to the output file type
     @param is_2d <bool>: True if input data is 2D
     @param us_equation <slf.variables_utils.Equation>: user-specified friction law equation
-    @param ori_values <{numpy.ndarray}>: known values before calculations
+    @param ori_values <{numpy.ndarray}>: known values before calculations (not modified)
     @return <numpy.ndarray>: the values of the selected output variables
     """
-    computed_values = ori_values
-    for equation in equations:
-        input_var_IDs = list(map(lambda x: x.ID(), equation.input))
-
-        # read (if needed) input variables values
-        for input_var_ID in input_var_IDs:
-            if input_var_ID not in computed_values and input_var_ID[:5] != 'ROUSE':
-                computed_values[input_var_ID] = input_serafin.read_var_in_frame(time_index, input_var_ID)
-
-        if is_2d:
-            # handle the special case for US (user-specified equation)
-            if equation.output.ID() == 'US':
-                computed_values['US'] = do_calculation(us_equation, [computed_values['W'],
-                                                                     computed_values['H'],
-                                                                     computed_values['M']])
-                # Clean US values in case of negative or null water depth
-                computed_values['US'] = np.where(computed_values['H'] > 0, computed_values['US'],
-                                                 np.zeros(input_serafin.header.nb_nodes, dtype=output_float_type))
-
-            # handle the very special case for ROUSE (equation depending on user-specified value)
-            elif equation.output.ID() == 'ROUSE':
-                computed_values[equation.input[0].ID()] = equation.operator(computed_values['US'])
-                continue
-
-        # handle the normal case (if not already done)
-        if equation.output.ID() not in computed_values.keys():
-            computed_values[equation.output.ID()] = do_calculation(equation,
-                [computed_values[var_ID] for var_ID in input_var_IDs])
-
-    # reconstruct the output values array in the order of the selected IDs
-    nb_selected_vars = len(selected_output_IDs)
-
-    output_values = np.empty((nb_selected_vars, input_serafin.header.nb_nodes),
-                             dtype=output_float_type)
-    for i in range(nb_selected_vars):
-        var_ID = selected_output_IDs[i]
-        if var_ID not in computed_values:
-            output_values[i, :] = input_serafin.read_var_in_frame(time_index, var_ID)
-        else:
-            output_values[i, :] = computed_values[var_ID]
-    return output_values
+    known_var_IDs = () if ori_values is None else ori_values.keys()
+    plan = VariableCalculationPlan(equations, selected_output_IDs, output_float_type, is_2d, us_equation,
+                                   known_var_IDs)
+    return plan.compute_in_frame(input_serafin, time_index, ori_values)
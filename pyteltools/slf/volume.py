@@ -3,6 +3,7 @@ Volume calculations in polygons
 """
 
 import numpy as np
+import scipy.sparse
 import shapely.geometry as geom
 
 from pyteltools.conf import settings
@@ -39,12 +40,11 @@ class TruncatedTriangularPrisms(Mesh2D):
         @param polygon <geom.geometry.Polyline>: A polygon
         @return <numpy.1D-array>: The weight carried by the triangle nodes
         """
-        potential_elements = self.get_intersecting_elements(polygon.bounds())
+        potential_elements = self.get_intersecting_element_indices(polygon.bounds())
         weight = np.zeros((self.nb_points,), dtype=np.float64)
-        for i, j, k in potential_elements:
-            t = self.triangles[i, j, k]
-            if polygon.contains(t):
-                weight[[i, j, k]] += t.area
+        for index in potential_elements:
+            if polygon.contains(self.triangles.polygon(index)):
+                weight[self.ikle[index]] += self.triangles.areas[index]
         return weight / 3.0
 
     def polygon_intersection(self, polygon):
@@ -53,19 +53,19 @@ class TruncatedTriangularPrisms(Mesh2D):
         @param polygon <geom.geometry.Polyline>: A polygon
         @return <numpy.1D-array, dict>: The weight carried by the triangle nodes, and the dictionary of tuple (area, centroid value) for boundary triangles
         """
-        potential_elements = self.get_intersecting_elements(polygon.bounds())
+        potential_elements = self.get_intersecting_element_indices(polygon.bounds())
         weight = np.zeros((self.nb_points,), dtype=np.float64)
         triangle_polygon_intersection = {}
-        for i, j, k in potential_elements:
-            t = self.triangles[i, j, k]
+        for index in potential_elements:
+            t = self.triangles.polygon(index)
             if polygon.contains(t):
-                weight[[i, j, k]] += t.area
+                weight[self.ikle[index]] += self.triangles.areas[index]
             else:
                 is_intersected, intersection = polygon.polygon_intersection(t)
                 if is_intersected:
                     centroid = intersection.centroid
-                    interpolator = Interpolator(t).get_interpolator_at(centroid.x, centroid.y)
-                    triangle_polygon_intersection[i, j, k] = (intersection.area, interpolator)
+                    interpolator = self.triangles.barycentric_coordinates(index, centroid.x, centroid.y)
+                    triangle_polygon_intersection[tuple(self.ikle[index])] = (intersection.area, interpolator)
         return weight / 3.0, triangle_polygon_intersection
 
     def polygon_intersection_all(self, polygon):
@@ -74,27 +74,25 @@ class TruncatedTriangularPrisms(Mesh2D):
         @param polygon <geom.geometry.Polyline>: A polygon
         @return <dict, dict>: The dictionaries of all triangles contained in polygon, and of tuples (base triangle, intersection) for boundary triangles
         """
-        potential_elements = self.get_intersecting_elements(polygon.bounds())
+        potential_elements = self.get_intersecting_element_indices(polygon.bounds())
         weight = np.zeros((self.nb_points,), dtype=np.float64)
         triangles = {}
         triangle_polygon_net_intersection = {}
         triangle_polygon_intersection = {}
-        for i, j, k in potential_elements:
-            t = self.triangles[i, j, k]
+        for index in potential_elements:
+            t = self.triangles.polygon(index)
+            triangle = tuple(self.ikle[index])
+            area = self.triangles.areas[index]
             if polygon.contains(t):
-                area = t.area
-                vertices = tuple(map(np.array, list(t.exterior.coords)[:-1]))
-                triangles[i, j, k] = (vertices, area)
-                weight[[i, j, k]] += area
+                triangles[triangle] = (self.triangles.vertices(index), area)
+                weight[self.ikle[index]] += area
             else:
                 is_intersected, intersection = polygon.polygon_intersection(t)
                 if is_intersected:
-                    vertices = tuple(map(np.array, list(t.exterior.coords)[:-1]))
-                    area = t.area
                     centroid = intersection.centroid
-                    interpolator = Interpolator(t).get_interpolator_at(centroid.x, centroid.y)
-                    triangle_polygon_net_intersection[i, j, k] = (intersection.area, interpolator)
-                    triangle_polygon_intersection[i, j, k] = (vertices, area, intersection)
+                    interpolator = self.triangles.barycentric_coordinates(index, centroid.x, centroid.y)
+                    triangle_polygon_net_intersection[triangle] = (intersection.area, interpolator)
+                    triangle_polygon_intersection[triangle] = (self.triangles.vertices(index), area, intersection)
         return weight / 3.0, triangle_polygon_net_intersection, triangles, triangle_polygon_intersection
 
     @staticmethod
@@ -111,6 +109,21 @@ class TruncatedTriangularPrisms(Mesh2D):
             volume += area * interpolator.dot(variable[[i, j, k]])
         return volume
 
+    @staticmethod
+    def boundary_weight(triangle_polygon_intersection, nb_points):
+        """!
+        @brief Return the weight carried by the triangle nodes for all triangle-polygon intersections
+        @param triangle_polygon_intersection <dict>: All triangle-polygon intersections defined by boundary triangles
+        @param nb_points <int>: The number of nodes
+        @return <numpy.1D-array>: The weight carried by the triangle nodes
+        """
+        weight = np.zeros((nb_points,), dtype=np.float64)
+        if triangle_polygon_intersection:
+            nodes = np.array(list(triangle_polygon_intersection.keys()), dtype=np.int64)
+            weights = np.array([area * interpolator for area, interpolator in triangle_polygon_intersection.values()])
+            np.add.at(weight, nodes.ravel(), weights.ravel())
+        return weight
+
     @staticmethod
     def superior_prism_volume(vertices, area, values):
         """!
@@ -120,23 +133,25 @@ class TruncatedTriangularPrisms(Mesh2D):
         @param values <numpy.1D-array>: The values of the variable on the three nodes of the triangle
         @return <float>: The volume of the prism in the half-space z > 0
         """
-        # eliminate special cases
-        if min(values) >= 0:
-            return area * sum(values) / 3.0
-        elif max(values) <= 0:
-            return 0
+        return TruncatedTriangularPrisms.superior_prism_volumes(np.array([area]), np.asarray(values)[np.newaxis, :])[0]
 
-        p1, p2, p3 = vertices
-        # remaining cases: triangle crosses the plane z = 0
-        nb_points_superior = sum(values > 0)
-        if nb_points_superior == 1:  # positive tetrahedron
-            (z_bottom, _, _), (z_middle, _, _), (z_top, _, _) = sorted(zip(values, [1, 2, 3], [p1, p2, p3]))
-            return area * z_top ** 3 / 3 / (z_top - z_middle) / (z_top - z_bottom)
-        else:  # negative tetrahedron
-            (z_bottom, _, bottom), (z_middle, _, middle), (z_top, _, top) = sorted(zip(values, [1, 2, 3], [p1, p2, p3]))
-            volume_total = area * sum(values) / 3.0
-            volume_negative = area * z_bottom ** 3 / 3 / (z_top - z_bottom) / (z_middle - z_bottom)
-            return volume_total - volume_negative
+    @staticmethod
+    def superior_prism_volumes(areas, values):
+        """!
+        @brief Return the volumes in the half-space z > 0 of the prisms with the given base triangles and values
+        @param areas <numpy.1D-array>: The areas of the base triangles
+        @param values <numpy.2D-array>: The values of the variable on the three nodes of every triangle
+        @return <numpy.1D-array>: The volumes of the prisms in the half-space z > 0
+        """
+        z_bottom, z_middle, z_top = np.sort(values, axis=1).T
+        volume_total = areas * np.sum(values, axis=1) / 3.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # remaining cases: triangle crosses the plane z = 0
+            volume_positive_tetrahedron = areas * z_top ** 3 / 3 / (z_top - z_middle) / (z_top - z_bottom)
+            volume_negative_tetrahedron = areas * z_bottom ** 3 / 3 / (z_top - z_bottom) / (z_middle - z_bottom)
+        return np.select([z_bottom >= 0, z_top <= 0, z_middle <= 0],
+                         [volume_total, 0.0, volume_positive_tetrahedron],
+                         volume_total - volume_negative_tetrahedron)
 
     @staticmethod
     def superior_prism_volume_in_intersection(polygon, vertices, area, intersection, values):
@@ -219,10 +234,15 @@ class VolumeCalculator:
 
         self.mesh = None
         self.weights = []
+        self.weight_matrix = None
+        self.inner_triangles = None
+        self.boundary_triangles = None
 
-        self.init_values = None
+        self.init_values = None  # values subtracted in every frame, read only once
         if self.second_var_ID == VolumeCalculator.INIT_VALUE:
             self.init_values = input_stream.read_var_in_frame(0, self.var_ID)
+        elif self.second_var_ID is not None and input_stream.get_static_var_IDs([self.second_var_ID]):
+            self.init_values = input_stream.read_var_in_frame(0, self.second_var_ID)
 
     def construct_triangles(self, iter_pbar=lambda x, unit: x):
         self.mesh = TruncatedTriangularPrisms(self.input_stream.header, True, iter_pbar)
@@ -241,6 +261,73 @@ class VolumeCalculator:
         elif self.volume_type == VolumeCalculator.POSITIVE:
             for poly in iter_pbar(self.polygons, unit='polygons'):
                 self.weights.append(self.mesh.polygon_intersection_all(poly))
+        self.construct_kernels()
+
+    def construct_kernels(self):
+        """!
+        Gather the weights of every polygon in flat arrays, so that all polygons are processed at once in a frame:
+        - net volumes: a sparse matrix (polygons x nodes)
+        - positive volumes: nodes, areas and polygons of all inner and boundary triangles
+        """
+        nb_points = self.mesh.nb_points
+        rows = [scipy.sparse.csr_matrix((0, nb_points))]
+        inner_triangles = ([], [], [])
+        boundary_triangles = ([], [], [], [])
+        for i_poly, weight in enumerate(self.weights):
+            if self.volume_type == VolumeCalculator.NET_STRICT:
+                rows.append(scipy.sparse.csr_matrix(weight))
+                continue
+            strict_weight, triangle_polygon_net_intersection = weight[:2]
+            boundary_weight = TruncatedTriangularPrisms.boundary_weight(triangle_polygon_net_intersection, nb_points)
+            rows.append(scipy.sparse.csr_matrix(strict_weight + boundary_weight))
+            if self.volume_type == VolumeCalculator.POSITIVE:
+                _, _, triangles, triangle_polygon_intersection = weight
+                for triangle, (_, area) in triangles.items():
+                    for data, item in zip(inner_triangles, (triangle, area, i_poly)):
+                        data.append(item)
+                for triangle, (vertices, area, intersection) in triangle_polygon_intersection.items():
+                    for data, item in zip(boundary_triangles, (triangle, area, i_poly, (vertices, intersection))):
+                        data.append(item)
+        self.weight_matrix = scipy.sparse.vstack(rows, format='csr')
+
+        if self.volume_type == VolumeCalculator.POSITIVE:
+            nodes, areas, polygon_ids = inner_triangles
+            self.inner_triangles = (np.array(nodes, dtype=np.int64).reshape(-1, 3), np.array(areas, dtype=np.float64),
+                                    np.array(polygon_ids, dtype=np.int64))
+            nodes, areas, polygon_ids, intersections = boundary_triangles
+            self.boundary_triangles = (np.array(nodes, dtype=np.int64).reshape(-1, 3),
+                                       np.array(areas, dtype=np.float64), np.array(polygon_ids, dtype=np.int64),
+                                       intersections)
+
+    def volumes_in_frame(self, values):
+        """!
+        @brief Do the volume computation of all polygons in a single frame, depending on the volume type
+        @param values <numpy.1D-array>: the values of the variable for which the volume will be computed
+        @return <list>: The value of the volume (or the tuple of net, positive and negative volumes) of every polygon
+        """
+        volumes_net = self.weight_matrix.dot(values)
+        if self.volume_type != VolumeCalculator.POSITIVE:
+            return volumes_net.tolist()
+
+        nb_polygons = len(self.polygons)
+        nodes, areas, polygon_ids = self.inner_triangles
+        volumes_positive = np.bincount(polygon_ids, minlength=nb_polygons,
+                                       weights=TruncatedTriangularPrisms.superior_prism_volumes(areas, values[nodes]))
+
+        # boundary triangles: only the ones crossing the plane z = 0 require geometrical operations
+        nodes, areas, polygon_ids, intersections = self.boundary_triangles
+        boundary_values = values[nodes]
+        is_crossing = (boundary_values.min(axis=1) < 0) & (boundary_values.max(axis=1) > 0)
+        boundary_volumes = np.where(boundary_values.min(axis=1) >= 0, areas * boundary_values.sum(axis=1) / 3.0, 0.0)
+        for index in np.flatnonzero(is_crossing):
+            i_poly = polygon_ids[index]
+            vertices, intersection = intersections[index]
+            boundary_volumes[index] = TruncatedTriangularPrisms.superior_prism_volume_in_intersection(
+                self.polygons[i_poly], vertices, areas[index], intersection, boundary_values[index])
+        volumes_positive += np.bincount(polygon_ids, weights=boundary_volumes, minlength=nb_polygons)
+
+        return [(volume_net, volume_positive, volume_net - volume_positive)
+                for volume_net, volume_positive in zip(volumes_net.tolist(), volumes_positive.tolist())]
 
     def volume_in_frame_in_polygon(self, weight, values, polygon):
         """!
@@ -263,9 +350,10 @@ class VolumeCalculator:
             volume_net += TruncatedTriangularPrisms.boundary_volume_in_polygon(triangle_polygon_net_intersection, values)
 
             volume_positive = 0
-            for a, b, c in triangles:
-                vertices, area = triangles[a, b, c]
-                volume_positive += TruncatedTriangularPrisms.superior_prism_volume(vertices, area, values[[a, b, c]])
+            if triangles:
+                nodes = np.array(list(triangles.keys()), dtype=np.int64)
+                areas = np.array([area for _, area in triangles.values()], dtype=np.float64)
+                volume_positive += TruncatedTriangularPrisms.superior_prism_volumes(areas, values[nodes]).sum()
             for a, b, c in triangle_polygon_intersection:
                 vertices, area, intersection = triangle_polygon_intersection[a, b, c]
                 volume_positive += TruncatedTriangularPrisms.superior_prism_volume_in_intersection(polygon, vertices,
@@ -273,31 +361,40 @@ class VolumeCalculator:
                                                                                                    values[[a, b, c]])
             return volume_net, volume_positive, volume_net - volume_positive
 
+    def get_read_var_IDs(self):
+        """!
+        Variables to read in each frame, depending on the first/second variable choice
+        """
+        if self.second_var_ID is None or self.init_values is not None:
+            return [self.var_ID]
+        return [self.var_ID, self.second_var_ID]
+
+    def values_from_frame(self, frame_values):
+        """!
+        Combine the values read in a frame (see `get_read_var_IDs`), depending on the first/second variable choice
+        """
+        if self.second_var_ID is None:
+            return frame_values[0]
+        if self.init_values is not None:
+            return frame_values[0] - self.init_values
+        return frame_values[0] - frame_values[1]
+
     def read_values_in_frame(self, time_index):
         """!
         Read variable values in a single frame, depending on the first/second variable choice
         """
-        values = self.input_stream.read_var_in_frame(time_index, self.var_ID)
-        if self.second_var_ID is not None:
-            if self.second_var_ID == VolumeCalculator.INIT_VALUE:
-                values -= self.init_values
-            else:
-                second_values = self.input_stream.read_var_in_frame(time_index, self.second_var_ID)
-                values -= second_values
-        return values
+        return self.values_from_frame(self.input_stream.read_frame(time_index, self.get_read_var_IDs()))
 
     def run(self, fmt_float=settings.FMT_FLOAT):
         """!
         Separate the major part of the computation, allowing a GUI override
         """
         result = []
-        for time_index in self.time_indices:
+        for time_index, frame_values in self.input_stream.iter_frames(self.time_indices, self.get_read_var_IDs()):
             i_result = [str(self.input_stream.time[time_index])]
-            values = self.read_values_in_frame(time_index)
+            values = self.values_from_frame(frame_values)
 
-            for j in range(len(self.polygons)):
-                weight = self.weights[j]
-                volume = self.volume_in_frame_in_polygon(weight, values, self.polygons[j])
+            for volume in self.volumes_in_frame(values):
                 if self.volume_type == VolumeCalculator.POSITIVE:
                     for v in volume:
                         i_result.append(fmt_float.format(v))
@@ -0,0 +1,92 @@
+"""!
+Unittest for slf.expression module (calculator)
+"""
+
+import numpy as np
+import os
+import unittest
+
+from pyteltools.geom.geometry import Polyline
+from pyteltools.slf import Serafin
+from pyteltools.slf.expression import compiler
+from pyteltools.slf.expression.pool import ComplexExpressionMultiPool, ComplexExpressionPool
+from . import TestHeader
+
+
+HOME = os.path.expanduser('~')
+
+
+class ExpressionPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(HOME, 'dummpy_expression.slf')
+
+        # create the test Serafin (with random values)
+        self.var_IDs = ['U', 'V', 'H']
+        self.times = [float(t) for t in range(4)]
+        self.values = np.random.RandomState(0).randn(len(self.times), len(self.var_IDs), 4)
+
+        header = TestHeader()
+        for var_ID in self.var_IDs:
+            header.add_variable_from_ID(var_ID)
+        with Serafin.Write(self.path, 'fr', overwrite=True) as f:
+            f.write_header(header)
+            f.write_entire_frames(header, self.times, self.values)
+
+        self.pool = ComplexExpressionPool(self.var_IDs, ['u', 'v', 'h'], header.x, header.y)
+        self.pool.add_polygonal_mask([Polyline([(2, -1), (7, -1), (7, 3), (2, 3), (2, -1)], attributes=[5.0])], 0)
+        for literal_expression in ['sqrt([U]^2 + [V]^2)', 'sqrt([U]^2 + [V]^2) * [H]', '2 * 3 + 1',
+                                   '[E1] + sin([COORDX]) * cos([H])', '[POLY1] * [H]']:
+            self.pool.add_simple_expression(literal_expression)
+        self.pool.add_condition(self.pool.expressions[1], '>', 0.5)
+        self.pool.add_condition(self.pool.expressions[3], '<=', 1.0)
+        self.pool.add_and_or_condition(self.pool.conditions[1], self.pool.conditions[2], False)
+        self.pool.add_conditional_expression(self.pool.conditions[3], self.pool.expressions[2],
+                                             self.pool.expressions[4])
+        self.pool.add_max_min_expression(self.pool.expressions[2], self.pool.expressions[3], True)
+        self.pool.add_masked_expression(self.pool.expressions[5], self.pool.expressions[1])
+
+        self.selected_expressions = ['E1', 'E2', 'E3', 'E6', 'E7', 'E8', 'E1']
+        multi_pool = ComplexExpressionMultiPool()
+        multi_pool.representative = self.pool
+        self.augmented_path = multi_pool.build_augmented_path(self.selected_expressions)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_compile(self):
+        plan = compiler.EvaluationPlan(self.pool, self.augmented_path, self.selected_expressions, use_numexpr=False)
+        self.assertEqual(sorted(plan.read_var_IDs), sorted(self.var_IDs))  # each variable is read once
+        operators = [(operation, payload) for _, operation, payload, _ in plan.steps]
+        self.assertEqual(operators.count((compiler.OPERATOR, 'sqrt')), 1)  # shared by E1 and E2
+        self.assertEqual(plan.compiler.operations[plan.outputs[2]], compiler.CONSTANT)  # folded
+        self.assertEqual(plan.compiler.constants[plan.outputs[2]], 7.0)
+
+    def test_evaluate_expressions(self):
+        for use_numexpr in (False, True):
+            with Serafin.Read(self.path, 'fr') as f:
+                f.read_header()
+                f.get_time()
+                plan = compiler.EvaluationPlan(self.pool, self.augmented_path, self.selected_expressions,
+                                               use_numexpr=use_numexpr)
+                for time_index in range(len(self.times)):
+                    values = self.pool._evaluate_expressions(f, time_index, self.augmented_path)
+                    expected = np.array([values[expr] * np.ones(4) for expr in self.selected_expressions])
+                    self.assertTrue(np.allclose(plan.evaluate(f, time_index), expected, equal_nan=True))
+
+    def test_evaluate_expressions_by_block(self):
+        with Serafin.Read(self.path, 'fr') as f:
+            f.read_header()
+            f.get_time()
+            expected = [values for _, values in self.pool.evaluate_expressions(self.augmented_path, f,
+                                                                               self.selected_expressions)]
+            plan = self.pool.compile(self.augmented_path, self.selected_expressions)
+            self.assertEqual(plan.get_block_size(1), 1)
+            for memory_budget in (1, 1000, 10 ** 9):
+                block_size = plan.get_block_size(memory_budget)
+                blocks = list(self.pool.evaluate_expressions_by_block(self.augmented_path, f, self.selected_expressions,
+                                                                      memory_budget))
+                self.assertEqual([len(times) for times, _ in blocks],
+                                 [min(block_size, len(self.times) - i) for i in range(0, len(self.times), block_size)])
+                self.assertEqual(sum([times for times, _ in blocks], []), self.times)
+                values = np.concatenate([block_values for _, block_values in blocks])
+                self.assertTrue(np.allclose(values, expected, equal_nan=True))
@@ -223,3 +223,19 @@ class FluxTestCase(unittest.TestCase):
             calculator.construct_intersections()
             result = calculator.run(fmt_float=FMT_FLOAT)
         self.assertEqual(result, [['0.0', '-0.274313', '-1.652278', '-0.684448', '-1.867955', '0.372551', '0.746949', '-0.653220', '0.343606', '-0.543767', '-0.145061', '1.785679', '-1.351363', '1.095366', '-0.090347', '-0.533630', '-0.566228', '0.698715', '-1.020388', '2.523243', '0.000000', '-2.073888', '1.755359', '-0.587313', '1.424664', '-0.324333', '-0.355981', '0.396478', '-1.627649', '2.332502', '-1.300096', '-0.384759', '0.703085', '-1.548257', '-0.237325', '-0.455650', '-0.390769', '-0.194893', '0.408926', '-0.025892', '-0.546575', '0.012302', '1.385813', '0.298171', '0.990620', '0.019868', '-1.336574', '-0.685807', '0.408816', '-1.081772', '-0.053861', '-1.130079', '-0.816861', '0.135542', '0.936695', '-0.891779', '0.359112', '-0.314760', '-0.573652', '-0.006791', '0.003773'], ['1.0', '-0.073925', '-0.573058', '-0.247339', '-0.770693', '0.181372', '0.289168', '-0.088695', '-0.249566', '-0.250149', '0.005148', '1.044077', '-0.497874', '0.506131', '0.045862', '-0.241894', '-0.124936', '0.127493', '-0.312414', '1.580744', '0.000000', '-0.800762', '0.551207', '-0.231059', '0.528695', '-0.161789', '-0.308881', '0.030796', '-0.963643', '1.256579', '-0.441748', '-0.094334', '0.248642', '-0.470129', '-0.093312', '-0.203759', '-0.094608', '-0.029261', '0.169590', '-0.153706', '-0.176981', '-0.043017', '0.555212', '0.081049', '0.460145', '0.126851', '-0.754187', '-0.297678', '0.162128', '-0.539173', '-0.027148', '-0.580658', '-0.603714', '0.052058', '0.545740', '-0.540998', '0.040476', '0.010270', '-0.217325', '-0.124353', '0.002559'], ['2.0', '-0.478501', '-1.314759', '-0.462583', '-1.215347', '-0.054762', '0.932601', '-0.110837', '0.413456', '-0.069253', '-0.070417', '1.264107', '-0.890276', '0.837034', '-0.603543', '-0.423904', '-0.813487', '0.673034', '-0.645223', '1.820816', '0.000000', '-1.027438', '1.296399', '-0.529490', '0.252985', '-0.267508', '-0.278878', '0.283414', '-1.265812', '1.661415', '-0.363409', '0.020612', '0.466813', '-1.347294', '-0.314381', '-0.160537', '0.061898', '0.513711', '0.246673', '-0.074605', '-0.371122', '-0.039697', '0.973362', '0.296814', '0.923252', '-0.329875', '-1.014310', '-0.225001', '0.271614', '-0.641896', '-0.028874', '-0.714611', '-0.661387', '0.112954', '0.732229', '-0.844744', '0.282755', '0.049579', '-0.515845', '0.275142', '0.004983'], ['3.0', '-0.109128', '-0.912257', '-0.470291', '-0.911799', '0.009341', '0.626357', '-0.065450', '0.052054', '-0.215063', '0.120414', '1.052137', '-0.831546', '0.646067', '-0.406332', '-0.357086', '-0.593909', '0.319171', '-0.521735', '1.644656', '0.000000', '-0.750118', '0.675724', '-0.386633', '0.354736', '-0.394784', '-0.503555', '0.179190', '-1.263644', '1.366001', '-0.460016', '-0.079988', '0.328629', '-0.914811', '-0.257862', '-0.150814', '-0.098595', '0.553562', '0.197588', '-0.192280', '-0.419533', '-0.164278', '0.880888', '0.316827', '0.742888', '0.208963', '-1.022624', '-0.208308', '0.120445', '-0.362968', '-0.042076', '-0.602917', '-0.741877', '0.235093', '0.773577', '-0.836944', '0.252157', '0.365847', '-0.280630', '0.200083', '0.000340'], ['4.0', '-0.497275', '-2.037566', '-0.895737', '-2.106710', '0.338992', '1.367063', '-0.570519', '0.248268', '-0.656862', '-0.101520', '2.280219', '-1.616008', '1.662580', '-0.682569', '-0.642517', '-0.992527', '0.507234', '-1.234173', '3.143709', '0.000000', '-1.908359', '1.996320', '-1.044842', '1.058140', '-0.607676', '-0.668123', '0.206620', '-2.154397', '2.869096', '-1.172050', '-0.051316', '1.073147', '-1.832847', '-0.475529', '-0.399923', '-0.331844', '0.720093', '0.427895', '-0.267577', '-0.739110', '-0.102679', '1.872054', '0.216002', '1.160891', '0.168579', '-1.882026', '-0.848499', '0.764261', '-1.401727', '-0.088706', '-1.584371', '-1.213219', '0.112372', '1.406378', '-1.577182', '0.518106', '-0.066412', '-0.535832', '0.187528', '0.002366'], ['5.0', '-0.853637', '-1.082450', '-0.998756', '-1.491949', '-0.081520', '1.240448', '-0.503934', '-0.185485', '-0.690380', '0.080680', '1.639767', '-1.292146', '1.035857', '-0.419634', '-0.479919', '-0.949154', '0.254673', '-0.643049', '2.006477', '0.000000', '-1.231520', '0.815586', '-0.365625', '0.605466', '-0.413447', '-0.775192', '0.136845', '-1.633567', '2.400621', '-0.552177', '-0.554794', '0.881949', '-0.916353', '-0.486003', '-0.196985', '0.333863', '0.638646', '0.509636', '-0.056791', '-0.503276', '-0.218253', '1.733038', '0.137841', '0.382245', '-0.001066', '-1.561188', '-0.751293', '0.244004', '-1.301309', '-0.105232', '-0.862042', '-1.084454', '0.290187', '1.152546', '-0.950813', '0.407911', '0.190046', '-0.160990', '-0.141114', '0.009360'], ['6.0', '-0.273537', '-1.220497', '-0.502228', '-0.958580', '0.436158', '0.595096', '-0.767319', '0.628785', '-0.614494', '-0.120447', '0.507095', '-0.620562', '1.162459', '-0.557614', '-0.101835', '-0.407355', '0.159428', '-1.014407', '0.448994', '0.000000', '-0.802340', '1.241387', '-0.650809', '0.533305', '-0.294412', '-0.048149', '0.016445', '-0.530327', '0.942337', '-0.684909', '0.181244', '0.900195', '-1.121336', '-0.210307', '-0.145875', '-0.540541', '0.540348', '0.263761', '-0.075013', '-0.590742', '0.002412', '0.688897', '-0.426535', '0.229419', '0.017078', '-0.530612', '-0.706771', '0.747620', '-1.072455', '-0.024968', '-1.125649', '-0.110099', '-0.075568', '0.524830', '-0.531893', '0.387224', '-0.181994', '-0.120542', '0.385725', '0.001104'], ['7.0', '-1.168028', '-1.121527', '-0.640196', '-1.650719', '-0.113698', '0.603024', '-0.981015', '0.522056', '-0.772359', '-0.045229', '0.652783', '-0.910901', '0.805889', '-0.050922', '-0.156709', '-0.444371', '0.702640', '-0.695667', '0.594230', '0.000000', '-1.724003', '1.122537', '-0.108734', '0.855073', '0.088902', '-0.152663', '0.379538', '-0.555976', '1.844631', '-0.432844', '-0.859849', '0.607480', '-1.141112', '-0.188367', '-0.218194', '0.572515', '-0.347540', '0.628925', '0.117335', '-0.280768', '-0.012483', '0.731243', '-0.489766', '0.019363', '-1.058016', '-0.581573', '-0.580803', '0.044292', '-1.874664', '-0.024889', '-0.592755', '-0.253523', '-0.232127', '0.481578', '0.198345', '0.289369', '-0.169583', '-0.194902', '-0.587207', '0.027922'], ['8.0', '-0.399015', '-0.574647', '-0.227976', '-0.904964', '0.126718', '0.191620', '-0.412364', '0.090851', '-0.401216', '0.015345', '0.528395', '-0.425921', '0.453166', '0.194222', '-0.134178', '0.087580', '0.219124', '-0.318462', '0.679324', '0.000000', '-0.984738', '0.575859', '-0.095277', '0.657156', '0.049306', '-0.140152', '0.107819', '-0.412028', '1.052323', '-0.301612', '-0.303452', '0.259149', '-0.508764', '-0.037481', '-0.217659', '0.201064', '-0.360861', '0.279706', '-0.040025', '-0.085036', '-0.022160', '0.327265', '-0.246646', '0.164504', '-0.337172', '-0.399742', '-0.362362', '0.089099', '-1.014726', '-0.017623', '-0.443721', '-0.280238', '-0.111671', '0.307586', '0.063079', '0.055970', '-0.114357', '-0.119831', '-0.464175', '0.017611'], ['9.0', '-0.171062', '-1.686314', '-0.915240', '-1.932781', '0.633232', '0.694019', '-0.546167', '0.065642', '-1.181156', '0.358188', '1.465696', '-1.153705', '1.465855', '-0.099736', '-0.482118', '-0.146172', '0.205281', '-1.284284', '2.282906', '0.000000', '-1.911286', '1.205460', '-0.428390', '1.354523', '-0.579697', '-1.024131', '0.183060', '-1.930763', '2.718198', '-1.181281', '-0.299208', '0.703425', '-1.450588', '-0.182461', '-0.316279', '-0.205792', '0.450066', '0.731052', '-0.580848', '-0.849383', '-0.339329', '1.154019', '-0.518917', '1.212254', '0.281275', '-1.633649', '-0.791737', '0.232833', '-2.024114', '-0.074969', '-1.490791', '-1.352186', '0.254588', '1.408860', '-0.839240', '0.449150', '0.561213', '-0.287307', '-0.204399', '0.020738'], ['10.0', '-0.183229', '-0.728095', '-0.523106', '-0.799196', '-0.033505', '0.514903', '-0.202104', '0.163456', '-0.286294', '0.080309', '0.669883', '-0.713128', '0.517580', '-0.415621', '-0.168316', '-0.684397', '0.298476', '-0.438487', '0.950755', '0.000000', '-0.656974', '0.507276', '-0.245681', '0.249734', '-0.321324', '-0.431101', '0.156834', '-0.898387', '1.051509', '-0.337559', '-0.272324', '0.298005', '-0.771341', '-0.207412', '-0.100079', '0.044957', '0.439240', '0.236052', '-0.143884', '-0.405142', '-0.110572', '0.744351', '0.114257', '0.381044', '0.145308', '-0.749012', '-0.152154', '0.037824', '-0.372502', '-0.029890', '-0.400115', '-0.573798', '0.128848', '0.640800', '-0.622982', '0.354178', '0.246990', '-0.142179', '0.186133', '0.001256'], ['11.0', '-0.005051', '-1.178076', '-0.483019', '-1.258881', '0.282733', '0.313862', '-0.550752', '0.454746', '-0.451563', '-0.008395', '0.829224', '-0.863831', '0.766025', '-0.148127', '-0.239494', '-0.322962', '0.581711', '-0.789903', '1.329811', '0.000000', '-1.356993', '1.111799', '-0.294322', '1.002907', '-0.209055', '-0.291606', '0.368221', '-0.916465', '1.445801', '-0.984899', '-0.274464', '0.362109', '-1.236879', '-0.082483', '-0.249813', '-0.315101', '-0.062767', '0.361708', '-0.138680', '-0.433425', '-0.031926', '0.682183', '-0.046326', '0.716439', '0.042045', '-0.749178', '-0.334731', '0.128589', '-0.768462', '-0.016277', '-0.703548', '-0.500317', '0.082000', '0.629359', '-0.485794', '0.333669', '-0.046413', '-0.353890', '0.070408', '0.000320'], ['12.0', '-0.622697', '-1.956013', '-0.882262', '-2.368706', '0.015431', '1.230529', '-0.626576', '0.415447', '-0.727581', '0.043056', '1.799258', '-1.642032', '1.416810', '-0.610694', '-0.410636', '-1.058179', '0.638842', '-1.055635', '2.568197', '0.000000', '-2.212525', '1.801896', '-0.950843', '1.144104', '-0.490689', '-0.697710', '0.259654', '-1.977564', '2.600690', '-1.114102', '-0.436810', '0.792097', '-1.860913', '-0.392933', '-0.412720', '-0.004864', '0.379692', '0.493152', '-0.259512', '-0.649840', '-0.150982', '1.598422', '0.066696', '0.922043', '-0.168393', '-1.633527', '-0.599232', '0.397875', '-1.349230', '-0.059533', '-1.204150', '-1.147201', '-0.152503', '1.319844', '-1.308348', '0.611078', '0.254951', '-0.402589', '-0.177729', '0.008958'], ['13.0', '-0.048740', '-0.070079', '-0.107904', '-0.079066', '0.012830', '0.155206', '0.008589', '-0.072274', '-0.027029', '0.007073', '0.220752', '-0.132182', '0.091658', '-0.063288', '-0.076082', '-0.112670', '-0.007707', '-0.038363', '0.263148', '0.000000', '-0.018880', '0.033415', '-0.027292', '0.004019', '-0.088033', '-0.115352', '-0.006126', '-0.214461', '0.246584', '-0.019554', '-0.007121', '0.099721', '-0.049160', '-0.063969', '-0.004315', '0.021455', '0.139604', '0.027186', '-0.025231', '-0.064819', '-0.026936', '0.244284', '0.078290', '0.085888', '0.093839', '-0.212266', '-0.059189', '0.054208', '-0.056791', '-0.017419', '-0.082619', '-0.169562', '0.091762', '0.146583', '-0.153617', '0.050178', '0.016493', '-0.019609', '0.037948', '0.000024'], ['14.0', '-0.314466', '-0.602433', '-0.443290', '-0.884847', '0.358767', '0.216232', '-0.451947', '0.004456', '-0.735806', '0.160335', '0.471883', '-0.409727', '0.617836', '0.309354', '-0.144745', '0.340548', '0.021818', '-0.539027', '0.599231', '0.000000', '-1.055007', '0.447975', '0.071953', '0.983554', '-0.059152', '-0.372187', '0.072508', '-0.566084', '1.264404', '-0.535812', '-0.417880', '0.368579', '-0.433242', '-0.006167', '-0.137736', '0.081599', '-0.209881', '0.483155', '-0.152077', '-0.293560', '-0.115514', '0.425318', '-0.544139', '0.255709', '-0.140999', '-0.555523', '-0.547414', '0.044677', '-1.429659', '-0.034511', '-0.631466', '-0.459333', '0.020396', '0.499829', '0.140015', '0.163049', '0.042888', '-0.038051', '-0.478138', '0.021825'], ['15.0', '-0.315609', '-0.511639', '-0.374158', '-0.547517', '0.004130', '0.679086', '-0.054321', '-0.199371', '-0.000054', '-0.115253', '1.242785', '-0.800105', '0.396815', '-0.216153', '-0.403881', '-0.571864', '0.254694', '-0.246172', '1.593912', '0.000000', '-0.467227', '0.548324', '-0.252968', '0.222668', '-0.271257', '-0.301288', '0.139527', '-1.039079', '1.267756', '-0.245378', '-0.128835', '0.401021', '-0.452287', '-0.279330', '-0.116932', '0.051180', '0.326451', '0.094292', '0.033953', '-0.217725', '-0.001200', '1.111772', '0.588504', '0.510524', '0.167607', '-0.938008', '-0.245723', '0.276539', '-0.220888', '-0.061226', '-0.411489', '-0.599689', '0.271924', '0.560544', '-0.682621', '0.166463', '-0.159624', '-0.280729', '0.101979', '0.000081'], ['16.0', '-0.150006', '-0.979777', '-0.493811', '-1.068078', '0.421861', '0.361098', '-0.735944', '0.359892', '-0.640433', '-0.070338', '0.691482', '-0.706709', '0.800358', '0.043535', '-0.190546', '-0.146822', '0.352067', '-0.819399', '0.855316', '0.000000', '-1.249258', '1.008416', '-0.199104', '0.998163', '-0.190870', '-0.209922', '0.219448', '-0.657200', '1.335021', '-0.973447', '-0.229658', '0.581398', '-0.923139', '-0.061732', '-0.205089', '-0.385961', '-0.152223', '0.381512', '-0.072224', '-0.414147', '-0.001352', '0.739220', '-0.262950', '0.436264', '0.040800', '-0.641682', '-0.656139', '0.334193', '-1.127781', '-0.031212', '-0.812058', '-0.389844', '0.089628', '0.532530', '-0.266746', '0.321080', '-0.251304', '-0.209720', '0.005862', '0.004241'], ['17.0', '-0.236676', '-0.864793', '-0.632609', '-0.978185', '0.172326', '0.533195', '-0.370930', '0.074903', '-0.541119', '0.101182', '0.833954', '-0.755119', '0.733490', '-0.280862', '-0.278124', '-0.522393', '0.242294', '-0.651585', '1.172603', '0.000000', '-0.874165', '0.633896', '-0.232676', '0.459885', '-0.312331', '-0.503790', '0.181355', '-1.008242', '1.444431', '-0.577582', '-0.262372', '0.461375', '-0.790746', '-0.210344', '-0.119433', '0.000812', '0.425505', '0.395345', '-0.143878', '-0.472156', '-0.156554', '0.835089', '-0.068723', '0.478948', '0.120216', '-0.901043', '-0.400435', '0.072876', '-0.856348', '-0.047645', '-0.661754', '-0.643426', '0.243278', '0.733406', '-0.598165', '0.291284', '0.196374', '-0.160849', '0.112765', '0.002962'], ['18.0', '0.131110', '-1.196546', '-0.372895', '-1.430550', '0.146578', '0.812094', '0.378564', '-0.542258', '-0.260395', '0.201428', '2.109514', '-1.029164', '0.913611', '-0.157115', '-0.628741', '-0.310217', '0.041363', '-0.544285', '3.465461', '0.000000', '-1.373717', '1.012409', '-0.786354', '0.896194', '-0.519967', '-0.793198', '-0.009883', '-2.223667', '2.162756', '-0.849603', '0.077353', '0.287277', '-0.911724', '-0.272653', '-0.341301', '-0.361903', '0.439362', '0.140219', '-0.441457', '-0.378294', '-0.235435', '1.153452', '0.541635', '1.277897', '0.493986', '-1.667567', '-0.348510', '0.238979', '-0.443628', '-0.067587', '-1.048975', '-1.322093', '0.179872', '1.181879', '-1.448126', '0.070682', '0.556949', '-0.439439', '-0.152058', '0.000453'], ['19.0', '-0.501787', '-0.901413', '-0.237842', '-1.298228', '0.052591', '0.446162', '-0.522668', '0.257272', '-0.455276', '-0.053632', '0.676524', '-0.625396', '0.637676', '0.083121', '-0.119850', '-0.132338', '0.277554', '-0.491282', '0.892276', '0.000000', '-1.416330', '1.034851', '-0.467194', '0.828043', '-0.013163', '-0.052917', '0.077758', '-0.608968', '1.097716', '-0.653645', '-0.235630', '0.409354', '-0.779520', '-0.083778', '-0.286156', '0.005240', '-0.436689', '0.237835', '0.022757', '-0.137758', '0.003952', '0.505484', '-0.192198', '0.209195', '-0.504594', '-0.494568', '-0.498145', '0.264493', '-1.009481', '-0.011904', '-0.615943', '-0.257651', '-0.316246', '0.364705', '-0.225184', '0.128917', '-0.089380', '-0.166213', '-0.453701', '0.011716'], ['20.0', '-0.240063', '-0.365412', '-0.391404', '-0.567048', '-0.090686', '0.536468', '0.097599', '-0.571168', '-0.127279', '0.145155', '1.282899', '-0.682535', '0.407429', '-0.152653', '-0.508441', '-0.365273', '0.047833', '-0.144681', '1.915155', '0.000000', '-0.331309', '0.135853', '-0.172212', '0.131990', '-0.216634', '-0.535627', '0.095505', '-1.141199', '1.460116', '-0.130832', '-0.088107', '0.285140', '-0.241040', '-0.324461', '-0.086037', '0.136619', '0.525591', '0.158073', '-0.077849', '-0.145308', '-0.221288', '0.867028', '0.509793', '0.401102', '0.251773', '-1.038594', '-0.321494', '-0.036369', '-0.354511', '-0.077170', '-0.448607', '-0.694328', '0.510256', '0.642845', '-0.639094', '-0.106201', '0.302799', '-0.154760', '-0.063902', '0.002734'], ['21.0', '-0.658853', '-0.690402', '-0.511553', '-0.912936', '-0.010511', '0.650814', '-0.038961', '-0.300601', '-0.355788', '0.229016', '1.126965', '-0.621908', '0.667189', '-0.166795', '-0.466864', '-0.258697', '0.247341', '-0.371702', '1.662244', '0.000000', '-0.644982', '0.369923', '-0.059279', '0.091661', '-0.119667', '-0.584204', '0.155086', '-1.137217', '1.881981', '0.095384', '-0.174052', '0.327458', '-0.587766', '-0.290472', '-0.064820', '0.611263', '0.506995', '0.444894', '-0.157985', '-0.226618', '-0.250927', '0.692417', '-0.013951', '0.575969', '-0.326067', '-1.046293', '-0.372832', '-0.115868', '-1.268684', '-0.058425', '-0.635759', '-0.798009', '0.364518', '0.744877', '-0.330222', '-0.032239', '0.359146', '-0.237255', '-0.245814', '0.024494'], ['22.0', '-0.032018', '-0.166778', '-0.050304', '-0.161499', '0.001516', '0.063502', '-0.083129', '0.095904', '-0.049549', '-0.011192', '0.079853', '-0.116284', '0.101657', '-0.059766', '-0.020054', '-0.088955', '0.073820', '-0.104318', '0.112223', '0.000000', '-0.168085', '0.167816', '-0.080187', '0.089869', '-0.026435', '-0.011041', '0.039984', '-0.088304', '0.130013', '-0.100906', '-0.023173', '0.059144', '-0.175661', '-0.026552', '-0.032893', '-0.039268', '0.018892', '0.024967', '-0.003815', '-0.050635', '-0.000262', '0.084988', '0.007295', '0.051103', '-0.022062', '-0.071931', '-0.046525', '0.038398', '-0.078944', '-0.001175', '-0.086141', '-0.020944', '-0.023599', '0.061530', '-0.069430', '0.048485', '-0.002716', '-0.033588', '0.020574', '0.000235'], ['23.0', '-0.276730', '-0.934430', '-0.564742', '-0.739113', '0.167247', '0.755434', '-0.410284', '0.356993', '-0.389024', '-0.070378', '0.712709', '-0.706325', '0.893362', '-0.655096', '-0.153360', '-0.711394', '0.129720', '-0.666095', '0.719805', '0.000000', '-0.517842', '0.847602', '-0.502496', '0.272285', '-0.403084', '-0.283909', '-0.011312', '-0.763171', '0.978872', '-0.377248', '-0.017611', '0.732634', '-0.884096', '-0.288029', '-0.072173', '-0.250529', '0.766287', '0.180330', '-0.119071', '-0.531835', '-0.037190', '0.954328', '-0.061841', '0.211354', '0.233461', '-0.739311', '-0.447850', '0.546900', '-0.618856', '-0.045253', '-0.764604', '-0.400365', '0.034563', '0.653943', '-0.727051', '0.458917', '-0.041847', '-0.078847', '0.389471', '0.000181'], ['24.0', '-0.025667', '-0.327982', '-0.054882', '-0.519965', '0.028343', '0.053099', '-0.100644', '0.082775', '-0.100140', '0.002871', '0.266022', '-0.213312', '0.166897', '0.044180', '-0.058546', '-0.016611', '0.096452', '-0.118285', '0.438467', '0.000000', '-0.537602', '0.351712', '-0.181468', '0.347114', '-0.024079', '-0.050576', '0.039313', '-0.266452', '0.348630', '-0.260578', '-0.087192', '0.050276', '-0.295659', '-0.001608', '-0.156117', '-0.039692', '-0.223230', '0.047490', '-0.029971', '-0.042577', '-0.006106', '0.130419', '-0.005529', '0.155067', '-0.073967', '-0.177043', '-0.059410', '0.034527', '-0.152294', '-0.002484', '-0.157068', '-0.139741', '-0.088930', '0.136495', '-0.146049', '0.030297', '0.008704', '-0.084585', '-0.164455', '0.000735'], ['25.0', '0.058431', '-0.388865', '-0.145193', '-0.390491', '0.176450', '0.017635', '-0.211498', '0.152597', '-0.239118', '0.010379', '0.183806', '-0.215101', '0.291771', '-0.044973', '-0.043547', '-0.051344', '0.109628', '-0.320759', '0.306074', '0.000000', '-0.433407', '0.354582', '-0.125697', '0.326814', '-0.092267', '-0.100408', '0.071852', '-0.257252', '0.410322', '-0.346705', '-0.056582', '0.134560', '-0.375675', '0.000698', '-0.073043', '-0.182907', '0.013148', '0.122890', '-0.093390', '-0.185202', '-0.015754', '0.139564', '-0.132919', '0.200546', '0.063916', '-0.193352', '-0.127308', '0.080944', '-0.323127', '-0.004360', '-0.297392', '-0.128553', '-0.003966', '0.198180', '-0.135991', '0.113784', '0.011042', '-0.065941', '0.039149', '0.000209'], ['26.0', '-0.035064', '-0.533379', '-0.094872', '-0.518280', '0.104368', '0.247450', '-0.087749', '0.156960', '-0.170768', '-0.013036', '0.395654', '-0.257076', '0.388268', '-0.109996', '-0.083873', '-0.103651', '0.083984', '-0.304368', '0.604980', '0.000000', '-0.543711', '0.552296', '-0.305941', '0.321886', '-0.113950', '-0.102398', '0.002161', '-0.432742', '0.510621', '-0.336442', '0.074294', '0.186590', '-0.465102', '-0.044510', '-0.112297', '-0.172092', '0.069050', '0.063762', '-0.110567', '-0.136649', '-0.011450', '0.258372', '-0.071157', '0.315159', '-0.017414', '-0.319470', '-0.167753', '0.208095', '-0.332179', '-0.006521', '-0.383237', '-0.228952', '-0.122714', '0.272609', '-0.325816', '0.115950', '0.037108', '-0.113615', '-0.010242', '0.001080'], ['27.0', '0.374701', '-0.539074', '-0.227842', '-0.618281', '0.352181', '0.018404', '-0.029661', '-0.038076', '-0.453142', '0.227078', '0.381399', '-0.314382', '0.454735', '0.057352', '-0.095400', '0.168928', '-0.156181', '-0.431958', '0.803311', '0.000000', '-0.677497', '0.291063', '-0.238769', '0.705106', '-0.321931', '-0.465030', '-0.040365', '-0.750624', '0.648328', '-0.626474', '-0.046682', '0.088066', '-0.408861', '0.046695', '-0.166848', '-0.354168', '0.114459', '0.163043', '-0.365351', '-0.357283', '-0.158008', '0.243679', '-0.222872', '0.535384', '0.484125', '-0.541851', '-0.142395', '0.072372', '-0.380102', '-0.018658', '-0.511147', '-0.558284', '-0.000491', '0.537558', '-0.435427', '0.197865', '0.397918', '-0.023772', '-0.094112', '0.000810'], ['28.0', '-0.177279', '-0.480569', '-0.108229', '-0.816273', '0.109608', '0.065829', '-0.160687', '-0.021853', '-0.340207', '0.096696', '0.434814', '-0.282840', '0.361645', '0.153316', '-0.078206', '0.118571', '0.062528', '-0.219359', '0.694987', '0.000000', '-0.851429', '0.429950', '-0.193886', '0.514009', '-0.005608', '-0.193479', '-0.014731', '-0.482683', '0.792796', '-0.250470', '-0.161096', '0.104637', '-0.373374', '0.005284', '-0.186099', '0.093651', '-0.267529', '0.182050', '-0.143252', '-0.079446', '-0.066302', '0.125232', '-0.223903', '0.200517', '-0.201704', '-0.335222', '-0.189237', '0.035376', '-0.713385', '-0.009693', '-0.388212', '-0.308093', '-0.144610', '0.299114', '-0.062732', '0.009906', '0.132971', '-0.050909', '-0.434289', '0.013422'], ['29.0', '-0.167969', '-0.876901', '-0.407202', '-1.066295', '0.397676', '0.197842', '-0.668195', '0.271815', '-0.703305', '0.021358', '0.552627', '-0.572689', '0.736982', '0.200147', '-0.133973', '0.134819', '0.233487', '-0.726678', '0.733978', '0.000000', '-1.305797', '0.859630', '-0.139072', '1.135416', '-0.086600', '-0.203280', '0.163154', '-0.554822', '1.236941', '-0.866137', '-0.337659', '0.458006', '-0.778659', '-0.007037', '-0.220793', '-0.280971', '-0.309991', '0.402292', '-0.105276', '-0.340721', '-0.030938', '0.477784', '-0.413851', '0.296541', '-0.068361', '-0.517789', '-0.622019', '0.215300', '-1.256609', '-0.021812', '-0.766688', '-0.313648', '-0.036600', '0.462462', '-0.035000', '0.222834', '-0.139266', '-0.135952', '-0.263800', '0.012011'], ['30.0', '-0.035800', '-1.144852', '-0.344517', '-1.028807', '0.229953', '0.358209', '-0.601131', '0.659115', '-0.473294', '-0.062930', '0.427566', '-0.664532', '0.798630', '-0.348927', '-0.097185', '-0.394171', '0.269226', '-0.828960', '0.578020', '0.000000', '-1.115353', '1.161682', '-0.610722', '0.763884', '-0.226901', '-0.066910', '0.164747', '-0.500861', '0.701035', '-0.832856', '-0.039724', '0.490227', '-1.103117', '-0.136609', '-0.234817', '-0.506223', '0.141826', '0.160987', '-0.082398', '-0.423726', '-0.005856', '0.496934', '-0.134036', '0.291707', '0.069427', '-0.426074', '-0.463042', '0.386452', '-0.616732', '-0.010135', '-0.750484', '-0.079848', '-0.172957', '0.410576', '-0.469624', '0.339849', '-0.062488', '-0.155132', '0.197229', '0.000335'], ['31.0', '-1.984400', '-1.581903', '-1.480245', '-2.182427', '-0.289440', '1.770337', '-1.234276', '0.356169', '-0.938523', '-0.137975', '1.779194', '-1.752674', '1.405786', '-0.685376', '-0.502385', '-1.536610', '0.951591', '-0.951714', '1.692856', '0.000000', '-1.850767', '1.461393', '-0.218058', '0.600564', '-0.183971', '-0.590293', '0.455874', '-1.497762', '3.314138', '-0.358236', '-1.150719', '1.357495', '-1.556620', '-0.670112', '-0.153469', '1.059651', '0.541844', '0.951538', '0.293745', '-0.611122', '-0.096861', '2.188742', '-0.149507', '0.065022', '-1.061303', '-1.631804', '-1.050125', '0.240863', '-2.468646', '-0.109331', '-0.979495', '-0.930188', '0.230500', '1.199929', '-0.544561', '0.629915', '-0.329843', '-0.308522', '-0.261864', '0.029225'], ['32.0', '0.143002', '-0.399049', '-0.098485', '-0.660299', '0.326721', '-0.265601', '-0.522350', '0.183304', '-0.551630', '0.054824', '0.068719', '-0.197776', '0.247838', '0.576716', '-0.016349', '0.541101', '0.098949', '-0.406919', '0.162086', '0.000000', '-1.077201', '0.427994', '0.103527', '1.216734', '0.033716', '-0.021767', '0.134577', '-0.100263', '0.529946', '-0.878215', '-0.369655', '0.135694', '-0.336280', '0.163938', '-0.217883', '-0.466436', '-0.783041', '0.221962', '-0.041372', '-0.126337', '-0.003491', '0.019858', '-0.363400', '0.083574', '-0.002787', '-0.067709', '-0.444073', '0.037972', '-0.745033', '-0.001808', '-0.360867', '-0.016290', '-0.072643', '0.085767', '0.352242', '0.038475', '-0.085845', '-0.029969', '-0.412618', '0.005304'], ['33.0', '-0.097208', '-1.463510', '-0.270733', '-1.994183', '0.144593', '0.584492', '-0.718551', '0.482997', '-0.705711', '-0.043813', '0.850382', '-1.116957', '1.055528', '-0.202481', '0.034343', '-0.333566', '0.080769', '-0.818217', '1.309179', '0.000000', '-2.135394', '1.657716', '-1.298271', '1.492492', '-0.260546', '-0.159719', '-0.087999', '-0.962470', '0.976901', '-1.436312', '-0.168973', '0.536154', '-1.205403', '-0.108307', '-0.441237', '-0.615095', '-0.362282', '0.116477', '-0.175017', '-0.335723', '-0.011710', '0.741934', '-0.182297', '0.223685', '-0.052923', '-0.693235', '-0.574161', '0.577047', '-0.763863', '-0.009959', '-0.979986', '-0.321527', '-0.756629', '0.644416', '-0.891870', '0.434617', '0.061402', '-0.022534', '-0.537637', '0.000599'], ['34.0', '-0.019041', '-1.056146', '-0.280047', '-1.214086', '0.028729', '0.446141', '-0.322724', '0.388218', '-0.346654', '0.042535', '0.673882', '-0.824899', '0.662939', '-0.286211', '-0.105239', '-0.439083', '0.270432', '-0.573419', '1.106093', '0.000000', '-1.235425', '1.008192', '-0.668179', '0.775816', '-0.251981', '-0.276442', '0.127139', '-0.865032', '0.883189', '-0.800734', '-0.082617', '0.273365', '-1.015239', '-0.127920', '-0.258045', '-0.289304', '0.061410', '0.122913', '-0.189521', '-0.299873', '-0.070368', '0.605184', '0.076539', '0.488234', '0.074455', '-0.644878', '-0.226821', '0.229270', '-0.383858', '-0.013216', '-0.578361', '-0.425562', '-0.235212', '0.571419', '-0.691669', '0.341948', '0.214740', '-0.156218', '-0.106803', '0.000717'], ['35.0', '-0.084991', '-0.579281', '-0.218837', '-0.681082', '0.221176', '0.163373', '-0.457960', '0.218096', '-0.455278', '-0.016592', '0.301964', '-0.363597', '0.493436', '0.077009', '-0.029901', '-0.004218', '0.085340', '-0.478676', '0.369446', '0.000000', '-0.843419', '0.603307', '-0.221295', '0.691066', '-0.096282', '-0.078722', '0.041697', '-0.336954', '0.611992', '-0.606126', '-0.146519', '0.338823', '-0.505316', '-0.007381', '-0.173958', '-0.284647', '-0.181349', '0.178166', '-0.059197', '-0.223649', '-0.004338', '0.315270', '-0.254839', '0.118393', '-0.001744', '-0.290000', '-0.425264', '0.247136', '-0.678973', '-0.009333', '-0.517125', '-0.149433', '-0.139274', '0.276617', '-0.143440', '0.175434', '-0.066833', '-0.049196', '-0.122311', '0.004014'], ['36.0', '-0.319111', '-0.676949', '-0.474417', '-0.862769', '0.097601', '0.657623', '-0.229066', '-0.121012', '-0.341410', '0.019729', '0.996555', '-0.698887', '0.689232', '-0.265949', '-0.256766', '-0.415402', '0.078381', '-0.389642', '1.302732', '0.000000', '-0.663634', '0.573590', '-0.345852', '0.360815', '-0.253555', '-0.425759', '0.008517', '-0.939311', '1.323833', '-0.362326', '-0.095182', '0.488181', '-0.555488', '-0.236268', '-0.131430', '0.070482', '0.382438', '0.239345', '-0.135597', '-0.276640', '-0.099885', '0.906676', '0.032486', '0.341404', '0.122230', '-0.891797', '-0.399559', '0.263143', '-0.708463', '-0.054052', '-0.614403', '-0.657156', '0.115325', '0.679729', '-0.664624', '0.223084', '0.038385', '-0.114843', '-0.062288', '0.003381'], ['37.0', '-0.414567', '-0.654513', '-0.327593', '-0.796076', '0.160669', '0.150812', '-0.550806', '0.312305', '-0.542452', '0.024497', '0.240442', '-0.402225', '0.518873', '0.008652', '-0.066573', '-0.086621', '0.317655', '-0.541079', '0.228164', '0.000000', '-0.892506', '0.601825', '-0.031915', '0.515928', '-0.016500', '-0.125528', '0.182533', '-0.291393', '0.963058', '-0.322972', '-0.351925', '0.322722', '-0.649169', '-0.041549', '-0.079760', '0.094791', '-0.100743', '0.366884', '-0.060157', '-0.265240', '-0.028151', '0.252297', '-0.404648', '0.122410', '-0.388202', '-0.280397', '-0.344251', '0.067724', '-1.141765', '-0.010568', '-0.482443', '-0.132822', '-0.061287', '0.286915', '0.169472', '0.172725', '-0.036679', '-0.082873', '-0.206363', '0.017370'], ['38.0', '-0.458885', '-1.248434', '-0.542441', '-1.435939', '0.087465', '0.889013', '-0.472619', '0.173413', '-0.357815', '-0.128709', '1.491161', '-1.139457', '0.921842', '-0.288640', '-0.399223', '-0.689896', '0.476753', '-0.705986', '2.013335', '0.000000', '-1.419648', '1.329050', '-0.625378', '0.791642', '-0.285029', '-0.301710', '0.207789', '-1.343895', '1.832495', '-0.821963', '-0.182568', '0.665717', '-1.155492', '-0.301355', '-0.303975', '-0.155425', '0.134999', '0.259361', '-0.000916', '-0.369715', '-0.014823', '1.270330', '0.305764', '0.655311', '-0.086546', '-1.148395', '-0.568808', '0.443154', '-0.819068', '-0.051284', '-0.889173', '-0.686551', '0.026499', '0.794893', '-0.900049', '0.301406', '-0.150242', '-0.381525', '-0.014594', '0.002004'], ['39.0', '-0.236277', '-0.777441', '-0.234422', '-0.924011', '0.376682', '0.214238', '-0.613625', '0.215834', '-0.699946', '0.002258', '0.411798', '-0.416520', '0.744267', '0.183037', '-0.041437', '0.183536', '0.018001', '-0.675969', '0.491747', '0.000000', '-1.157615', '0.823386', '-0.321752', '0.894791', '-0.058762', '-0.112398', '-0.006123', '-0.401635', '0.918405', '-0.684372', '-0.116949', '0.458111', '-0.601986', '0.001228', '-0.208844', '-0.250770', '-0.245158', '0.286872', '-0.138000', '-0.249379', '-0.016656', '0.312123', '-0.511072', '0.157218', '-0.137108', '-0.377223', '-0.652116', '0.367894', '-1.286131', '-0.013656', '-0.819207', '-0.192657', '-0.263067', '0.367845', '-0.049202', '0.170379', '-0.108356', '-0.032960', '-0.336947', '0.016414']])
+
+    def test_fluxes_in_frame(self):
+        with Serafin.Read(self.path, 'fr') as f:
+            f.read_header()
+            f.get_time()
+            values = f.read_frame(3, ['U', 'V', 'H', 'M'])
+            calculator = FluxCalculator(FluxCalculator.MASS_FLUX, ['U', 'V', 'H', 'M'], f,
+                                        self.names, self.sections, 1)
+            calculator.construct_triangles()
+            calculator.construct_intersections()
+            for flux_type in range(5):
+                calculator.flux_type = flux_type
+                fluxes = calculator.fluxes_in_frame(values)
+                self.assertEqual(fluxes.shape, (len(self.sections),))
+                self.assertTrue(np.allclose(fluxes, [calculator.flux_in_frame(intersections, values)
+                                                     for intersections in calculator.intersections]))
@@ -0,0 +1,91 @@
+"""!
+Unittest for slf.interpolation module
+"""
+
+import numpy as np
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from pyteltools.conf import settings
+from pyteltools.geom.geometry import Polyline
+from pyteltools.slf.interpolation import InterpolatorCache, MeshInterpolator, PointLocator
+from . import TestHeader
+
+
+class PointLocationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.mesh = MeshInterpolator(TestHeader(), True)
+
+    def test_locate_points(self):
+        points = [(3, 2), (3, 4), (4, 1), (1, 0.25), (10, 10), (0, 6), (3, 0.5)]
+        element_indices, weights = self.mesh.locate_points(points)
+        self.assertEqual(element_indices.tolist(), [0, 0, 2, 2, -1, -1, 2])
+        self.assertTrue(np.allclose(weights[0], [0, 0, 1]))
+        self.assertTrue(np.all(np.isnan(weights[4])))
+        inside = element_indices >= 0
+        for (x, y), element, weight in zip(np.array(points)[inside], element_indices[inside], weights[inside]):
+            vertices = self.mesh.points[self.mesh.ikle[element]]
+            self.assertTrue(np.allclose(weight.dot(vertices), [x, y]))
+
+    def test_get_point_interpolators(self):
+        is_inside, point_interpolators = self.mesh.get_point_interpolators([(4, 3), (-1, 0)])
+        self.assertEqual(is_inside, [True, False])
+        (i, j, k), interpolator = point_interpolators[0]
+        self.assertEqual((i, j, k), (0, 2, 3))
+        self.assertAlmostEqual(interpolator.sum(), 1)
+        self.assertIsNone(point_interpolators[1])
+
+
+class InterpolatorCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.mesh = MeshInterpolator(TestHeader(), True)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_point_interpolators(self):
+        points = [(3, 4), (4, 1), (10, 10)]
+        with mock.patch.object(settings, 'INTERPOLATOR_CACHE', True), \
+                mock.patch.object(settings, 'INTERPOLATOR_CACHE_DIR', self.folder):
+            expected = self.mesh.locate_points(points)
+            self.assertEqual(len(os.listdir(self.folder)), 1)
+            with mock.patch.object(PointLocator, 'locate') as locate:
+                element_indices, weights = self.mesh.locate_points(points)
+                locate.assert_not_called()
+        self.assertTrue(np.array_equal(element_indices, expected[0]))
+        self.assertTrue(np.array_equal(weights, expected[1], equal_nan=True))
+
+    def test_line_interpolators(self):
+        lines = [Polyline([(0, 1), (6, 1)]), Polyline([(-2, -2), (-1, -1)])]
+        expected = self.mesh.get_line_interpolators(lines)
+        with mock.patch.object(settings, 'INTERPOLATOR_CACHE', True), \
+                mock.patch.object(settings, 'INTERPOLATOR_CACHE_DIR', self.folder):
+            self.mesh.get_line_interpolators(lines)
+            with mock.patch.object(MeshInterpolator, '_get_line_interpolators') as get_line_interpolators:
+                result = self.mesh.get_line_interpolators(lines)
+                get_line_interpolators.assert_not_called()
+        self.assertEqual(result[:2], expected[:2])
+        for (line, distances), (expected_line, expected_distances) in zip(result[2], expected[2]):
+            self.assertEqual(distances, expected_distances)
+            for (x, y, triangle, weights), (ex, ey, expected_triangle, expected_weights) in zip(line, expected_line):
+                self.assertEqual((x, y, triangle), (ex, ey, tuple(expected_triangle)))
+                self.assertTrue(np.array_equal(weights, expected_weights))
+
+    def test_eviction(self):
+        cache = InterpolatorCache(self.folder, max_size=1)
+        cache.save('first', {'values': np.zeros(10)})
+        self.assertIsNone(cache.load('first'))
+        cache = InterpolatorCache(self.folder, max_size=10 ** 6)
+        for key in ('first', 'second', 'third'):
+            cache.save(key, {'values': np.zeros(10)})
+        for mtime, key in enumerate(('first', 'second', 'third')):
+            os.utime(os.path.join(self.folder, key + '.npz'), ns=(mtime, mtime))
+        size = os.path.getsize(os.path.join(self.folder, 'first.npz'))
+        cache.load('first')  # becomes the most recently used
+        cache.max_size = 2 * size
+        cache.evict()
+        self.assertEqual(sorted(os.listdir(self.folder)), ['first.npz', 'third.npz'])
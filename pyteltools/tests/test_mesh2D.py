@@ -0,0 +1,126 @@
+"""!
+Unittest for slf.mesh2D module
+"""
+
+import numpy as np
+import unittest
+
+from pyteltools.geom.geometry import Polyline
+from pyteltools.slf import Serafin
+from pyteltools.slf.flux import TriangularVectorField
+from pyteltools.slf.mesh2D import Mesh2D
+from . import TestHeader
+
+
+class GridHeader(Serafin.SerafinHeader):
+    """!
+    Structured grid of 5x3 unit squares (split along their diagonal) with two holes: [1, 2]x[1, 2] and [3, 4]x[1, 2]
+    """
+    def __init__(self):
+        super().__init__(title='DUMMY GRID', format_type='SERAFIND')
+
+        x, y = np.meshgrid(np.arange(6, dtype=np.float64), np.arange(4, dtype=np.float64), indexing='ij')
+        ikle = []
+        for i in range(5):
+            for j in range(3):
+                if (i, j) not in [(1, 1), (3, 1)]:
+                    first, second = 4 * i + j + 1, 4 * (i + 1) + j + 1
+                    ikle += [first, second, second + 1, first, second + 1, first + 1]
+
+        self.nb_elements = len(ikle) // 3
+        self.nb_nodes = x.size
+        self.nb_nodes_2d = self.nb_nodes
+        self.nb_nodes_per_elem = 3
+
+        self.ikle = np.array(ikle, dtype=np.int64)
+        self.x_stored = x.flatten()
+        self.y_stored = y.flatten()
+
+        self._compute_mesh_coordinates()
+        self._build_ikle_2d()
+        self.build_ipobo()
+
+
+class Mesh2DTestCase(unittest.TestCase):
+    def setUp(self):
+        self.header = TestHeader()
+
+    def test_bounding_boxes(self):
+        mesh = Mesh2D(self.header)
+        self.assertTrue(np.array_equal(mesh.get_bounding_boxes(),
+                                       [[0, 0, 3, 6], [3, 0, 6, 6], [0, 0, 6, 2]]))
+
+    def test_construct_index(self):
+        mesh = Mesh2D(self.header, construct_index=True)
+        self.assertEqual(list(mesh.triangles), [(0, 1, 3), (0, 2, 3), (1, 2, 3)])
+        self.assertIn((0, 2, 3), mesh.triangles)
+        self.assertNotIn((0, 1, 2), mesh.triangles)
+        self.assertAlmostEqual(mesh.triangles[1, 2, 3].area, 6.0)
+        self.assertEqual(sorted(mesh.get_intersecting_elements((4, 3, 5, 4))), [(0, 2, 3)])
+        self.assertEqual(sorted(mesh.get_intersecting_elements((1, 0.5, 1, 0.5))), [(0, 1, 3), (1, 2, 3)])
+
+    def test_triangle_store(self):
+        mesh = Mesh2D(self.header, construct_index=True)
+        self.assertTrue(np.allclose(mesh.triangles.areas, [6.0, 6.0, 6.0]))
+        self.assertEqual(mesh.get_intersecting_element_indices((4, 3, 5, 4)).tolist(), [1])
+        for index in range(mesh.nb_triangles):
+            self.assertAlmostEqual(mesh.triangles.polygon(index).area, mesh.triangles.areas[index])
+            vertices = np.array(mesh.triangles.vertices(index))
+            self.assertTrue(np.allclose(mesh.triangles.barycentric_coordinates([index] * 3, vertices[:, 0],
+                                                                               vertices[:, 1]), np.eye(3)))
+        coords = mesh.triangles.barycentric_coordinates(2, 3.0, 2.0 / 3)
+        self.assertTrue(np.allclose(coords, [1 / 3, 1 / 3, 1 / 3]))
+
+    def test_clip_polyline(self):
+        mesh = Mesh2D(self.header, construct_index=True)
+        # crosses the left and bottom triangles, then follows the edge shared by the left and right triangles
+        segments, elements, parameters, points = mesh.clip_polyline([(0, 1), (3, 1), (3, 5)])
+        self.assertEqual(segments.tolist(), [0, 0, 1, 1])
+        self.assertEqual(elements.tolist(), [0, 2, 2, 0])
+        self.assertTrue(np.allclose(parameters, [[1 / 6, 0.5], [0.5, 1], [0, 0.25], [0.25, 1]]))
+        self.assertTrue(np.allclose(points, [[[0.5, 1], [1.5, 1]], [[1.5, 1], [3, 1]], [[3, 1], [3, 2]],
+                                             [[3, 2], [3, 5]]]))
+        self.assertTrue(np.all(Mesh2D.are_pieces_continuous(segments, parameters)))
+
+        # leaves the mesh and comes back
+        segments, elements, parameters, points = mesh.clip_polyline([(1, 1), (6, 6), (4, 1)])
+        self.assertEqual(Mesh2D.are_pieces_continuous(segments, parameters).tolist(), [True, False, True])
+
+    def test_neighbours(self):
+        mesh = Mesh2D(self.header)
+        self.assertEqual(mesh.get_neighbours().tolist(), [[-1, 2, 1], [-1, 2, 0], [-1, 1, 0]])
+
+    def test_trace_polyline(self):
+        mesh = Mesh2D(self.header, construct_index=True)
+        for coordinates in ([(0, 1), (3, 1), (3, 5)],  # along a shared edge
+                            [(1, 1), (6, 6), (4, 1)],  # leaves the mesh and comes back
+                            [(-1, 1), (7, 1)],  # starts and ends outside
+                            [(3, -1), (3, 7)],  # crosses a node
+                            [(2, 1), (2, 1), (4, 1)]):  # duplicated vertex
+            expected = mesh.clip_polyline(coordinates)
+            result = mesh.trace_polyline(coordinates)
+            self.assertEqual(result[0].tolist(), expected[0].tolist())
+            self.assertEqual(result[1].tolist(), expected[1].tolist())
+            self.assertTrue(np.allclose(result[2], expected[2]))
+            self.assertTrue(np.allclose(result[3], expected[3]))
+
+    def test_trace_polyline_grid(self):
+        mesh = TriangularVectorField(GridHeader())  # no spatial index
+        values = mesh.x + 2 * mesh.y  # linear field: integrals are exact
+        for coordinates, length, integral in (
+                ([(0, 1.5), (5, 1.5)], 3, 16.5),  # starts on the boundary and crosses both holes
+                ([(2, 1), (5, 2.5)], 2 * np.sqrt(1.25), 14 * np.sqrt(1.25)),  # from a node and back through a node
+                ([(5, 2.5), (2, 1)], 2 * np.sqrt(1.25), 14 * np.sqrt(1.25)),  # same section reversed
+                ([(0, 1), (5, 1)], 5, 22.5),  # along edges, including the edges of both holes
+                ([(0, 2), (5, 2)], 5, 32.5),
+                ([(1, 2), (2, 2.5)], np.sqrt(1.25), 6 * np.sqrt(1.25)),  # from a node of a hole
+                ([(2, 2), (2, 3)], 1, 7),  # from a node inside the mesh, along an edge
+                ([(0.5, -0.5), (3.5, 2.5)], 2.5 * np.sqrt(2), 11.875 * np.sqrt(2)),  # enters at a node, along edges
+                ([(1, 1), (3, 3), (5, 0)], np.sqrt(2) + 5 / 6 * np.sqrt(13),  # from nodes, along a diagonal
+                 7.5 * np.sqrt(2) + 52 / 9 * np.sqrt(13))):
+            segments, _, parameters, points = mesh.trace_polyline(coordinates)
+            self.assertAlmostEqual(np.linalg.norm(points[:, 1] - points[:, 0], axis=1).sum(), length)
+            self.assertTrue(np.all(parameters[:, 1] > parameters[:, 0]))
+            self.assertTrue(np.all(np.diff(segments + parameters[:, 0]) > 0))  # sorted along the section
+            intersections = mesh.section_intersection(Polyline(coordinates))
+            self.assertAlmostEqual(mesh.line_integral(intersections, values), integral)
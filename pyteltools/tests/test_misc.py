@@ -0,0 +1,192 @@
+"""!
+Unittest for slf.misc module (temporal reductions)
+"""
+
+import numpy as np
+import os
+import unittest
+
+from pyteltools.slf import misc, Serafin
+from pyteltools.slf.interpolation import MeshInterpolator
+from . import TestHeader
+
+
+HOME = os.path.expanduser('~')
+
+
+class TemporalReductionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(HOME, 'dummpy_reduction.slf')
+
+        # create the test Serafin (with random values)
+        self.var_IDs = ['U', 'V', 'H']
+        self.times = [float(t) for t in range(7)]
+        self.values = np.random.RandomState(42).rand(len(self.times), len(self.var_IDs), 4)
+
+        header = TestHeader()
+        for var_ID in self.var_IDs:
+            header.add_variable_from_ID(var_ID)
+        with Serafin.Write(self.path, 'fr', overwrite=True) as f:
+            f.write_header(header)
+            f.write_entire_frames(header, self.times, self.values)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_scalar_max_min_mean(self):
+        time_indices = [1, 2, 3, 4, 5, 6]
+        scalars = [('H', None, None), ('U', None, None)]
+        for max_min_type, fun in ((misc.MAX, np.max), (misc.MIN, np.min), (misc.MEAN, np.mean)):
+            expected = fun(self.values[time_indices][:, [2, 0]], axis=0)
+            for ncsize in (1, 3):
+                with Serafin.Read(self.path, 'fr') as f:
+                    f.read_header()
+                    f.get_time()
+                    calculator = misc.ScalarMaxMinMeanCalculator(max_min_type, f, scalars, time_indices)
+                    calculator.run(ncsize)
+                    self.assertTrue(np.allclose(calculator.finishing_up(), expected))
+
+    def test_max_min_mean_by_chunks(self):
+        time_indices = [1, 2, 3, 4, 5, 6]
+        scalars = [('H', None, None), ('U', None, None)]
+        with Serafin.Read(self.path, 'fr') as f:
+            f.read_header()
+            f.get_time()
+            for max_min_type, fun in ((misc.MAX, np.max), (misc.MIN, np.min), (misc.MEAN, np.mean)):
+                expected = fun(self.values[time_indices][:, [2, 0]], axis=0)
+                calculator = misc.ScalarMaxMinMeanCalculator(max_min_type, f, scalars, time_indices)
+                for chunk in misc.split_time_indices(time_indices, 2):  # as in the workflow (progress by chunk)
+                    calculator.time_indices = chunk
+                    calculator.run(3)
+                calculator.time_indices = time_indices
+                self.assertTrue(np.allclose(calculator.finishing_up(), expected))
+
+    def test_vector_max(self):
+        time_indices = list(range(len(self.times)))
+        with Serafin.Read(self.path, 'fr') as f:
+            f.read_header()
+            f.get_time()
+            scalars, vectors, equations = misc.scalars_vectors(f.header.var_IDs, [('U', None, None),
+                                                                                 ('V', None, None)])
+            magnitude = np.sqrt(self.values[:, 0] ** 2 + self.values[:, 1] ** 2)
+            i_max = np.argmax(magnitude, axis=0)
+            expected = self.values[i_max, :2, np.arange(4)].T
+            for ncsize in (1, 3):
+                calculator = misc.VectorMaxMinMeanCalculator(misc.MAX, f, vectors, time_indices, equations)
+                calculator.run(ncsize)
+                self.assertTrue(np.allclose(calculator.finishing_up(), expected))
+
+    def test_synch_max(self):
+        time_indices = list(range(len(self.times)))
+        i_max = np.argmax(self.values[:, 2], axis=0)
+        for ncsize in (1, 3):
+            with Serafin.Read(self.path, 'fr') as f:
+                f.read_header()
+                f.get_time()
+                calculator = misc.SynchMaxCalculator(f, [('U', None, None)], time_indices, 'H')
+                calculator.run(ncsize)
+                values = calculator.finishing_up()
+                self.assertTrue(np.array_equal(values[0], np.array(self.times)[i_max]))
+                self.assertTrue(np.array_equal(values[1], self.values[i_max, 0, np.arange(4)]))
+
+    def test_statistics(self):
+        time_indices = [0, 1, 2, 3, 4]
+        values = self.values[time_indices][:, [2, 0]]
+        with Serafin.Read(self.path, 'fr') as f:
+            f.read_header()
+            f.get_time()
+            calculator = misc.StatisticsCalculator(f, [('H', None, b'M'), ('U', None, b'M/S')], time_indices,
+                                                   ['max', 'mean', 'std', 'tmin', 'count'], 0.5, [50])
+            calculator.run()
+            results = calculator.finishing_up()
+            self.assertEqual([name for _, name, _ in calculator.output_variables()],
+                             ['MAX H', 'MEAN H', 'STD H', 'TMIN H', 'COUNT H', 'P50 H',
+                              'MAX U', 'MEAN U', 'STD U', 'TMIN U', 'COUNT U', 'P50 U'])
+            for i in range(2):
+                expected = [values[:, i].max(axis=0), values[:, i].mean(axis=0), values[:, i].std(axis=0),
+                            np.array(self.times)[np.argmin(values[:, i], axis=0)], (values[:, i] > 0.5).sum(axis=0),
+                            np.median(values[:, i], axis=0)]
+                self.assertTrue(np.allclose(results[6 * i:6 * (i + 1)], expected))
+
+    def test_arrival_duration(self):
+        time_indices = [1, 2, 3, 4, 5, 6]
+        conditions = [misc.Condition(['[H]'], 'H', '>', threshold) for threshold in (-1.0, 0.3, 0.6, 2.0)]
+        conditions.append(misc.Condition(['[U]', '[H]', '*'], 'U*H', '<=', 0.2))
+        with Serafin.Read(self.path, 'fr') as f:
+            f.read_header()
+            f.get_time()
+            frames = [f.read_frame(index, ['U', 'H']) for index in time_indices]
+            series = {'H': [H for _, H in frames], 'U*H': [U * H for U, H in frames]}
+            times = [f.time[index] for index in time_indices]
+
+            # reference values computed node by node from the interpolated crossing times
+            comparators = {'>': lambda a, b: a > b, '<=': lambda a, b: a <= b}
+            expected = []
+            for condition in conditions:
+                values = series[condition.literal_expression]
+                arrival, duration = np.full(4, float('Inf')), np.zeros(4)
+                for node in range(4):
+                    previous_flag = comparators[condition.comparator](values[0][node], condition.threshold)
+                    if previous_flag:
+                        arrival[node] = times[0]
+                    flip = times[0]
+                    for k in range(1, len(times)):
+                        previous_value, value = values[k - 1][node], values[k][node]
+                        flag = comparators[condition.comparator](value, condition.threshold)
+                        t_star = (value * times[k - 1] - previous_value * times[k]) / (value - previous_value)
+                        if previous_flag and (not flag or k == len(times) - 1):
+                            duration[node] += (times[k] if flag else t_star) - flip
+                        if flag and not previous_flag:
+                            arrival[node] = min(arrival[node], t_star)
+                            flip = t_star
+                        previous_flag = flag
+                expected += [arrival, duration]
+            # condition always (resp. never) satisfied
+            self.assertTrue(np.array_equal(expected[0], np.full(4, self.times[1])))
+            self.assertTrue(np.array_equal(expected[1], np.full(4, self.times[6] - self.times[1])))
+            self.assertTrue(np.array_equal(expected[6], np.full(4, float('Inf'))))
+            self.assertTrue(np.array_equal(expected[7], np.zeros(4)))
+
+            for use_numba in (False, True):  # numba is only used if it is installed
+                calculator = misc.ArrivalDurationMultiCalculator(f, time_indices, conditions, use_numba=use_numba)
+                self.assertEqual([(start, end) for _, start, end in calculator.groups], [(0, 4), (4, 5)])
+                calculator.run()
+                self.assertTrue(np.allclose(calculator.finishing_up(), expected))
+
+    def test_statistics_names(self):
+        with Serafin.Read(self.path, 'fr') as f:
+            f.read_header()
+            f.get_time()
+            with self.assertRaises(ValueError):
+                misc.StatisticsCalculator(f, [('H', None, b'M')], [0, 1], [], percentiles=[150])
+            with self.assertRaises(ValueError):
+                misc.StatisticsCalculator(f, [('H', None, b'M')], [0, 1], ['median'])
+            calculator = misc.StatisticsCalculator(f, [('H', None, b'M')], [0, 1], ['max'],
+                                                   percentiles=[50, 12.34567891, 12.34567892])
+            self.assertEqual([name for _, name, _ in calculator.output_variables()],
+                             ['MAX H', 'P50 H', 'P12.3457 H', 'P12.3457 H~1'])
+
+    def test_p2_quantile(self):
+        values = np.random.RandomState(0).randn(2000, 10)
+        estimator = misc.P2QuantileEstimator(0.9, (10,))
+        for frame_values in values:
+            estimator.add(frame_values)
+        self.assertTrue(np.allclose(estimator.result(), np.percentile(values, 90, axis=0), atol=0.15))
+
+    def test_project_mesh(self):
+        with Serafin.Read(self.path, 'fr') as first_in, Serafin.Read(self.path, 'fr') as second_in:
+            for resin in (first_in, second_in):
+                resin.read_header()
+                resin.get_time()
+            mesh = MeshInterpolator(second_in.header, True)
+            # the last node is moved outside of the second mesh
+            points = list(zip(first_in.header.x[:3], first_in.header.y[:3])) + [(10.0, 10.0)]
+            is_inside, point_interpolators = mesh.get_point_interpolators(points)
+            for operation_type, fun in ((misc.PROJECT, lambda a, b: b), (misc.DIFF, np.subtract),
+                                        (misc.MAX_BETWEEN, np.maximum)):
+                calculator = misc.ProjectMeshCalculator(first_in, second_in, ['H', 'U'], is_inside,
+                                                        point_interpolators, [(1, 2)], operation_type)
+                values = calculator.operation_in_frame(1, 2)
+                self.assertEqual(values.shape, (2, 4))
+                self.assertTrue(np.all(np.isnan(values[:, 3])))
+                self.assertTrue(np.allclose(values[:, :3], fun(self.values[1, [2, 0], :3], self.values[2, [2, 0], :3])))
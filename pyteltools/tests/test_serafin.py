@@ -0,0 +1,294 @@
+"""!
+Unittest for slf.Serafin module
+"""
+
+import numpy as np
+import os
+import unittest
+from unittest import mock
+
+from pyteltools.conf import settings
+from pyteltools.slf import Serafin
+from . import TestHeader
+
+
+HOME = os.path.expanduser('~')
+
+
+class SerafinTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(HOME, 'dummpy.slf')
+
+        # create the test Serafin
+        self.var_IDs = ['U', 'V', 'H']
+        self.times = [0.0, 10.0, 20.0, 30.0, 40.0]
+        self.values = np.arange(len(self.times) * len(self.var_IDs) * 4, dtype=np.float64).reshape(
+            len(self.times), len(self.var_IDs), 4) / 7.0
+
+        header = TestHeader()
+        for var_ID in self.var_IDs:
+            header.add_variable_from_ID(var_ID)
+        with Serafin.Write(self.path, 'fr', overwrite=True) as f:
+            f.write_header(header)
+            for time, values in zip(self.times, self.values):
+                f.write_entire_frame(header, time, values)
+
+    def tearDown(self):
+        # remove the test Serafin
+        os.remove(self.path)
+
+    def test_read_header(self):
+        ref_header = TestHeader()
+        with Serafin.Read(self.path, 'fr') as f:
+            f.read_header()
+            self.assertEqual(f.header.nb_frames, len(self.times))
+            self.assertEqual(f.header.var_IDs, self.var_IDs)
+            self.assertTrue(np.array_equal(f.header.ikle, ref_header.ikle))
+            self.assertTrue(np.array_equal(f.header.ipobo, ref_header.ipobo))
+            self.assertTrue(np.array_equal(f.header.x, ref_header.x))
+            self.assertTrue(np.array_equal(f.header.y, ref_header.y))
+            self.assertEqual(f.header.ikle.dtype, np.int64)
+            self.assertEqual(f.header.x.dtype, np.float64)
+
+    def test_read_header_corrupted_record(self):
+        # overwrite the leading record marker of IKLE
+        pos_ikle = (80 + 8) + (8 + 8) + len(self.var_IDs) * (8 + 32) + (40 + 8) + (16 + 8)
+        with open(self.path, 'r+b') as f:
+            f.seek(pos_ikle)
+            f.write(np.array([12345], dtype='>i4').tobytes())
+        with Serafin.Read(self.path, 'fr') as f:
+            with self.assertRaises(Serafin.SerafinValidationError):
+                f.read_header()
+
+    def test_frame_dtype(self):
+        with Serafin.Read(self.path, 'fr') as f:
+            f.read_header()
+            self.assertEqual(f.header.get_frame_dtype().itemsize, f.header.frame_size)
+
+    def test_get_time(self):
+        for use_mmap in (False, True):
+            with Serafin.Read(self.path, 'fr', use_mmap=use_mmap) as f:
+                f.read_header()
+                f.get_time()
+                f.get_time()
+                self.assertEqual(f.time, self.times)
+                self.assertIsInstance(f.time[0], float)
+
+    def test_index_cache(self):
+        index_path = self.path + settings.SERAFIN_INDEX_EXT
+        try:
+            with mock.patch.object(settings, 'SERAFIN_INDEX_CACHE', True):
+                with Serafin.Read(self.path, 'fr') as f:
+                    f.read_header()
+                    ref_header = f.header
+                self.assertTrue(os.path.exists(index_path))
+                with Serafin.Read(self.path, 'fr') as f:
+                    with mock.patch.object(Serafin.SerafinHeader, 'from_file') as from_file:
+                        f.read_header()
+                        from_file.assert_not_called()
+                    f.get_time()
+                    self.assertEqual(f.time, self.times)
+                    for attr in ('title', 'file_format', 'var_names', 'var_units', 'var_IDs', 'params', 'date',
+                                 'nb_frames', 'header_size', 'frame_size', 'endian', 'float_type'):
+                        self.assertEqual(getattr(f.header, attr), getattr(ref_header, attr))
+                    for attr in ('ikle', 'ikle_2d', 'ipobo', 'x', 'y'):
+                        self.assertTrue(np.array_equal(getattr(f.header, attr), getattr(ref_header, attr)))
+                    self.assertTrue(np.array_equal(f.read_frame(2), self.values[2]))
+
+                # the index is outdated when the file is modified
+                with Serafin.Write(self.path, 'fr', overwrite=True) as f:
+                    f.write_header(ref_header)
+                    f.write_entire_frames(ref_header, self.times[:2], self.values[:2])
+                with Serafin.Read(self.path, 'fr') as f:
+                    f.read_header()
+                    f.get_time()
+                    self.assertEqual(f.time, self.times[:2])
+        finally:
+            if os.path.exists(index_path):
+                os.remove(index_path)
+
+    def test_index_cache_ipobo(self):
+        index_path = self.path + settings.SERAFIN_INDEX_EXT
+        header = TestHeader()
+        header.ipobo = np.zeros(header.nb_nodes, dtype=np.int64)
+        with Serafin.Write(self.path, 'fr', overwrite=True) as f:
+            f.write_header(header)
+        try:
+            with mock.patch.object(settings, 'SERAFIN_INDEX_CACHE', True):
+                with Serafin.Read(self.path, 'fr') as f:
+                    f.read_header()
+                    self.assertTrue(np.array_equal(f.header.ipobo, TestHeader().ipobo))
+                with Serafin.Read(self.path, 'fr') as f:
+                    with mock.patch.object(Serafin.SerafinHeader, 'build_ipobo') as build_ipobo:
+                        f.read_header()
+                        build_ipobo.assert_not_called()
+                    self.assertTrue(np.array_equal(f.header.ipobo, TestHeader().ipobo))
+        finally:
+            if os.path.exists(index_path):
+                os.remove(index_path)
+
+    def test_read_var_in_frame(self):
+        for use_mmap in (False, True):
+            with Serafin.Read(self.path, 'fr', use_mmap=use_mmap) as f:
+                f.read_header()
+                for time_index in range(len(self.times)):
+                    for i_var, var_ID in enumerate(self.var_IDs):
+                        values = f.read_var_in_frame(time_index, var_ID)
+                        self.assertEqual(values.dtype, np.float64)
+                        self.assertTrue(np.array_equal(values, self.values[time_index, i_var]))
+
+    def test_values_view(self):
+        with Serafin.Read(self.path, 'fr', use_mmap=True) as f:
+            f.read_header()
+            view = f.get_values_view()
+            self.assertEqual(view.shape, self.values.shape)
+            self.assertTrue(np.array_equal(view, self.values))
+            self.assertTrue(np.array_equal(view[:, 2, 1], self.values[:, 2, 1]))
+
+    def test_read_frame(self):
+        for use_mmap in (False, True):
+            with Serafin.Read(self.path, 'fr', use_mmap=use_mmap) as f:
+                f.read_header()
+                self.assertTrue(np.array_equal(f.read_frame(3), self.values[3]))
+                self.assertTrue(np.array_equal(f.read_frame(1, ['H', 'U']), self.values[1, [2, 0]]))
+                self.assertEqual(f.read_frame(1, []).shape, (0, 4))
+
+    def test_read_vars_in_frames(self):
+        time_indices = [0, 1, 2, 4, 3, 3]
+        for use_mmap in (False, True):
+            with Serafin.Read(self.path, 'fr', use_mmap=use_mmap) as f:
+                f.read_header()
+                values = f.read_vars_in_frames(time_indices, ['V', 'H'])
+                self.assertTrue(np.array_equal(values, self.values[time_indices][:, [1, 2]]))
+                with self.assertRaises(Serafin.SerafinRequestError):
+                    f.read_vars_in_frames([0], ['UNKNOWN'])
+
+    def test_iter_frames(self):
+        time_indices = [4, 0, 1, 2]
+        for depth in (0, 1, 3):
+            with Serafin.Read(self.path, 'fr') as f:
+                f.read_header()
+                frames = list(f.iter_frames(time_indices, ['H', 'V'], depth=depth))
+                self.assertEqual([time_index for time_index, _ in frames], time_indices)
+                for time_index, values in frames:
+                    self.assertTrue(np.array_equal(values, self.values[time_index, [2, 1]]))
+
+                # interrupted iteration
+                for time_index, values in f.iter_frames(time_indices, depth=depth):
+                    break
+                self.assertTrue(np.array_equal(values, self.values[4]))
+
+                with self.assertRaises(Serafin.SerafinRequestError):
+                    list(f.iter_frames([0, 1, 10], depth=depth))
+
+    def test_read_nodes_time_series(self):
+        node_indices = [3, 0, 3, 1]
+        for use_mmap in (False, True):
+            with Serafin.Read(self.path, 'fr', use_mmap=use_mmap) as f:
+                f.read_header()
+                values = f.read_nodes_time_series(node_indices, ['H', 'U'], [4, 1])
+                self.assertTrue(np.array_equal(values, self.values[[4, 1]][:, [2, 0]][:, :, node_indices]))
+                values = f.read_nodes_time_series([2])
+                self.assertTrue(np.array_equal(values, self.values[:, :, [2]]))
+                with self.assertRaises(Serafin.SerafinRequestError):
+                    f.read_nodes_time_series([4])
+
+    def _check_written_values(self, path):
+        with Serafin.Read(path, 'fr') as f:
+            f.read_header()
+            f.get_time()
+            self.assertEqual(f.time, self.times)
+            for time_index in range(len(self.times)):
+                for i_var, var_ID in enumerate(self.var_IDs):
+                    self.assertTrue(np.array_equal(f.read_var_in_frame(time_index, var_ID),
+                                                   self.values[time_index, i_var]))
+
+    def test_write_buffered_frames(self):
+        path = os.path.join(HOME, 'dummpy_buffered.slf')
+        with Serafin.Read(self.path, 'fr') as f:
+            f.read_header()
+            header = f.header
+        try:
+            # buffer is flushed twice (2 frames) and the remaining frame is written when leaving the context
+            with Serafin.Write(path, 'fr', overwrite=True, buffer_size=2 * header.frame_size) as f:
+                f.write_header(header)
+                for time, values in zip(self.times, self.values):
+                    f.write_entire_frame(header, time, values)
+            self.assertEqual(os.path.getsize(path), os.path.getsize(self.path))
+            self._check_written_values(path)
+        finally:
+            os.remove(path)
+
+    def test_write_buffer_growth(self):
+        path = os.path.join(HOME, 'dummpy_buffered.slf')
+        with Serafin.Read(self.path, 'fr') as f:
+            f.read_header()
+            header = f.header
+        try:
+            # the buffer is not preallocated to `buffer_size` but grows with the written frames
+            with Serafin.Write(path, 'fr', overwrite=True, buffer_size=64 * 1024 * 1024) as f:
+                f.write_header(header)
+                for time, values in zip(self.times, self.values):
+                    f.write_entire_frame(header, time, values)
+                    self.assertLessEqual(len(f._buffer), 2 * f._nb_buffered_frames)
+            self._check_written_values(path)
+        finally:
+            os.remove(path)
+
+    def test_write_entire_frames(self):
+        path = os.path.join(HOME, 'dummpy_frames.slf')
+        with Serafin.Read(self.path, 'fr') as f:
+            f.read_header()
+            header = f.header
+        try:
+            with Serafin.Write(path, 'fr', overwrite=True) as f:
+                f.write_header(header)
+                f.write_entire_frames(header, self.times, self.values)
+            with open(path, 'rb') as f1, open(self.path, 'rb') as f2:
+                self.assertEqual(f1.read(), f2.read())
+        finally:
+            os.remove(path)
+
+
+class BoundariesTestCase(unittest.TestCase):
+    def setUp(self):
+        # 3x3 square grid (nodes numbered row by row) split in triangles, without the central square (island)
+        self.header = Serafin.SerafinHeader(title='DUMMY SERAFIN', format_type='SERAFIND')
+        self.header.nb_nodes = self.header.nb_nodes_2d = 16
+        self.header.nb_nodes_per_elem = 3
+        ikle = []
+        for j in range(3):
+            for i in range(3):
+                if (i, j) != (1, 1):
+                    n = 4 * j + i + 1
+                    ikle += [n, n + 1, n + 5, n, n + 5, n + 4]
+        self.header.nb_elements = len(ikle) // 3
+        self.header.ikle = np.array(ikle, dtype=np.int64)
+        self.header.x_stored = np.tile(np.arange(4, dtype=np.float64), 4)
+        self.header.y_stored = np.repeat(np.arange(4, dtype=np.float64), 4)
+        self.header._compute_mesh_coordinates()
+        self.header._build_ikle_2d()
+
+    def test_external_edges(self):
+        edges = self.header.get_external_edges()
+        self.assertEqual(len(edges), 16)
+        self.assertEqual(sorted(map(sorted, edges.tolist()))[:3], [[1, 2], [1, 5], [2, 3]])
+
+    def test_iter_on_boundaries(self):
+        self.assertEqual(list(self.header.iter_on_boundaries()),
+                         [[1, 2, 3, 4, 8, 12, 16, 15, 14, 13, 9, 5], [6, 10, 11, 7]])
+
+    def test_build_ipobo(self):
+        self.header.build_ipobo()
+        self.assertTrue(np.array_equal(self.header.ipobo, [1, 2, 3, 4, 12, 13, 16, 5, 11, 14, 15, 6, 10, 9, 8, 7]))
+
+    def test_edge_keys_int32(self):
+        # int32 connectivity table (e.g. scipy Delaunay simplices) with 80000 nodes: the edges (1, 30000) and
+        # (53687, 63610) have the same key modulo 2**32
+        nodes = np.stack([np.arange(80000, dtype=np.float64), np.arange(80000, dtype=np.float64) ** 2], axis=1)
+        ikle = np.array([[1, 2, 30000], [53687, 53688, 63610]], dtype=np.int32)
+        header = Serafin.SerafinHeader(title='DUMMY SERAFIN')
+        header.from_triangulation(nodes, ikle)
+        self.assertEqual(np.unique(header.get_edge_keys(header.get_all_edges())).shape[0], 6)
+        self.assertEqual(len(header.get_external_edges()), 6)
+        self.assertEqual(list(header.iter_on_boundaries()), [[1, 2, 30000], [53687, 63610, 53688]])
@@ -2,10 +2,18 @@
 Unittest for slf.variables module
 """
 
+import numpy as np
+import os
 import unittest
 
-from pyteltools.slf.variables import get_necessary_equations
+from pyteltools.slf import Serafin
+from pyteltools.slf.variables import do_calculations_in_frame, get_necessary_equations, get_variables_to_read, \
+    VariableCalculationPlan
 from pyteltools.slf.variable.variables_2d import get_US_equation, CHEZY_ID, MANNING_ID, NIKURADSE_ID, STRICKLER_ID
+from . import TestHeader
+
+
+HOME = os.path.expanduser('~')
 
 
 eq_name = lambda eqs: list(map(lambda x: x.output.ID(), eqs))
@@ -97,3 +105,84 @@ class VariablesTestCase(unittest.TestCase):
         self.assertEqual(eq_name(get_necessary_equations(['EF', 'H', 'S', 'DF'], ['QS', 'S'], True, None)), ['QS'])
         self.assertEqual(eq_name(get_necessary_equations(['QSX', 'EF', 'H', 'DF', 'QSY', 'B'], ['S', 'QS', 'H'], True, None)), ['S', 'QS'])
         self.assertEqual(eq_name(get_necessary_equations(['DMAX', 'US', 'QSX', 'EF', 'Q', 'DF', 'S', 'B'], ['H', 'QS'], True, None)), ['H', 'QS'])
+
+    def test_variables_to_read(self):
+        eqs = get_necessary_equations(['U', 'V', 'S', 'B'], ['U', 'C', 'F'], True, None)
+        self.assertEqual(get_variables_to_read(eqs, ['U', 'C', 'F']), ['S', 'B', 'U', 'V'])
+        eqs = get_necessary_equations(['U', 'V', 'H', 'B'], ['B', 'H', 'M'], True, None)
+        self.assertEqual(get_variables_to_read(eqs, ['B', 'H', 'M']), ['U', 'V', 'B', 'H'])
+
+
+class VariableCalculationPlanTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(HOME, 'dummpy_variables.slf')
+
+        # create the test Serafin (with random values)
+        self.var_IDs = ['U', 'V', 'S', 'B']
+        self.times = [float(t) for t in range(3)]
+        self.values = np.random.RandomState(0).rand(len(self.times), len(self.var_IDs), 4)
+        self.values[:, 3] = self.values[0, 3]  # constant bottom
+
+        header = TestHeader()
+        for var_ID in self.var_IDs:
+            header.add_variable_from_ID(var_ID)
+        with Serafin.Write(self.path, 'fr', overwrite=True) as f:
+            f.write_header(header)
+            f.write_entire_frames(header, self.times, self.values)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_plan(self):
+        selected = ['U', 'C', 'F']
+        eqs = get_necessary_equations(self.var_IDs, selected, True, None)
+        plan = VariableCalculationPlan(eqs, selected, np.float64, True, None)
+        self.assertEqual(plan.read_var_IDs, ['S', 'B', 'U', 'V'])
+        self.assertEqual([output_ID for _, output_ID, _, _, _ in plan.steps], ['H', 'M', 'C', 'F'])
+        # intermediate values are freed after their last use (selected outputs are kept)
+        self.assertEqual([sorted(freed_IDs) for _, _, _, _, freed_IDs in plan.steps],
+                         [['B', 'S'], ['V'], ['H'], ['M']])
+
+    def test_compute_in_frame(self):
+        selected = ['H', 'M', 'B']
+        eqs = get_necessary_equations(self.var_IDs, selected, True, None)
+        plan = VariableCalculationPlan(eqs, selected, np.float64, True, None)
+        with Serafin.Read(self.path, 'fr') as f:
+            f.read_header()
+            f.get_time()
+            values = plan.new_output_values(f.header.nb_nodes)
+            for time_index in range(len(self.times)):
+                U, V, S, B = self.values[time_index]
+                expected = np.array([S - B, np.sqrt(U ** 2 + V ** 2), B])
+                self.assertIs(plan.compute_in_frame(f, time_index, output_values=values), values)
+                self.assertTrue(np.allclose(values, expected))
+
+            # known values are used instead of being read, and are not modified
+            known_values = {'B': np.zeros(4)}
+            values = do_calculations_in_frame(eqs, f, 0, selected, np.float64, True, None, known_values)
+            self.assertTrue(np.allclose(values[0], self.values[0, 2]))
+            self.assertEqual(list(known_values.keys()), ['B'])
+
+    def test_static_variables(self):
+        selected = ['H', 'M', 'B']
+        eqs = get_necessary_equations(self.var_IDs, selected, True, None)
+        with Serafin.Read(self.path, 'fr') as f:
+            f.read_header()
+            f.get_time()
+            self.assertEqual(f.get_static_var_IDs(nb_samples=3), ['B'])
+            self.assertEqual(f.get_static_var_IDs(), [])
+
+            plan = VariableCalculationPlan(eqs, selected, np.float64, True, None,
+                                           static_var_IDs=f.get_static_var_IDs(nb_samples=3))
+            self.assertEqual((plan.static_read_var_IDs, plan.read_var_IDs), (['B'], ['S', 'U', 'V']))
+            for time_index in range(len(self.times)):
+                U, V, S, B = self.values[time_index]
+                self.assertTrue(np.allclose(plan.compute_in_frame(f, time_index),
+                                            [S - B, np.sqrt(U ** 2 + V ** 2), B]))
+
+            # H depends only on static variables: it is computed once in the first frame
+            plan = VariableCalculationPlan(eqs, selected, np.float64, True, None, static_var_IDs=['S', 'B'])
+            self.assertEqual([output_ID for _, output_ID, _, _ in plan.static_steps], ['H'])
+            for time_index in range(len(self.times)):
+                values = plan.compute_in_frame(f, time_index)
+                self.assertTrue(np.allclose(values[0], self.values[0, 2] - self.values[0, 3]))
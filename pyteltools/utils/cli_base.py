@@ -87,6 +87,10 @@ class PyTelToolsArgParse(argparse.ArgumentParser):
         if 'verbose' in add_args:
             self.group_general.add_argument('-v', '--verbose', help='increase output verbosity', action='store_true')
             self.args_known_ids.append('verbose')
+        if 'ncsize' in add_args:
+            self.group_general.add_argument('--ncsize', help='number of processes (default: 1, no parallelism)',
+                                            type=int, default=1)
+            self.args_known_ids.append('ncsize')
 
     def parse_args(self, *args, **kwargs):
         if self.group_general is None:
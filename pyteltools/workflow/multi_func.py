@@ -3,7 +3,6 @@ from multiprocessing import Process, Queue
 import numpy as np
 import os
 from shapefile import ShapefileException
-from shapely.geometry import Polygon
 
 from pyteltools.conf import settings
 from pyteltools.geom import BlueKenue, Shapefile
@@ -12,8 +11,8 @@ from pyteltools.slf.flux import FluxCalculator, PossibleFluxComputation, Triangu
 from pyteltools.slf.interpolation import MeshInterpolator
 import pyteltools.slf.misc as operations
 from pyteltools.slf import Serafin
-from pyteltools.slf.variables import do_calculations_in_frame, get_available_variables, \
-    get_necessary_equations, new_variables_from_US
+from pyteltools.slf.variables import get_available_variables, get_necessary_equations, new_variables_from_US, \
+    VariableCalculationPlan
 from pyteltools.slf.volume import TruncatedTriangularPrisms, VolumeCalculator
 
 from .nodes_op import VerticalAggregationNode  # use only class constants VERTICAL_OPERATIONS
@@ -510,15 +509,16 @@ def write_simple_slf(input_data, filename):
     with Serafin.Read(input_data.filename, input_data.language) as input_stream:
         input_stream.header = input_data.header
         input_stream.time = input_data.time
+        plan = VariableCalculationPlan(input_data.equations, input_data.selected_vars, output_header.np_float_type,
+                                       is_2d=output_header.is_2d, us_equation=input_data.us_equation,
+                                       static_var_IDs=input_stream.get_static_var_IDs())
+        values = plan.new_output_values(output_header.nb_nodes)
 
-        with Serafin.Write(filename, input_data.language, True) as output_stream:
+        with Serafin.Write(filename, input_data.language, True,
+                           buffer_size=settings.SERAFIN_WRITE_BUFFER_SIZE) as output_stream:
             output_stream.write_header(output_header)
             for time_index in input_data.selected_time_indices:
-                # FIXME Optimization: Do calculations only on target layer and avoid reshaping afterwards
-                values = do_calculations_in_frame(input_data.equations, input_stream, time_index,
-                                                  input_data.selected_vars, output_header.np_float_type,
-                                                  is_2d=output_header.is_2d, us_equation=input_data.us_equation,
-                                                  ori_values={})
+                plan.compute_in_frame(input_stream, time_index, output_values=values)
                 output_stream.write_entire_frame(output_header, input_data.time[time_index], values)
     return True, success_message('Write Serafin', input_data.job_id)
 
@@ -549,6 +549,7 @@ def write_max_min_mean(input_data, filename):
             vector_calculator = operations.VectorMaxMinMeanCalculator(input_data.operator, input_stream,
                                                                       vectors, input_data.selected_time_indices,
                                                                       additional_equations)
+        # serial reductions: this function already runs in one of the workflow processes
         if has_scalar:
             scalar_calculator.run()
         if has_vector:
@@ -611,18 +612,10 @@ def write_arrival_duration(input_data, filename):
     with Serafin.Read(input_data.filename, input_data.language) as input_stream:
         input_stream.header = input_data.header
         input_stream.time = input_data.time
-        calculators = []
-
-        for i, condition in enumerate(conditions):
-            calculators.append(operations.ArrivalDurationCalculator(input_stream, input_data.selected_time_indices,
-                                                                    condition))
-        for calculator in calculators:
-            calculator.run()
-
-        values = np.empty((2*len(conditions), input_data.header.nb_nodes))
-        for i, calculator in enumerate(calculators):
-            values[2*i, :] = calculator.arrival
-            values[2*i+1, :] = calculator.duration
+        calculator = operations.ArrivalDurationMultiCalculator(input_stream, input_data.selected_time_indices,
+                                                               conditions)
+        calculator.run()
+        values = calculator.finishing_up()
 
         if time_unit == 'minute':
             values /= 60
@@ -732,17 +725,19 @@ def write_slf_single_layer(input_data, filename):
     selected_variables = [(var, input_data.selected_vars_names[var][0],
                            input_data.selected_vars_names[var][1]) for var in input_data.selected_vars]
     output_header.set_variables(selected_variables)
-
     with Serafin.Read(input_data.filename, input_data.language) as input_stream:
         input_stream.header = input_data.header
         input_stream.time = input_data.time
+        plan = VariableCalculationPlan(input_data.equations, input_data.selected_vars, output_header.np_float_type,
+                                       is_2d=output_header.is_2d, us_equation=input_data.us_equation,
+                                       static_var_IDs=input_stream.get_static_var_IDs())
+        values = plan.new_output_values(input_data.header.nb_nodes)
 
         with Serafin.Write(filename, input_data.language, True) as output_stream:
             output_stream.write_header(output_header)
             for time_index in input_data.selected_time_indices:
-                values = do_calculations_in_frame(input_data.equations, input_stream, time_index,
-                                                  input_data.selected_vars, output_header.np_float_type,
-                                                  is_2d=output_header.is_2d, us_equation=input_data.us_equation)
+                # FIXME Optimization: Do calculations only on target layer and avoid reshaping afterwards
+                plan.compute_in_frame(input_stream, time_index, output_values=values)
                 new_shape = (values.shape[0], input_stream.header.nb_planes,
                              values.shape[1] // input_stream.header.nb_planes)
                 values_at_layer = values.reshape(new_shape)[:, input_data.metadata['layer_selection'] - 1, :]
@@ -784,10 +779,7 @@ def write_slf_vertical_aggregation(input_data, filename):
 
 
 def construct_mesh(mesh):
-    for i, j, k in mesh.ikle:
-        t = Polygon([mesh.points[i], mesh.points[j], mesh.points[k]])
-        mesh.triangles[i, j, k] = t
-        mesh.index.insert(i, t.bounds, obj=(i, j, k))
+    mesh.construct_index()
 
 
 def compute_volume(node_id, fid, data, aux_data, options, csv_separator, fmt_float):
@@ -995,21 +987,23 @@ def interpolate_points(node_id, fid, data, aux_data, options, csv_separator, fmt
     csv_data = CSVData(data.filename, header)
 
     nb_selected_vars = len(selected_vars)
+    nb_frames = len(data.selected_time_indices)
+    node_indices = np.array([ijk for ijk, _ in point_interpolators]).flatten()
+    weights = np.array([interpolator for _, interpolator in point_interpolators])
 
     with Serafin.Read(data.filename, data.language) as input_stream:
         input_stream.header = data.header
         input_stream.time = data.time
 
+        nodes_values = input_stream.read_nodes_time_series(node_indices, selected_vars, data.selected_time_indices)
+        interpolated_values = (nodes_values.reshape(nb_frames, nb_selected_vars, nb_inside, 3) * weights).sum(axis=3)
+
         for index, index_time in enumerate(data.selected_time_indices):
             row = [str(data.time[index_time])]
 
-            var_values = []
-            for var in selected_vars:
-                var_values.append(input_stream.read_var_in_frame(index_time, var))
-
-            for (i, j, k), interpolator in point_interpolators:
+            for index_point in range(nb_inside):
                 for index_var in range(nb_selected_vars):
-                    row.append(fmt_float.format(interpolator.dot(var_values[index_var][[i, j, k]])))
+                    row.append(fmt_float.format(interpolated_values[index, index_var, index_point]))
             csv_data.add_row(row)
 
     csv_data.write(filename, csv_separator)
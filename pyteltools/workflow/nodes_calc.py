@@ -1,3 +1,4 @@
+import numpy as np
 import os
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import (QApplication, QCheckBox, QComboBox, QDialog, QGridLayout,
@@ -534,9 +535,7 @@ class ComputeVolumeNode(TwoInOneOutNode):
                 i_result = [str(calculator.input_stream.time[time_index])]
                 values = calculator.read_values_in_frame(time_index)
 
-                for j in range(len(calculator.polygons)):
-                    weight = calculator.weights[j]
-                    volume = calculator.volume_in_frame_in_polygon(weight, values, calculator.polygons[j])
+                for volume in calculator.volumes_in_frame(values):
                     if calculator.volume_type == VolumeCalculator.POSITIVE:
                         for v in volume:
                             i_result.append(fmt_float.format(v))
@@ -798,15 +797,11 @@ class ComputeFluxNode(TwoInOneOutNode):
                                   'language': self.in_data.language, 'start time': self.in_data.start_time,
                                   'var IDs': var_IDs}
 
-            for i, time_index in enumerate(calculator.time_indices):
+            frames = calculator.input_stream.iter_frames(calculator.time_indices, calculator.var_IDs)
+            for i, (time_index, values) in enumerate(frames):
                 i_result = [str(calculator.input_stream.time[time_index])]
-                values = []
-                for var_ID in calculator.var_IDs:
-                    values.append(calculator.input_stream.read_var_in_frame(time_index, var_ID))
 
-                for j in range(len(calculator.sections)):
-                    intersections = calculator.intersections[j]
-                    flux = calculator.flux_in_frame(intersections, values)
+                for flux in calculator.fluxes_in_frame(values):
                     i_result.append(fmt_float.format(flux))
                 self.data.add_row(i_result)
 
@@ -952,20 +947,24 @@ class InterpolateOnPointsNode(TwoInOneOutNode):
         nb_selected_vars = len(selected_vars)
         nb_frames = len(self.in_data.selected_time_indices)
 
+        node_indices = np.array([ijk for ijk, _ in point_interpolators]).flatten()
+        weights = np.array([interpolator for _, interpolator in point_interpolators])
+
         with Serafin.Read(self.in_data.filename, self.in_data.language) as input_stream:
             input_stream.header = self.in_data.header
             input_stream.time = self.in_data.time
 
+            nodes_values = input_stream.read_nodes_time_series(node_indices, selected_vars,
+                                                               self.in_data.selected_time_indices)
+            interpolated_values = (nodes_values.reshape(nb_frames, nb_selected_vars, len(point_interpolators), 3)
+                                   * weights).sum(axis=3)
+
             for index, index_time in enumerate(self.in_data.selected_time_indices):
                 row = [str(self.in_data.time[index_time])]
 
-                var_values = []
-                for var in selected_vars:
-                    var_values.append(input_stream.read_var_in_frame(index_time, var))
-
-                for (i, j, k), interpolator in point_interpolators:
+                for index_point in range(len(point_interpolators)):
                     for index_var in range(nb_selected_vars):
-                        row.append(fmt_float.format(interpolator.dot(var_values[index_var][[i, j, k]])))
+                        row.append(fmt_float.format(interpolated_values[index, index_var, index_point]))
 
                 self.data.add_row(row)
                 self.progress_bar.setValue(100 * (index+1) / nb_frames)
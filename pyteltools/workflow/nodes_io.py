@@ -11,7 +11,7 @@ from pyteltools.slf.datatypes import PointData, PolylineData, SerafinData
 from pyteltools.slf.interpolation import MeshInterpolator
 import pyteltools.slf.misc as operations
 from pyteltools.slf import Serafin
-from pyteltools.slf.variables import do_calculations_in_frame
+from pyteltools.slf.variables import VariableCalculationPlan
 
 from .Node import Node, SingleInputNode, SingleOutputNode, OneInOneOutNode
 from .util import GeomInputOptionPanel, GeomOutputOptionPanel, INDEX_FROM_1, \
@@ -139,13 +139,15 @@ class WriteSerafinNode(OneInOneOutNode):
         with Serafin.Read(input_data.filename, input_data.language) as input_stream:
             input_stream.header = input_data.header
             input_stream.time = input_data.time
-            with Serafin.Write(self.filename, input_data.language, True) as output_stream:
+            plan = VariableCalculationPlan(input_data.equations, input_data.selected_vars, output_header.np_float_type,
+                                           is_2d=output_header.is_2d, us_equation=input_data.us_equation,
+                                           static_var_IDs=input_stream.get_static_var_IDs())
+            values = plan.new_output_values(output_header.nb_nodes)
+            with Serafin.Write(self.filename, input_data.language, True,
+                               buffer_size=settings.SERAFIN_WRITE_BUFFER_SIZE) as output_stream:
                 output_stream.write_header(output_header)
                 for i, time_index in enumerate(input_data.selected_time_indices):
-                    values = do_calculations_in_frame(input_data.equations, input_stream, time_index,
-                                                      input_data.selected_vars, output_header.np_float_type,
-                                                      is_2d=output_header.is_2d, us_equation=input_data.us_equation,
-                                                      ori_values={})
+                    plan.compute_in_frame(input_stream, time_index, output_values=values)
                     output_stream.write_entire_frame(output_header, input_data.time[time_index], values)
 
                     self.progress_bar.setValue(100 * (i+1) / len(input_data.selected_time_indices))
@@ -183,15 +185,22 @@ class WriteSerafinNode(OneInOneOutNode):
                 vector_calculator = operations.VectorMaxMinMeanCalculator(input_data.operator, input_stream,
                                                                           vectors, input_data.selected_time_indices,
                                                                           additional_equations)
-            for i, time_index in enumerate(input_data.selected_time_indices):
-
-                if has_scalar:
-                    scalar_calculator.max_min_mean_in_frame(time_index)
-                if has_vector:
-                    vector_calculator.max_min_mean_in_frame(time_index)
+            # frames are reduced by coarse chunks (each split between the processes) to update the progress bar
+            time_indices = input_data.selected_time_indices
+            calculators = [calculator for calculator in (scalar_calculator, vector_calculator)
+                           if calculator is not None]
+            chunks = operations.split_time_indices(time_indices, min(10, len(time_indices) // settings.NCSIZE))
+            nb_processed_frames = 0
+            for chunk in chunks:
+                for calculator in calculators:
+                    calculator.time_indices = chunk
+                    calculator.run(ncsize=settings.NCSIZE)
 
-                self.progress_bar.setValue(100 * (i+1) / len(input_data.selected_time_indices))
+                nb_processed_frames += len(chunk)
+                self.progress_bar.setValue(100 * nb_processed_frames / len(time_indices))
                 QApplication.processEvents()
+            for calculator in calculators:
+                calculator.time_indices = time_indices  # the mean is divided by the total number of frames
 
             if has_scalar and not has_vector:
                 values = scalar_calculator.finishing_up()
@@ -262,22 +271,15 @@ class WriteSerafinNode(OneInOneOutNode):
         with Serafin.Read(input_data.filename, input_data.language) as input_stream:
             input_stream.header = input_data.header
             input_stream.time = input_data.time
-            calculators = []
-
-            for i, condition in enumerate(conditions):
-                calculators.append(operations.ArrivalDurationCalculator(input_stream, input_data.selected_time_indices,
-                                                                        condition))
+            calculator = operations.ArrivalDurationMultiCalculator(input_stream, input_data.selected_time_indices,
+                                                                   conditions)
             for i, index in enumerate(input_data.selected_time_indices[1:]):
-                for calculator in calculators:
-                    calculator.arrival_duration_in_frame(index)
+                calculator.arrival_duration_in_frame(index)
 
                 self.progress_bar.setValue(100 * (i+1) / len(input_data.selected_time_indices))
                 QApplication.processEvents()
 
-            values = np.empty((2*len(conditions), input_data.header.nb_nodes))
-            for i, calculator in enumerate(calculators):
-                values[2*i, :] = calculator.arrival
-                values[2*i+1, :] = calculator.duration
+            values = calculator.finishing_up()
 
             if time_unit == 'minute':
                 values /= 60
@@ -394,14 +396,16 @@ class WriteSerafinNode(OneInOneOutNode):
         with Serafin.Read(input_data.filename, input_data.language) as input_stream:
             input_stream.header = input_data.header
             input_stream.time = input_data.time
-            with Serafin.Write(self.filename, input_data.language, True) as output_stream:
+            plan = VariableCalculationPlan(input_data.equations, input_data.selected_vars, output_header.np_float_type,
+                                           is_2d=output_header.is_2d, us_equation=input_data.us_equation,
+                                           static_var_IDs=input_stream.get_static_var_IDs())
+            values = plan.new_output_values(input_data.header.nb_nodes)
+            with Serafin.Write(self.filename, input_data.language, True,
+                               buffer_size=settings.SERAFIN_WRITE_BUFFER_SIZE) as output_stream:
                 output_stream.write_header(output_header)
                 for i, time_index in enumerate(input_data.selected_time_indices):
                     # FIXME Optimization: Do calculations only on target layer and avoid reshaping afterwards
-                    values = do_calculations_in_frame(input_data.equations, input_stream, time_index,
-                                                      input_data.selected_vars, output_header.np_float_type,
-                                                      is_2d=output_header.is_2d, us_equation=input_data.us_equation,
-                                                      ori_values={})
+                    plan.compute_in_frame(input_stream, time_index, output_values=values)
                     new_shape = (values.shape[0], input_stream.header.nb_planes,
                                  values.shape[1] // input_stream.header.nb_planes)
                     values_at_layer = values.reshape(new_shape)[:, input_data.metadata['layer_selection'] - 1, :]
@@ -435,7 +439,8 @@ class WriteSerafinNode(OneInOneOutNode):
             vertical_calculator = operations.VerticalMaxMinMeanCalculator(operation_type, input_stream, output_header,
                                                                           selected_variables)
             output_header.set_variables(vertical_calculator.get_variables())  # sort variables
-            with Serafin.Write(self.filename, input_data.language, True) as output_stream:
+            with Serafin.Write(self.filename, input_data.language, True,
+                               buffer_size=settings.SERAFIN_WRITE_BUFFER_SIZE) as output_stream:
                 output_stream.write_header(output_header)
                 for i, time_index in enumerate(input_data.selected_time_indices):
                     vars_2d = vertical_calculator.max_min_mean_in_frame(time_index)